@@ -1,42 +1,258 @@
 from __future__ import annotations
 
+import asyncio
 import os
+import threading
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, TypeVar
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 
-from backend.graph.graph import apply_decision as apply_decision_graph
-from backend.graph.graph import run_proposal as run_proposal_graph
+from backend.graph.consistency import (
+    build_outline_index,
+    prepare_plan,
+    repair_chapters,
+    stored_outline_index,
+    validate_plan,
+)
+from backend.graph.drafting import carry_unchanged_drafts
 from backend.graph.nodes_llm import freeze_bible_node, plan_book_node
-from backend.graph.schemas import PlanPackage, ProposalPackage, ProposalStatus
-from backend.llm.client import LLMClient
-from backend.storage.sqlite import SessionsRepo
+from backend.graph.schemas import (
+    BookDraft,
+    OutlineFull,
+    PlanPackage,
+    PlanValidation,
+    ProposalPackage,
+    ProposalStatus,
+    StoryBible,
+)
+from backend.llm.deadline import Deadline, RequestCancelled, deadline_scope
+from backend.llm.scheduler import SchedulerRejected, priority_scope
+from backend.observability.metrics import metrics, session_scope
+from backend.observability.tracing import configure_from_env as configure_tracing_from_env
+from backend.storage.base import SessionConflict, SessionFilter, decode_cursor, encode_cursor
+
+if TYPE_CHECKING:
+    from backend.graph.speculation import SpeculationPolicy
+    from backend.llm.backends import LLMBackend
+    from backend.storage.archive import ArchivePolicy
+    from backend.storage.dedup import DedupPolicy
+    from backend.wiring import AppServices
 
 
 class IntakeRequest(BaseModel):
     text: str
 
 
+class SimilarSession(BaseModel):
+    session_id: str
+    similarity: float
+
+
 class IntakeResponse(BaseModel):
     session_id: str
+    similar: list[SimilarSession] = []
+    reused_from: str | None = None
+
+
+class ReuseRequest(BaseModel):
+    source_session_id: str
 
 
 class DecisionRequest(BaseModel):
     session_id: str
     action: str
     text: str | None = None
+    version: int | None = None
 
 
 class RegenerateRequest(BaseModel):
     force: bool = False
 
 
-def create_app(db_path: str | None = None) -> FastAPI:
-    app = FastAPI(title="novel_flow backend")
-    repo = SessionsRepo(db_path or os.getenv("NOVEL_FLOW_DB", "novel_flow.db"))
-    llm_client = LLMClient(temperature=0)
+class SessionSummary(BaseModel):
+    session_id: str
+    status: str
+    version: int
+    created_at: str
+    updated_at: str
+
+
+class SessionPage(BaseModel):
+    items: list[SessionSummary]
+    next_cursor: str | None = None
+
+
+T = TypeVar("T")
+DISCONNECT_POLL_S = 0.1
+CLIENT_CLOSED_REQUEST = 499
+STORED_PROPOSAL_STATUSES = {ProposalStatus.NEEDS_CONFIRMATION.value, ProposalStatus.APPROVED.value}
+
+
+def _proposal_etag(row: dict[str, Any]) -> str:
+    return f'"p{row["version"]}.r{row["revision"]}"'
+
+
+def _plan_etag(row: dict[str, Any]) -> str:
+    return f'"b{row["bible_version"]}.o{row["outline_version"]}.r{row["revision"]}"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag in tags
+
+
+def _conditional(
+    route: str,
+    request: Request,
+    current: dict[str, Any],
+    etag_of: Callable[[dict[str, Any]], str],
+    load: Callable[[], dict[str, Any] | None],
+    render: Callable[[dict[str, Any]], str | None],
+) -> Response | None:
+    etag = etag_of(current)
+    if _not_modified(request, etag):
+        metrics.inc("novel_flow_conditional_responses_total", route=route, outcome="not_modified")
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    row = load()
+    content = None if row is None else render(row)
+    if content is None:
+        return None
+    metrics.inc("novel_flow_conditional_responses_total", route=route, outcome="stored")
+    return Response(
+        content=content, media_type="application/json", headers={"ETag": etag_of(row), "Cache-Control": "no-cache"}
+    )
+
+
+def _plan_body(row: dict[str, Any]) -> str | None:
+    if row["status"] != ProposalStatus.APPROVED.value or not row["bible_json"] or not row["outline_full_json"]:
+        return None
+    return (
+        f'{{"bible":{row["bible_json"]},"outline_full":{row["outline_full_json"]},'
+        f'"bible_version":{int(row["bible_version"] or 1)},"outline_version":{int(row["outline_version"] or 1)}}}'
+    )
+
+
+def _request_timeout(request: Request, default: float | None) -> float | None:
+    header = request.headers.get("x-request-timeout")
+    if header is None:
+        return default
+    try:
+        timeout_s = float(header)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="X-Request-Timeout must be a number of seconds") from exc
+    if timeout_s <= 0:
+        raise HTTPException(status_code=400, detail="X-Request-Timeout must be positive")
+    return timeout_s if default is None else min(timeout_s, default)
+
+
+def _db_timestamp(value: datetime | None) -> str | None:
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def create_app(
+    db_path: str | None = None,
+    llm_backend: LLMBackend | str | None = None,
+    shared_dir: str | None = None,
+    archive_policy: ArchivePolicy | None = None,
+    speculation_policy: SpeculationPolicy | None = None,
+    request_timeout_s: float | None = None,
+    dedup_policy: DedupPolicy | None = None,
+) -> FastAPI:
+    configure_tracing_from_env(os.getenv("NOVEL_FLOW_TRACING"))
+    if request_timeout_s is None and os.getenv("NOVEL_FLOW_REQUEST_TIMEOUT_S"):
+        request_timeout_s = float(os.environ["NOVEL_FLOW_REQUEST_TIMEOUT_S"])
+    wired: list[AppServices] = []
+    wiring_lock = threading.Lock()
+
+    def services() -> AppServices:
+        if not wired:
+            with wiring_lock:
+                if not wired:
+                    from backend.wiring import build_services
+
+                    wired.append(
+                        build_services(
+                            db_path=db_path,
+                            llm_backend=llm_backend,
+                            shared_dir=shared_dir,
+                            archive_policy=archive_policy,
+                            speculation_policy=speculation_policy,
+                            dedup_policy=dedup_policy,
+                        )
+                    )
+        return wired[0]
+
+    @asynccontextmanager
+    async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+        svc = services()
+        if svc.archiver is not None:
+            svc.archiver.start()
+        if svc.requirements is not None:
+            threading.Thread(
+                target=svc.requirements.backfill, args=(svc.repo,), name="requirement-backfill", daemon=True
+            ).start()
+        try:
+            yield
+        finally:
+            if svc.archiver is not None:
+                svc.archiver.stop()
+            if svc.speculator is not None:
+                svc.speculator.shutdown()
+
+    app = FastAPI(title="novel_flow backend", lifespan=lifespan)
+    app.state.services = services
+
+    @app.middleware("http")
+    async def record_request_metrics(
+        request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        started = time.perf_counter()
+        metrics.add_gauge("novel_flow_http_in_flight", 1)
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            metrics.add_gauge("novel_flow_http_in_flight", -1)
+            route = request.scope.get("route")
+            metrics.observe(
+                "novel_flow_http_request_duration_seconds",
+                time.perf_counter() - started,
+                method=request.method,
+                route=getattr(route, "path", "unmatched"),
+                status=status,
+            )
+
+    def speculate(session_id: str, package: ProposalPackage) -> None:
+        speculator = services().speculator
+        if speculator is not None and package.status == ProposalStatus.NEEDS_CONFIRMATION:
+            speculator.submit(session_id, package)
 
     def get_or_generate_plan(session_id: str, *, force: bool = False) -> PlanPackage:
+        flights = services().flights
+        if flights is None:
+            return generate_plan(session_id, force=force)
+        with flights.hold(f"plan:{session_id}"):
+            return generate_plan(session_id, force=force)
+
+    def generate_plan(session_id: str, *, force: bool) -> PlanPackage:
+        repo = services().repo
         session = repo.get_session(session_id)
         if session is None:
             raise HTTPException(status_code=404, detail="Session not found")
@@ -58,71 +274,385 @@ def create_app(db_path: str | None = None) -> FastAPI:
         proposal = ProposalPackage.model_validate(proposal_json)
         spec = proposal.requirement_spec
 
-        bible = freeze_bible_node(spec=spec, proposal=proposal, client=llm_client)
-        outline_full = plan_book_node(bible=bible, spec=spec, client=llm_client)
+        speculator = services().speculator
+        speculative = None if force or speculator is None else speculator.claim(session_id, proposal.version)
+        llm_client = services().llm_client
+        with session_scope(session_id):
+            if speculative is not None:
+                bible = StoryBible.model_validate(speculative[0])
+                outline_full = OutlineFull.model_validate(speculative[1])
+            else:
+                bible = freeze_bible_node(spec=spec, proposal=proposal, client=llm_client)
+                outline_full = plan_book_node(bible=bible, spec=spec, client=llm_client)
+            outline_full, outline_index, _ = prepare_plan(bible, outline_full, llm_client)
 
-        bible_version = int(session.get("bible_version") or 1)
-        outline_version = int(session.get("outline_version") or 1)
-        if force:
-            bible_version += 1
-            outline_version += 1
-
-        repo.update_session(
-            session_id,
-            bible_json=bible.model_dump(mode="json"),
-            outline_full_json=outline_full.model_dump(mode="json"),
-            bible_version=bible_version,
-            outline_version=outline_version,
-        )
+        try:
+            saved = repo.save_plan(
+                session_id,
+                bible_json=bible.model_dump(mode="json"),
+                outline_full_json=outline_full.model_dump(mode="json"),
+                bump=force,
+                outline_index_json=outline_index.model_dump(mode="json"),
+                expected_revision=int(session["revision"]),
+            )
+        except SessionConflict as exc:
+            raise HTTPException(status_code=409, detail=str(exc)) from exc
+        if saved is None:
+            raise HTTPException(status_code=404, detail="Session not found")
         return PlanPackage(
             bible=bible,
             outline_full=outline_full,
-            bible_version=bible_version,
-            outline_version=outline_version,
+            bible_version=int(saved["bible_version"]),
+            outline_version=int(saved["outline_version"]),
         )
 
     @app.get("/health")
     def health() -> dict[str, str]:
         return {"status": "ok"}
 
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def metrics_endpoint() -> PlainTextResponse:
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+    @app.get("/metrics/sessions")
+    def session_metrics(limit: int = 10, session_id: str | None = None) -> list[dict[str, object]]:
+        if session_id is not None:
+            usage = metrics.session_usage(session_id)
+            if usage is None:
+                raise HTTPException(status_code=404, detail="No usage recorded for session")
+            return [{"session_id": session_id, **asdict(usage), "total_tokens": usage.total_tokens}]
+        return metrics.top_sessions(limit)
+
+    @app.get("/sessions", response_model=SessionPage)
+    def sessions(
+        status: str | None = None,
+        updated_after: datetime | None = None,
+        updated_before: datetime | None = None,
+        version: int | None = None,
+        limit: int = Query(50, ge=1, le=500),
+        cursor: str | None = None,
+    ) -> SessionPage:
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        filters = SessionFilter(
+            status=status,
+            updated_after=_db_timestamp(updated_after),
+            updated_before=_db_timestamp(updated_before),
+            version=version,
+        )
+        rows = services().repo.list_sessions(limit=limit + 1, filters=filters, after=after)
+        next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+        return SessionPage(items=rows[:limit], next_cursor=next_cursor)
+
+    def similar_sessions(text: str) -> list[SimilarSession]:
+        svc = services()
+        if svc.requirements is None:
+            return []
+        matches = []
+        for session_id, score in svc.requirements.similar(text):
+            current = svc.repo.get_projection(session_id)
+            if current is not None and current["status"] == ProposalStatus.APPROVED.value:
+                matches.append(SimilarSession(session_id=session_id, similarity=score))
+        return matches
+
+    def reuse(session_id: str, source_session_id: str) -> ProposalPackage:
+        repo = services().repo
+        source = repo.get_session(source_session_id)
+        if source is None or source["status"] != ProposalStatus.APPROVED.value or source["proposal_json"] is None:
+            raise HTTPException(status_code=409, detail="Source session has no approved proposal")
+        target = repo.get_session(session_id)
+        if target is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        if target["status"] != ProposalStatus.NEW.value:
+            raise HTTPException(status_code=409, detail="Only new sessions can reuse a proposal")
+
+        proposal = ProposalPackage.model_validate(source["proposal_json"])
+        spec = proposal.requirement_spec.model_copy(update={"raw_text": target["requirement_text"]})
+        package = proposal.model_copy(
+            update={
+                "requirement_spec": spec,
+                "version": 1,
+                "status": ProposalStatus.NEEDS_CONFIRMATION,
+                "change_summary": f"Reused from similar session {source_session_id}.",
+            }
+        )
+        try:
+            repo.update_session(
+                session_id,
+                expected_revision=int(target["revision"]),
+                spec_json=spec.model_dump(mode="json"),
+                proposal_json=package.model_dump(mode="json"),
+                status=ProposalStatus.NEEDS_CONFIRMATION.value,
+                version=1,
+            )
+        except SessionConflict as exc:
+            raise HTTPException(status_code=409, detail=str(exc)) from exc
+        metrics.inc("novel_flow_requirement_reuse_total")
+        speculate(session_id, package)
+        return package
+
     @app.post("/intake", response_model=IntakeResponse)
     def intake(payload: IntakeRequest) -> IntakeResponse:
-        return IntakeResponse(session_id=repo.create_session(payload.text))
+        svc = services()
+        session_id = svc.repo.create_session(payload.text)
+        similar = similar_sessions(payload.text)
+        if svc.requirements is not None and svc.requirements.policy.mode == "auto":
+            for match in similar:
+                try:
+                    reuse(session_id, match.session_id)
+                except HTTPException:
+                    continue
+                return IntakeResponse(session_id=session_id, similar=similar, reused_from=match.session_id)
+        return IntakeResponse(session_id=session_id, similar=similar)
 
-    @app.get("/proposal/{session_id}", response_model=ProposalPackage)
-    def proposal(session_id: str) -> ProposalPackage:
-        session = repo.get_session(session_id)
-        if session is None:
+    @app.post("/intake/{session_id}/reuse", response_model=ProposalPackage)
+    def reuse_proposal(session_id: str, payload: ReuseRequest) -> ProposalPackage:
+        return reuse(session_id, payload.source_session_id)
+
+    def load_proposal(session_id: str, request: Request, response: Response) -> Any:
+        svc = services()
+        current = svc.repo.get_projection(session_id)
+        if current is None:
             raise HTTPException(status_code=404, detail="Session not found")
+        if current["status"] in STORED_PROPOSAL_STATUSES:
+            stored = _conditional(
+                "/proposal/{session_id}",
+                request,
+                current,
+                _proposal_etag,
+                lambda: svc.repo.get_projection(session_id, ("proposal_json",)),
+                lambda row: row["proposal_json"] if row["status"] in STORED_PROPOSAL_STATUSES else None,
+            )
+            if stored is not None:
+                return stored
 
-        return run_proposal_graph(session_id=session_id, repo=repo, client=llm_client)
+        try:
+            package = svc.graph_service.run_proposal(session_id)
+        except SessionConflict as exc:
+            raise HTTPException(status_code=409, detail=str(exc)) from exc
+        metrics.inc("novel_flow_conditional_responses_total", route="/proposal/{session_id}", outcome="generated")
+        speculate(session_id, package)
+        current = svc.repo.get_projection(session_id)
+        if current is not None:
+            response.headers["ETag"] = _proposal_etag(current)
+            response.headers["Cache-Control"] = "no-cache"
+        return package
 
-    @app.post("/decision", response_model=ProposalPackage)
-    def decision(payload: DecisionRequest) -> ProposalPackage:
-        session = repo.get_session(payload.session_id)
+    def decide(payload: DecisionRequest) -> ProposalPackage:
+        svc = services()
+        session = svc.repo.get_session(payload.session_id)
         if session is None:
             raise HTTPException(status_code=404, detail="Session not found")
+        if payload.version is not None and payload.version != int(session["version"]):
+            metrics.inc("novel_flow_session_conflicts_total")
+            raise HTTPException(
+                status_code=409,
+                detail=f"Decision targets proposal version {payload.version}, current is {session['version']}",
+            )
 
         try:
-            return apply_decision_graph(
+            package = svc.graph_service.apply_decision(
                 session_id=payload.session_id,
                 action=payload.action,
                 text=payload.text,
-                repo=repo,
-                client=llm_client,
             )
+        except SessionConflict as exc:
+            raise HTTPException(status_code=409, detail=str(exc)) from exc
         except ValueError as exc:
             raise HTTPException(status_code=400, detail=str(exc)) from exc
+        if svc.speculator is not None and payload.action.lower() in {"edit", "reset"}:
+            svc.speculator.discard(payload.session_id)
+        if svc.speculator is not None and package.status == ProposalStatus.APPROVED:
+            svc.speculator.promote(payload.session_id, package.version)
+        if svc.requirements is not None and package.status == ProposalStatus.APPROVED:
+            svc.requirements.add(payload.session_id, session["requirement_text"])
+        speculate(payload.session_id, package)
+        return package
+
+    def load_plan(session_id: str, request: Request, response: Response) -> Any:
+        repo = services().repo
+        current = repo.get_projection(session_id)
+        if current is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        if current["status"] == ProposalStatus.APPROVED.value and current["bible_version"] is not None:
+            stored = _conditional(
+                "/plan/{session_id}",
+                request,
+                current,
+                _plan_etag,
+                lambda: repo.get_projection(session_id, ("bible_json", "outline_full_json")),
+                _plan_body,
+            )
+            if stored is not None:
+                return stored
+
+        package = get_or_generate_plan(session_id=session_id)
+        metrics.inc("novel_flow_conditional_responses_total", route="/plan/{session_id}", outcome="generated")
+        current = repo.get_projection(session_id)
+        if current is not None:
+            response.headers["ETag"] = _plan_etag(current)
+            response.headers["Cache-Control"] = "no-cache"
+        return package
+
+    def regenerate(session_id: str) -> PlanPackage:
+        from backend.llm.cache import fresh_responses_scope
+
+        with priority_scope("background"), fresh_responses_scope():
+            return get_or_generate_plan(session_id=session_id, force=True)
+
+    def stored_plan(session_id: str) -> dict[str, Any]:
+        session = services().repo.get_session(session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        if not session.get("bible_json") or not session.get("outline_full_json"):
+            raise HTTPException(status_code=409, detail="Plan has not been generated")
+        return session
+
+    def validate(session_id: str) -> PlanValidation:
+        session = stored_plan(session_id)
+        bible = StoryBible.model_validate(session["bible_json"])
+        outline_full = OutlineFull.model_validate(session["outline_full_json"])
+        index = stored_outline_index(outline_full, session.get("outline_index_json"))
+        violations = validate_plan(bible, outline_full, index)
+        return PlanValidation(
+            outline_version=int(session.get("outline_version") or 1), valid=not violations, violations=violations
+        )
+
+    def repair(session_id: str) -> PlanPackage:
+        from backend.llm.cache import fresh_responses_scope
+
+        svc = services()
+        with priority_scope("background"), fresh_responses_scope():
+            if svc.flights is None:
+                return repair_plan(session_id)
+            with svc.flights.hold(f"plan:{session_id}"):
+                return repair_plan(session_id)
+
+    def repair_plan(session_id: str) -> PlanPackage:
+        svc = services()
+        session = stored_plan(session_id)
+        bible = StoryBible.model_validate(session["bible_json"])
+        outline_full = OutlineFull.model_validate(session["outline_full_json"])
+        outline_version = int(session.get("outline_version") or 1)
+        index = stored_outline_index(outline_full, session.get("outline_index_json"))
+        violations = validate_plan(bible, outline_full, index)
+        if any(violation.chapter is not None for violation in violations):
+            previous = outline_full
+            with session_scope(session_id):
+                outline_full = repair_chapters(bible, outline_full, violations, svc.llm_client)
+            outline_version += 1
+            try:
+                saved = svc.repo.update_session(
+                    session_id,
+                    expected_revision=int(session["revision"]),
+                    outline_full_json=outline_full.model_dump(mode="json"),
+                    outline_index_json=build_outline_index(outline_full).model_dump(mode="json"),
+                    outline_version=outline_version,
+                )
+            except SessionConflict as exc:
+                raise HTTPException(status_code=409, detail=str(exc)) from exc
+            if saved is None:
+                raise HTTPException(status_code=404, detail="Session not found")
+            carry_unchanged_drafts(
+                svc.repo,
+                session_id,
+                previous,
+                outline_full,
+                from_version=outline_version - 1,
+                to_version=outline_version,
+            )
+        return PlanPackage(
+            bible=bible,
+            outline_full=outline_full,
+            bible_version=int(session.get("bible_version") or 1),
+            outline_version=outline_version,
+        )
+
+    def draft_book(session_id: str, *, generate: bool) -> BookDraft:
+        svc = services()
+        session = svc.repo.get_session(session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        if not session.get("bible_json") or not session.get("outline_full_json"):
+            raise HTTPException(status_code=409, detail="Plan has not been generated")
+        bible = StoryBible.model_validate(session["bible_json"])
+        outline_full = OutlineFull.model_validate(session["outline_full_json"])
+        outline_version = int(session.get("outline_version") or 1)
+        if not generate:
+            drafts = svc.drafter.stored(session_id, outline_full, outline_version)
+            return BookDraft(
+                outline_version=outline_version,
+                chapters=[drafts[index] for index in sorted(drafts)],
+                complete=len(drafts) == len(outline_full.chapters),
+            )
+        with priority_scope("background"):
+            if svc.flights is None:
+                return svc.drafter.draft(session_id, bible, outline_full, outline_version)
+            with svc.flights.hold(f"draft:{session_id}"):
+                return svc.drafter.draft(session_id, bible, outline_full, outline_version)
+
+    async def cancellable(request: Request, route: str, work: Callable[[], T]) -> T:
+        deadline = Deadline(_request_timeout(request, request_timeout_s))
+
+        async def watch_disconnect() -> None:
+            while not deadline.cancelled():
+                if deadline.expired():
+                    deadline.cancel("deadline")
+                elif await request.is_disconnected():
+                    deadline.cancel("disconnected")
+                else:
+                    await asyncio.sleep(DISCONNECT_POLL_S)
+
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            with deadline_scope(deadline):
+                return await run_in_threadpool(work)
+        except RequestCancelled as exc:
+            metrics.inc("novel_flow_cancelled_requests_total", route=route, reason=exc.reason)
+            status = 504 if exc.reason == "deadline" else CLIENT_CLOSED_REQUEST
+            raise HTTPException(status_code=status, detail=str(exc)) from exc
+        except SchedulerRejected as exc:
+            raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"}) from exc
+        finally:
+            watcher.cancel()
+
+    @app.get("/proposal/{session_id}", response_model=ProposalPackage)
+    async def proposal(session_id: str, request: Request, response: Response) -> Any:
+        return await cancellable(
+            request, "/proposal/{session_id}", lambda: load_proposal(session_id, request, response)
+        )
+
+    @app.post("/decision", response_model=ProposalPackage)
+    async def decision(payload: DecisionRequest, request: Request) -> ProposalPackage:
+        return await cancellable(request, "/decision", lambda: decide(payload))
 
     @app.get("/plan/{session_id}", response_model=PlanPackage)
-    def plan(session_id: str) -> PlanPackage:
-        return get_or_generate_plan(session_id=session_id)
+    async def plan(session_id: str, request: Request, response: Response) -> Any:
+        return await cancellable(request, "/plan/{session_id}", lambda: load_plan(session_id, request, response))
 
     @app.post("/plan/{session_id}/regenerate", response_model=PlanPackage)
-    def regenerate_plan(session_id: str, payload: RegenerateRequest) -> PlanPackage:
+    async def regenerate_plan(session_id: str, payload: RegenerateRequest, request: Request) -> PlanPackage:
         if not payload.force:
             raise HTTPException(status_code=400, detail="force must be true")
-        return get_or_generate_plan(session_id=session_id, force=True)
+        return await cancellable(request, "/plan/{session_id}/regenerate", lambda: regenerate(session_id))
+
+    @app.get("/plan/{session_id}/validation", response_model=PlanValidation)
+    def plan_validation(session_id: str) -> PlanValidation:
+        return validate(session_id)
+
+    @app.post("/plan/{session_id}/repair", response_model=PlanPackage)
+    async def repair_plan_chapters(session_id: str, request: Request) -> PlanPackage:
+        return await cancellable(request, "/plan/{session_id}/repair", lambda: repair(session_id))
+
+    @app.get("/draft/{session_id}", response_model=BookDraft)
+    def draft(session_id: str) -> BookDraft:
+        return draft_book(session_id, generate=False)
+
+    @app.post("/draft/{session_id}", response_model=BookDraft)
+    async def generate_draft(session_id: str, request: Request) -> BookDraft:
+        return await cancellable(request, "/draft/{session_id}", lambda: draft_book(session_id, generate=True))
 
     return app
 
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from backend.graph.nodes_llm import revise_chapter_node
+from backend.graph.schemas import OutlineFull, OutlineIndex, PlanViolation, StoryBible
+from backend.observability.metrics import metrics
+
+if TYPE_CHECKING:
+    from backend.llm.client import LLMClient
+
+
+def build_outline_index(outline: OutlineFull) -> OutlineIndex:
+    characters: dict[str, list[int]] = {}
+    locations: dict[str, list[int]] = {}
+    for chapter in outline.chapters:
+        for name in dict.fromkeys(chapter.characters_involved):
+            characters.setdefault(name, []).append(chapter.index)
+        for place in dict.fromkeys(chapter.locations):
+            locations.setdefault(place, []).append(chapter.index)
+    rows: dict[str, int] = {}
+    for position, row in enumerate(outline.foreshadowing_table):
+        rows.setdefault(row.id, position)
+    return OutlineIndex(character_chapters=characters, location_chapters=locations, foreshadowing_rows=rows)
+
+
+def stored_outline_index(outline: OutlineFull, index_json: dict[str, Any] | None) -> OutlineIndex:
+    return OutlineIndex.model_validate(index_json) if index_json else build_outline_index(outline)
+
+
+def validate_plan(bible: StoryBible, outline: OutlineFull, index: OutlineIndex | None = None) -> list[PlanViolation]:
+    index = index or build_outline_index(outline)
+    violations: list[PlanViolation] = []
+    chapters: set[int] = set()
+    for chapter in outline.chapters:
+        if chapter.index in chapters:
+            violations.append(
+                PlanViolation(
+                    kind="duplicate_chapter", chapter=chapter.index, detail=f"Chapter {chapter.index} is listed twice"
+                )
+            )
+        chapters.add(chapter.index)
+
+    known = {entry.name for entry in bible.characters}
+    for name, appearances in index.character_chapters.items():
+        if name not in known:
+            violations.extend(
+                PlanViolation(kind="unknown_character", chapter=number, detail=f"{name} is not in the story bible")
+                for number in appearances
+            )
+
+    table = outline.foreshadowing_table
+    referenced: set[tuple[str, str, int]] = set()
+    for chapter in outline.chapters:
+        for role, keys in (("setup", chapter.foreshadowing_in), ("payoff", chapter.foreshadowing_out)):
+            for key in keys:
+                referenced.add((key, role, chapter.index))
+                position = index.foreshadowing_rows.get(key)
+                if position is None:
+                    violations.append(
+                        PlanViolation(
+                            kind="unknown_foreshadowing",
+                            chapter=chapter.index,
+                            detail=f"{key} is not in the foreshadowing table",
+                        )
+                    )
+                    continue
+                row = table[position]
+                expected = row.setup_chapter if role == "setup" else row.payoff_chapter
+                if expected != chapter.index:
+                    violations.append(
+                        PlanViolation(
+                            kind="foreshadowing_mismatch",
+                            chapter=chapter.index,
+                            detail=f"{key} has its {role} in chapter {expected}, not chapter {chapter.index}",
+                        )
+                    )
+
+    for position, row in enumerate(table):
+        if index.foreshadowing_rows.get(row.id) != position:
+            violations.append(PlanViolation(kind="duplicate_foreshadowing", detail=f"{row.id} is listed twice"))
+            continue
+        if row.setup_chapter >= row.payoff_chapter:
+            violations.append(
+                PlanViolation(
+                    kind="foreshadowing_order",
+                    detail=f"{row.id} pays off in chapter {row.payoff_chapter}, not after setup {row.setup_chapter}",
+                )
+            )
+        if row.setup_chapter not in chapters or row.payoff_chapter not in chapters:
+            violations.append(
+                PlanViolation(kind="foreshadowing_bounds", detail=f"{row.id} points outside the outline chapters")
+            )
+            continue
+        for role, number, field in (
+            ("setup", row.setup_chapter, "foreshadowing_in"),
+            ("payoff", row.payoff_chapter, "foreshadowing_out"),
+        ):
+            if (row.id, role, number) not in referenced:
+                violations.append(
+                    PlanViolation(
+                        kind="foreshadowing_unreferenced",
+                        chapter=number,
+                        detail=f"{row.id} is missing from {field} of chapter {number}",
+                    )
+                )
+    for violation in violations:
+        metrics.inc("novel_flow_plan_violations_total", kind=violation.kind)
+    return violations
+
+
+def repair_chapters(
+    bible: StoryBible, outline: OutlineFull, violations: list[PlanViolation], client: LLMClient
+) -> OutlineFull:
+    problems: dict[int, list[str]] = {}
+    for violation in violations:
+        if violation.chapter is not None:
+            problems.setdefault(violation.chapter, []).append(violation.detail)
+    if not problems:
+        return outline
+
+    names = [entry.name for entry in bible.characters]
+    chapters = []
+    for chapter in outline.chapters:
+        if chapter.index not in problems:
+            chapters.append(chapter)
+            continue
+        rows = [
+            row
+            for row in outline.foreshadowing_table
+            if chapter.index in (row.setup_chapter, row.payoff_chapter)
+        ]
+        revised = revise_chapter_node(chapter, names, rows, problems[chapter.index], client)
+        chapters.append(revised.model_copy(update={"index": chapter.index}))
+    metrics.inc("novel_flow_plan_chapter_repairs_total", len(problems))
+    return outline.model_copy(update={"chapters": chapters})
+
+
+def prepare_plan(
+    bible: StoryBible, outline: OutlineFull, client: LLMClient, *, repair: bool = True
+) -> tuple[OutlineFull, OutlineIndex, list[PlanViolation]]:
+    index = build_outline_index(outline)
+    violations = validate_plan(bible, outline, index)
+    if repair and any(violation.chapter is not None for violation in violations):
+        outline = repair_chapters(bible, outline, violations, client)
+        index = build_outline_index(outline)
+        violations = validate_plan(bible, outline, index)
+    return outline, index, violations
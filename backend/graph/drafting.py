@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from backend.graph.nodes_llm import draft_chapter_node
+from backend.graph.retrieval import PlanIndex
+from backend.graph.schemas import BookDraft, ChapterDraft, OutlineChapter, OutlineFull, StoryBible
+from backend.observability.metrics import metrics, session_scope, usage_scope
+from backend.storage.base import SessionStore
+
+if TYPE_CHECKING:
+    from backend.llm.client import LLMClient
+
+
+@dataclass(frozen=True)
+class DraftPolicy:
+    workers: int = 4
+    summary_chars: int = 1200
+    context_chapters: int = 2
+    top_k: int = 4
+    cached_indexes: int = 64
+
+
+def chapter_dependencies(outline: OutlineFull) -> dict[int, tuple[int, ...]]:
+    indexes = {chapter.index for chapter in outline.chapters}
+    setups: dict[int, set[int]] = {}
+    for row in outline.foreshadowing_table:
+        setups.setdefault(row.payoff_chapter, set()).add(row.setup_chapter)
+    setup_of = {row.id: row.setup_chapter for row in outline.foreshadowing_table}
+    last_seen: dict[str, int] = {}
+    dependencies: dict[int, tuple[int, ...]] = {}
+    for chapter in sorted(outline.chapters, key=lambda item: item.index):
+        keys = [f"character:{name}" for name in chapter.characters_involved]
+        keys += [f"location:{place}" for place in chapter.locations]
+        needed = set(setups.get(chapter.index, ()))
+        needed.update(setup_of[key] for key in chapter.foreshadowing_out if key in setup_of)
+        continuity = max((last_seen[key] for key in keys if key in last_seen), default=None)
+        if continuity is not None:
+            needed.add(continuity)
+        dependencies[chapter.index] = tuple(
+            sorted(index for index in needed if index < chapter.index and index in indexes)
+        )
+        for key in keys:
+            last_seen[key] = chapter.index
+    return dependencies
+
+
+def relevant_bible(index: PlanIndex, chapter: OutlineChapter, policy: DraftPolicy) -> str:
+    return json.dumps(index.chapter_context(chapter, policy.top_k), separators=(",", ":"))
+
+
+def story_so_far(chapter_index: int, drafts: dict[int, ChapterDraft], policy: DraftPolicy) -> str:
+    earlier = sorted(index for index in drafts if index < chapter_index)
+    recent = earlier[-policy.context_chapters :] if policy.context_chapters > 0 else []
+    return clip_summary(" ".join(drafts[index].summary for index in recent), policy.summary_chars)
+
+
+def carry_unchanged_drafts(
+    repo: SessionStore,
+    session_id: str,
+    before: OutlineFull,
+    after: OutlineFull,
+    *,
+    from_version: int,
+    to_version: int,
+) -> int:
+    previous = {chapter.index: chapter for chapter in before.chapters}
+    unchanged = [chapter.index for chapter in after.chapters if previous.get(chapter.index) == chapter]
+    carried = repo.carry_drafts(
+        session_id, from_version=from_version, to_version=to_version, chapter_indexes=unchanged
+    )
+    metrics.inc("novel_flow_draft_chapters_total", carried, outcome="carried")
+    return carried
+
+
+def clip_summary(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    if len(text) <= limit:
+        return text
+    tail = text[len(text) - limit :]
+    return tail.split(" ", 1)[-1] if " " in tail else tail
+
+
+class ChapterDrafter:
+    def __init__(self, repo: SessionStore, client: LLMClient, policy: DraftPolicy | None = None) -> None:
+        self.repo = repo
+        self.client = client
+        self.policy = policy or DraftPolicy()
+        self._indexes: OrderedDict[tuple[str, int], PlanIndex] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def index(self, session_id: str, bible: StoryBible, outline: OutlineFull, outline_version: int) -> PlanIndex:
+        key = (session_id, outline_version)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                return index
+        index = PlanIndex(bible, outline)
+        with self._lock:
+            self._indexes[key] = index
+            while len(self._indexes) > self.policy.cached_indexes:
+                self._indexes.popitem(last=False)
+        return index
+
+    def stored(self, session_id: str, outline: OutlineFull, outline_version: int) -> dict[int, ChapterDraft]:
+        indexes = {chapter.index for chapter in outline.chapters}
+        rows = self.repo.list_drafts(session_id, outline_version=outline_version)
+        return {
+            row["chapter_index"]: ChapterDraft.model_validate(row["draft_json"])
+            for row in rows
+            if row["chapter_index"] in indexes
+        }
+
+    def draft(self, session_id: str, bible: StoryBible, outline: OutlineFull, outline_version: int) -> BookDraft:
+        chapters = {chapter.index: chapter for chapter in outline.chapters}
+        dependencies = chapter_dependencies(outline)
+        index = self.index(session_id, bible, outline, outline_version)
+        drafts = self.stored(session_id, outline, outline_version)
+        metrics.inc("novel_flow_draft_chapters_total", len(drafts), outcome="resumed")
+        pending = sorted(set(chapters) - set(drafts))
+        running: dict[Future[ChapterDraft], int] = {}
+        executor = ThreadPoolExecutor(max_workers=max(1, self.policy.workers), thread_name_prefix="chapter-draft")
+        try:
+            while pending or running:
+                for chapter_index in list(pending):
+                    if len(running) >= self.policy.workers:
+                        break
+                    if any(dependency not in drafts for dependency in dependencies[chapter_index]):
+                        continue
+                    pending.remove(chapter_index)
+                    chapter = chapters[chapter_index]
+                    future = executor.submit(
+                        copy_context().run,
+                        self._draft_chapter,
+                        session_id,
+                        chapter,
+                        relevant_bible(index, chapter, self.policy),
+                        story_so_far(chapter_index, drafts, self.policy),
+                        outline_version,
+                    )
+                    running[future] = chapter_index
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    drafts[running.pop(future)] = future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        return BookDraft(
+            outline_version=outline_version, chapters=[drafts[index] for index in sorted(drafts)], complete=True
+        )
+
+    def _draft_chapter(
+        self, session_id: str, chapter: OutlineChapter, bible_context: str, prior: str, outline_version: int
+    ) -> ChapterDraft:
+        with session_scope(session_id), usage_scope() as usage:
+            draft = draft_chapter_node(chapter, bible_context, prior, self.client)
+        draft = draft.model_copy(
+            update={"index": chapter.index, "summary": clip_summary(draft.summary, self.policy.summary_chars)}
+        )
+        self.repo.save_draft(
+            session_id,
+            outline_version=outline_version,
+            draft_json=draft.model_dump(mode="json"),
+            tokens=usage.total_tokens,
+        )
+        metrics.inc("novel_flow_draft_chapters_total", outcome="drafted")
+        metrics.inc("novel_flow_draft_tokens_total", usage.total_tokens)
+        return draft
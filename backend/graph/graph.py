@@ -1,29 +1,49 @@
 from __future__ import annotations
 
+from contextlib import AbstractContextManager, nullcontext
+from typing import TYPE_CHECKING, Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import END, StateGraph
+from langgraph.types import Command, interrupt
 
 from backend.graph.nodes_llm import analyze, expand, outline_lite
 from backend.graph.schemas import ProposalPackage, ProposalStatus
 from backend.graph.state import SessionState
-from backend.llm.client import LLMClient
-from backend.storage.sqlite import SessionsRepo
+from backend.llm.deadline import check_deadline
+from backend.observability.metrics import metrics, session_scope
+from backend.observability.tracing import traced
+from backend.storage.base import SessionConflict, SessionStore
+from backend.storage.coordination import SingleFlight
+
+if TYPE_CHECKING:
+    from backend.llm.client import LLMClient
 
 
 class ProposalGraphService:
-    def __init__(self, repo: SessionsRepo, client: LLMClient) -> None:
+    def __init__(
+        self,
+        repo: SessionStore,
+        client: LLMClient,
+        checkpointer: BaseCheckpointSaver | None = None,
+        flights: SingleFlight | None = None,
+    ) -> None:
         self.repo = repo
         self.client = client
+        self.checkpointer = checkpointer or repo.checkpointer()
+        self.flights = flights
         self.graph = self._build_graph()
 
     def _build_graph(self) -> object:
         builder = StateGraph(SessionState)
-        builder.add_node("INTAKE", self._intake)
-        builder.add_node("ANALYZE", self._analyze)
-        builder.add_node("EXPAND", self._expand)
-        builder.add_node("OUTLINE_LITE", self._outline_lite)
-        builder.add_node("PRESENT", self._present)
-        builder.add_node("WAIT_DECISION", self._wait_decision)
-        builder.add_node("APPROVED", self._approved)
+        builder.add_node("INTAKE", traced("graph.INTAKE", self._intake))
+        builder.add_node("ANALYZE", traced("graph.ANALYZE", self._analyze))
+        builder.add_node("EXPAND", traced("graph.EXPAND", self._expand))
+        builder.add_node("OUTLINE_LITE", traced("graph.OUTLINE_LITE", self._outline_lite))
+        builder.add_node("PRESENT", traced("graph.PRESENT", self._present))
+        builder.add_node("WAIT_DECISION", traced("graph.WAIT_DECISION", self._wait_decision))
+        builder.add_node("APPROVED", traced("graph.APPROVED", self._approved))
 
         builder.set_entry_point("INTAKE")
         builder.add_edge("INTAKE", "ANALYZE")
@@ -42,7 +62,7 @@ class ProposalGraphService:
             },
         )
         builder.add_edge("APPROVED", END)
-        return builder.compile()
+        return builder.compile(checkpointer=self.checkpointer)
 
     def _load_state(self, session_id: str) -> SessionState:
         session = self.repo.get_session(session_id)
@@ -60,13 +80,20 @@ class ProposalGraphService:
             proposal=proposal,
             status=session["status"],
             version=int(session["version"]),
+            revision=int(session["revision"]),
             last_user_action=session.get("last_user_action"),
             edit_text=session.get("edit_text"),
         )
 
+    def _ensure_current(self, state: SessionState) -> None:
+        revision = self.repo.get_revision(state.session_id)
+        if revision != state.revision:
+            raise SessionConflict(state.session_id, state.revision, revision)
+
     def _persist_state(self, state: SessionState) -> None:
-        self.repo.update_session(
+        row = self.repo.update_session(
             state.session_id,
+            expected_revision=state.revision,
             requirement_text=state.raw_text,
             spec_json=state.spec.model_dump(mode="json") if state.spec else None,
             proposal_json=state.proposal.model_dump(mode="json") if state.proposal else None,
@@ -75,6 +102,9 @@ class ProposalGraphService:
             last_user_action=state.last_user_action,
             edit_text=state.edit_text,
         )
+        if row is None:
+            raise ValueError("Session not found")
+        state.revision = int(row["revision"])
 
     def _intake(self, state: SessionState) -> SessionState:
         if state.last_user_action == "reset":
@@ -87,6 +117,8 @@ class ProposalGraphService:
         return state
 
     def _analyze(self, state: SessionState) -> SessionState:
+        check_deadline("graph.ANALYZE")
+        self._ensure_current(state)
         if state.last_user_action == "edit":
             patch_text = (state.edit_text or "").strip()
             state.raw_text = (state.raw_text + "\n" + patch_text).strip()
@@ -100,6 +132,8 @@ class ProposalGraphService:
     def _expand(self, state: SessionState) -> SessionState:
         if state.spec is None:
             raise ValueError("Requirement spec missing before EXPAND")
+        check_deadline("graph.EXPAND")
+        self._ensure_current(state)
         expanded = expand(state.spec, client=self.client)
         state.expansion_suggestions = expanded.expansion_suggestions
         state.open_questions = expanded.open_questions
@@ -108,6 +142,8 @@ class ProposalGraphService:
     def _outline_lite(self, state: SessionState) -> SessionState:
         if state.spec is None:
             raise ValueError("Requirement spec missing before OUTLINE_LITE")
+        check_deadline("graph.OUTLINE_LITE")
+        self._ensure_current(state)
         outline = outline_lite(state.spec, client=self.client)
         state.proposal = ProposalPackage(
             requirement_spec=state.spec,
@@ -129,25 +165,18 @@ class ProposalGraphService:
         return state
 
     def _wait_decision(self, state: SessionState) -> SessionState:
+        decision = interrupt({"session_id": state.session_id, "version": state.version})
+        state.last_user_action = decision["action"]
+        state.edit_text = decision.get("text")
         return state
 
     def _approved(self, state: SessionState) -> SessionState:
         if state.proposal is None:
-            state.spec = analyze(state.raw_text, client=self.client)
-            expanded = expand(state.spec, client=self.client)
-            outline = outline_lite(state.spec, client=self.client)
-            state.proposal = ProposalPackage(
-                requirement_spec=state.spec,
-                expansion_suggestions=expanded.expansion_suggestions,
-                outline_lite=outline,
-                open_questions=expanded.open_questions,
-                version=max(1, state.version),
-                status=ProposalStatus.APPROVED,
-                change_summary="Generated from latest requirement input.",
-            )
-        else:
-            state.proposal.status = ProposalStatus.APPROVED
+            raise ValueError("Proposal missing before APPROVED")
+        state.proposal.status = ProposalStatus.APPROVED
         state.status = ProposalStatus.APPROVED.value
+        state.last_user_action = None
+        state.edit_text = None
         self._persist_state(state)
         return state
 
@@ -158,10 +187,55 @@ class ProposalGraphService:
             return action
         return "end"
 
+    @staticmethod
+    def _config(session_id: str) -> RunnableConfig:
+        return {"configurable": {"thread_id": session_id}}
+
+    def _invoke(self, session_id: str, graph_input: Any) -> SessionState:
+        config = self._config(session_id)
+        with session_scope(session_id):
+            try:
+                self.graph.invoke(graph_input, config, durability="sync")
+            except SessionConflict:
+                self.checkpointer.delete_thread(session_id)
+                metrics.inc("novel_flow_session_conflicts_total")
+                raise
+        snapshot = self.graph.get_state(config)
+        if not snapshot.next:
+            self.checkpointer.delete_thread(session_id)
+        elif snapshot.interrupts and hasattr(self.checkpointer, "prune_thread"):
+            self.checkpointer.prune_thread(session_id)
+        return SessionState.model_validate(snapshot.values)
+
+    def _pending_run(self, session_id: str) -> bool:
+        snapshot = self.graph.get_state(self._config(session_id))
+        return bool(snapshot.next) and not snapshot.interrupts
+
+    def _paused(self, session_id: str) -> bool:
+        snapshot = self.graph.get_state(self._config(session_id))
+        return snapshot.next == ("WAIT_DECISION",) and bool(snapshot.interrupts)
+
+    def _checkpoint_id(self, session_id: str) -> str | None:
+        return self.graph.get_state(self._config(session_id)).config["configurable"].get("checkpoint_id")
+
+    def _flight(self, session_id: str) -> AbstractContextManager[bool]:
+        return self.flights.hold(session_id) if self.flights else nullcontext(False)
+
     def run_proposal(self, session_id: str) -> ProposalPackage:
-        start = self._load_state(session_id)
-        start.last_user_action = None
-        end_state = SessionState.model_validate(self.graph.invoke(start))
+        seen = self._checkpoint_id(session_id)
+        with self._flight(session_id) as waited:
+            if waited and self._checkpoint_id(session_id) != seen and self._paused(session_id):
+                joined = self._load_state(session_id).proposal
+                if joined is not None:
+                    metrics.inc("novel_flow_single_flight_total", outcome="joined")
+                    return joined
+            if self._pending_run(session_id):
+                end_state = self._invoke(session_id, None)
+            else:
+                start = self._load_state(session_id)
+                start.last_user_action = None
+                start.edit_text = None
+                end_state = self._invoke(session_id, start)
         if end_state.proposal is None:
             raise ValueError("Proposal generation did not produce output")
         return end_state.proposal
@@ -171,18 +245,35 @@ class ProposalGraphService:
         if action_normalized not in {"edit", "approve", "reset"}:
             raise ValueError("Unsupported action")
 
-        state = self._load_state(session_id)
-        state.last_user_action = action_normalized
-        state.edit_text = text
-
-        end_state = SessionState.model_validate(self.graph.invoke(state))
+        with self._flight(session_id):
+            if self._pending_run(session_id):
+                self._finish_pending(session_id)
+            if not self._paused(session_id):
+                self._pause(session_id)
+            end_state = self._invoke(session_id, Command(resume={"action": action_normalized, "text": text}))
 
         if end_state.proposal is None:
             raise ValueError("Decision did not produce output")
         return end_state.proposal
 
+    def _finish_pending(self, session_id: str) -> None:
+        seen = self._load_state(session_id)
+        finished = self._invoke(session_id, None)
+        if finished.version != seen.version:
+            metrics.inc("novel_flow_session_conflicts_total")
+            raise SessionConflict(session_id, seen.revision, finished.revision)
+
+    def _pause(self, session_id: str) -> None:
+        state = self._load_state(session_id)
+        state.last_user_action = None
+        state.edit_text = None
+        if state.proposal is None:
+            self._invoke(session_id, state)
+        else:
+            self.graph.update_state(self._config(session_id), state, as_node="PRESENT")
+
 
-def run_proposal(session_id: str, repo: SessionsRepo, client: LLMClient) -> ProposalPackage:
+def run_proposal(session_id: str, repo: SessionStore, client: LLMClient) -> ProposalPackage:
     return ProposalGraphService(repo=repo, client=client).run_proposal(session_id)
 
 
@@ -190,7 +281,7 @@ def apply_decision(
     session_id: str,
     action: str,
     text: str | None,
-    repo: SessionsRepo,
+    repo: SessionStore,
     client: LLMClient,
 ) -> ProposalPackage:
     return ProposalGraphService(repo=repo, client=client).apply_decision(session_id=session_id, action=action, text=text)
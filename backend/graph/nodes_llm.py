@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+from typing import TYPE_CHECKING
+
 from backend.graph.prompts import (
     analyze_prompts,
+    draft_chapter_prompts,
     expand_prompts,
     freeze_bible_prompts,
     outline_lite_prompts,
     plan_book_prompts,
+    revise_chapter_prompts,
 )
 from backend.graph.schemas import (
+    ChapterDraft,
     ExpansionResult,
+    ForeshadowingRow,
+    OutlineChapter,
     OutlineFull,
     OutlineLite,
     ProposalPackage,
@@ -16,7 +23,10 @@ from backend.graph.schemas import (
     RequirementSpec,
     StoryBible,
 )
-from backend.llm.client import LLMClient
+from backend.llm.deadline import check_deadline
+
+if TYPE_CHECKING:
+    from backend.llm.client import LLMClient
 
 
 def analyze(raw_text: str, client: LLMClient) -> RequirementSpec:
@@ -38,17 +48,37 @@ def outline_lite(spec: RequirementSpec, client: LLMClient) -> OutlineLite:
 
 
 def freeze_bible_node(spec: RequirementSpec, proposal: ProposalPackage, client: LLMClient) -> StoryBible:
+    check_deadline("plan.FREEZE_BIBLE")
     system_prompt, user_prompt = freeze_bible_prompts(spec, proposal)
     data = client.generate_json(system_prompt=system_prompt, user_prompt=user_prompt, schema_name="StoryBible")
     return StoryBible.model_validate(data)
 
 
 def plan_book_node(bible: StoryBible, spec: RequirementSpec, client: LLMClient) -> OutlineFull:
+    check_deadline("plan.PLAN_BOOK")
     system_prompt, user_prompt = plan_book_prompts(bible, spec)
     data = client.generate_json(system_prompt=system_prompt, user_prompt=user_prompt, schema_name="OutlineFull")
     return OutlineFull.model_validate(data)
 
 
+def draft_chapter_node(
+    chapter: OutlineChapter, bible_context: str, story_so_far: str, client: LLMClient
+) -> ChapterDraft:
+    check_deadline("draft.DRAFT_CHAPTER")
+    system_prompt, user_prompt = draft_chapter_prompts(chapter, bible_context, story_so_far)
+    data = client.generate_json(system_prompt=system_prompt, user_prompt=user_prompt, schema_name="ChapterDraft")
+    return ChapterDraft.model_validate(data)
+
+
+def revise_chapter_node(
+    chapter: OutlineChapter, characters: list[str], rows: list[ForeshadowingRow], problems: list[str], client: LLMClient
+) -> OutlineChapter:
+    check_deadline("plan.REVISE_CHAPTER")
+    system_prompt, user_prompt = revise_chapter_prompts(chapter, characters, rows, problems)
+    data = client.generate_json(system_prompt=system_prompt, user_prompt=user_prompt, schema_name="OutlineChapter")
+    return OutlineChapter.model_validate(data)
+
+
 def build_proposal(text: str, version: int, status: ProposalStatus, client: LLMClient) -> ProposalPackage:
     spec = analyze(text, client)
     expanded = expand(spec, client)
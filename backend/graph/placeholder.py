@@ -1,6 +1,22 @@
 from __future__ import annotations
 
-from backend.graph.schemas import OutlineLite, ProposalPackage, ProposalStatus, RequirementSpec
+from backend.graph.schemas import (
+    ChapterDraft,
+    CharacterArc,
+    CharacterEntry,
+    EndingPlan,
+    ForeshadowingRow,
+    OutlineChapter,
+    OutlineFull,
+    OutlineLite,
+    ProposalPackage,
+    ProposalStatus,
+    RequirementSpec,
+    StoryBible,
+    StyleGuide,
+    TimelineEntry,
+    WorldInfo,
+)
 
 
 def _tokens(text: str) -> list[str]:
@@ -71,3 +87,126 @@ def build_proposal(text: str, version: int, status: ProposalStatus) -> ProposalP
         version=version,
         status=status,
     )
+
+
+def story_bible(spec: RequirementSpec) -> StoryBible:
+    tokens = _tokens(spec.raw_text)
+    first_person = any("first person" in constraint.lower() for constraint in spec.constraints)
+    return StoryBible(
+        title_working=" ".join(tokens[:4]).title() if tokens else "Untitled",
+        genre=spec.genre_hint,
+        tone=spec.tone_hint,
+        pov="first person" if first_person else "third person limited",
+        style_guide=StyleGuide(
+            diction=f"{spec.tone_hint} and concrete",
+            sentence_length="mostly medium, short in action",
+            dialogue_ratio="35%",
+            taboo_list=["anachronistic slang"],
+            examples=["sensory detail anchored in emotion"],
+        ),
+        world=WorldInfo(
+            setting_time="present day",
+            setting_place="a city under pressure",
+            rules=["magic has a physical cost"] if spec.genre_hint == "fantasy" else [],
+            factions=["the establishment", "the outsiders"],
+            tech_or_magic_level="ritual magic" if spec.genre_hint == "fantasy" else "contemporary",
+        ),
+        characters=[
+            CharacterEntry(
+                name="Protagonist",
+                role="protagonist",
+                goal=spec.objective,
+                flaw="acts before thinking",
+                secret="hides a past failure",
+                voice="wry and observant",
+                relationships=["opposes Antagonist"],
+            ),
+            CharacterEntry(
+                name="Antagonist",
+                role="antagonist",
+                goal="keep the status quo",
+                flaw="certainty",
+                secret="caused the inciting incident",
+                voice="measured and cold",
+                relationships=["opposes Protagonist"],
+            ),
+        ],
+        timeline=[TimelineEntry(id="T1", event="inciting incident", when="Day 0", consequences="routine breaks")],
+        canon_rules=list(spec.constraints),
+    )
+
+
+def outline_full(bible: StoryBible, spec: RequirementSpec) -> OutlineFull:
+    beats = outline_lite(spec).chapter_beats
+    names = [character.name for character in bible.characters]
+    last = len(beats)
+    chapters = [
+        OutlineChapter(
+            index=index,
+            title=f"Chapter {index}",
+            goal=beat,
+            conflict="pressure from the antagonist",
+            twist="a cost is revealed" if index == last // 2 + 1 else "none",
+            hook="a question left open",
+            locations=[bible.world.setting_place],
+            characters_involved=names,
+            foreshadowing_in=["F1"] if index == 1 else [],
+            foreshadowing_out=["F1"] if index == last else [],
+        )
+        for index, beat in enumerate(beats, start=1)
+    ]
+    return OutlineFull(
+        chapters=chapters,
+        character_arcs=[
+            CharacterArc(
+                character=names[0] if names else "Protagonist",
+                start_state="reactive and isolated",
+                key_turns=["accepts help", "reveals secret"],
+                end_state="trusted and decisive",
+            )
+        ],
+        foreshadowing_table=[
+            ForeshadowingRow(
+                id="F1",
+                setup_chapter=1,
+                payoff_chapter=last,
+                description="an early detail explains the final reveal",
+                evidence_style="quiet breadcrumb",
+            )
+        ],
+        ending=EndingPlan(
+            type="bittersweet victory",
+            final_reveal="the antagonist caused the inciting incident",
+            emotional_resolution="the protagonist forgives their past failure",
+        ),
+    )
+
+
+def chapter_draft(chapter: OutlineChapter, story_so_far: str) -> ChapterDraft:
+    cast = ", ".join(chapter.characters_involved) or "the protagonist"
+    place = ", ".join(chapter.locations) or "an unnamed place"
+    text = (
+        f"In {place}, {cast} pursue the chapter goal: {chapter.goal}. "
+        f"The conflict sharpens through {chapter.conflict}. "
+        + (f"Then {chapter.twist}. " if chapter.twist != "none" else "")
+        + f"The chapter closes on {chapter.hook}."
+    )
+    summary = f"Chapter {chapter.index}: {chapter.goal}."
+    return ChapterDraft(
+        index=chapter.index,
+        title=chapter.title,
+        text=text,
+        summary=f"{story_so_far} {summary}" if story_so_far else summary,
+    )
+
+
+def revise_chapter(chapter: OutlineChapter, characters: list[str], rows: list[ForeshadowingRow]) -> OutlineChapter:
+    allowed = set(characters)
+    involved = [name for name in chapter.characters_involved if name in allowed]
+    return chapter.model_copy(
+        update={
+            "characters_involved": involved or characters[:1],
+            "foreshadowing_in": [row.id for row in rows if row.setup_chapter == chapter.index],
+            "foreshadowing_out": [row.id for row in rows if row.payoff_chapter == chapter.index],
+        }
+    )
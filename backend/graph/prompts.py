@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from backend.graph.schemas import ProposalPackage, RequirementSpec, StoryBible
+import json
+
+from backend.graph.schemas import ForeshadowingRow, OutlineChapter, ProposalPackage, RequirementSpec, StoryBible
 
 BASE_SYSTEM_PROMPT = (
     "You are a novel planning assistant. "
@@ -49,3 +51,29 @@ def plan_book_prompts(bible: StoryBible, spec: RequirementSpec) -> tuple[str, st
         f"Requirement spec:\n{spec.model_dump_json(indent=2)}"
     )
     return BASE_SYSTEM_PROMPT, user_prompt
+
+
+def draft_chapter_prompts(chapter: OutlineChapter, bible_context: str, story_so_far: str) -> tuple[str, str]:
+    user_prompt = (
+        "Write this chapter as a ChapterDraft JSON object with index, title, text and summary. "
+        "The summary must be a compact rolling summary of the story so far including this chapter.\n"
+        f"Chapter:\n{chapter.model_dump_json(indent=2)}\n"
+        f"Relevant bible:\n{bible_context}\n"
+        f"Story so far:\n{story_so_far}"
+    )
+    return BASE_SYSTEM_PROMPT, user_prompt
+
+
+def revise_chapter_prompts(
+    chapter: OutlineChapter, characters: list[str], rows: list[ForeshadowingRow], problems: list[str]
+) -> tuple[str, str]:
+    problem_lines = "\n".join(f"- {problem}" for problem in problems)
+    user_prompt = (
+        "Revise this OutlineChapter JSON object so it is consistent with the story bible and foreshadowing table. "
+        "Keep index, title and beats; fix only the listed problems.\n"
+        f"Problems:\n{problem_lines}\n"
+        f"Allowed characters:\n{json.dumps(characters)}\n"
+        f"Foreshadowing rows:\n{json.dumps([row.model_dump(mode='json') for row in rows])}\n"
+        f"Chapter:\n{chapter.model_dump_json(indent=2)}"
+    )
+    return BASE_SYSTEM_PROMPT, user_prompt
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter
+from collections.abc import Collection, Iterable
+from typing import Any
+
+from backend.graph.schemas import OutlineChapter, OutlineFull, StoryBible
+
+TERM = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has he her his in is it its of on or she that the their them they this "
+    "to was were will with".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [term for term in TERM.findall(text.lower()) if term not in STOPWORDS]
+
+
+def entity_term(name: str) -> str:
+    return "entity:" + "_".join(TERM.findall(name.lower()))
+
+
+class BM25Index:
+    def __init__(
+        self, documents: Iterable[tuple[list[str], dict[str, Any]]], *, k1: float = 1.2, b: float = 0.75
+    ) -> None:
+        self.k1 = k1
+        self.payloads: list[dict[str, Any]] = []
+        self._postings: dict[str, list[tuple[int, int]]] = {}
+        lengths: list[int] = []
+        for tokens, payload in documents:
+            terms = Counter(tokens)
+            doc = len(self.payloads)
+            self.payloads.append(payload)
+            lengths.append(sum(terms.values()))
+            for term, frequency in terms.items():
+                self._postings.setdefault(term, []).append((doc, frequency))
+        count = len(lengths)
+        average = sum(lengths) / count if count else 0.0
+        self._norms = [k1 * (1 - b + b * length / average) if average else k1 for length in lengths]
+        self._idf = {
+            term: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.payloads)
+
+    def scores(self, query: Counter[str]) -> dict[int, float]:
+        scores: dict[int, float] = {}
+        for term, weight in query.items():
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for doc, frequency in self._postings[term]:
+                gain = weight * idf * frequency * (self.k1 + 1) / (frequency + self._norms[doc])
+                scores[doc] = scores.get(doc, 0.0) + gain
+        return scores
+
+    def search(self, query: Counter[str], k: int, exclude: Collection[int] = ()) -> list[dict[str, Any]]:
+        candidates = ((doc, score) for doc, score in self.scores(query).items() if doc not in exclude)
+        ranked = heapq.nlargest(k, candidates, key=lambda item: (item[1], -item[0]))
+        return [self.payloads[doc] for doc, _ in ranked]
+
+
+class PlanIndex:
+    def __init__(self, bible: StoryBible, outline: OutlineFull) -> None:
+        self.bible = bible
+        self.indexes = {
+            "characters": BM25Index(
+                (
+                    [entity_term(entry.name), *tokenize(" ".join([entry.name, entry.role, entry.goal, entry.secret]))],
+                    entry.model_dump(mode="json"),
+                )
+                for entry in bible.characters
+            ),
+            "timeline": BM25Index(
+                (tokenize(f"{entry.id} {entry.event} {entry.when} {entry.consequences}"), entry.model_dump(mode="json"))
+                for entry in bible.timeline
+            ),
+            "world_rules": BM25Index((tokenize(rule), {"rule": rule}) for rule in bible.world.rules),
+            "foreshadowing": BM25Index(
+                (
+                    [entity_term(row.id), *tokenize(f"{row.description} {row.evidence_style}")],
+                    row.model_dump(mode="json"),
+                )
+                for row in outline.foreshadowing_table
+            ),
+            "character_arcs": BM25Index(
+                (
+                    [entity_term(arc.character), *tokenize(" ".join([arc.start_state, *arc.key_turns]))],
+                    arc.model_dump(mode="json"),
+                )
+                for arc in outline.character_arcs
+            ),
+        }
+        self._keys: dict[str, dict[str, int]] = {
+            "characters": _positions(entry.name for entry in bible.characters),
+            "foreshadowing": _positions(row.id for row in outline.foreshadowing_table),
+            "character_arcs": _positions(arc.character for arc in outline.character_arcs),
+        }
+
+    @staticmethod
+    def chapter_query(chapter: OutlineChapter) -> Counter[str]:
+        query: Counter[str] = Counter()
+        for name in chapter.characters_involved:
+            query[entity_term(name)] += 4
+            query.update(tokenize(name))
+        for place in chapter.locations:
+            query.update(dict.fromkeys(tokenize(place), 2))
+        for key in (*chapter.foreshadowing_in, *chapter.foreshadowing_out):
+            query[entity_term(key)] += 4
+        query.update(tokenize(" ".join([chapter.goal, chapter.conflict, chapter.twist, chapter.hook])))
+        return query
+
+    def pinned(self, chapter: OutlineChapter) -> dict[str, list[int]]:
+        wanted = {
+            "characters": chapter.characters_involved,
+            "foreshadowing": [*chapter.foreshadowing_in, *chapter.foreshadowing_out],
+            "character_arcs": chapter.characters_involved,
+        }
+        return {
+            name: list(dict.fromkeys(self._keys[name][key] for key in keys if key in self._keys[name]))
+            for name, keys in wanted.items()
+        }
+
+    def _retrieve(self, name: str, query: Counter[str], top_k: int, pinned: list[int]) -> list[dict[str, Any]]:
+        index = self.indexes[name]
+        extra = index.search(query, max(0, top_k - len(pinned)), exclude=set(pinned))
+        return [index.payloads[doc] for doc in pinned] + extra
+
+    def chapter_context(self, chapter: OutlineChapter, top_k: int) -> dict[str, Any]:
+        query = self.chapter_query(chapter)
+        pinned = self.pinned(chapter)
+        world = self.bible.world
+        return {
+            "genre": self.bible.genre,
+            "tone": self.bible.tone,
+            "pov": self.bible.pov,
+            "style_guide": self.bible.style_guide.model_dump(mode="json"),
+            "world": {
+                "setting_time": world.setting_time,
+                "setting_place": world.setting_place,
+                "tech_or_magic_level": world.tech_or_magic_level,
+                "rules": [item["rule"] for item in self.indexes["world_rules"].search(query, top_k)],
+            },
+            "canon_rules": self.bible.canon_rules,
+            **{
+                name: self._retrieve(name, query, top_k, pinned.get(name, []))
+                for name in self.indexes
+                if name != "world_rules"
+            },
+        }
+
+
+def _positions(keys: Iterable[str]) -> dict[str, int]:
+    positions: dict[str, int] = {}
+    for position, key in enumerate(keys):
+        positions.setdefault(key, position)
+    return positions
@@ -133,3 +133,45 @@ class PlanPackage(StrictModel):
     outline_full: OutlineFull
     bible_version: int
     outline_version: int
+
+
+class OutlineIndex(StrictModel):
+    character_chapters: dict[str, list[int]] = Field(default_factory=dict)
+    location_chapters: dict[str, list[int]] = Field(default_factory=dict)
+    foreshadowing_rows: dict[str, int] = Field(default_factory=dict)
+
+
+class PlanViolation(StrictModel):
+    kind: str
+    chapter: int | None = None
+    detail: str
+
+
+class PlanValidation(StrictModel):
+    outline_version: int
+    valid: bool
+    violations: list[PlanViolation] = Field(default_factory=list)
+
+
+class ChapterDraft(StrictModel):
+    index: int
+    title: str
+    text: str
+    summary: str
+
+
+class BookDraft(StrictModel):
+    outline_version: int
+    chapters: list[ChapterDraft] = Field(default_factory=list)
+    complete: bool
+
+
+SCHEMA_MODELS: dict[str, type[BaseModel]] = {
+    "RequirementSpec": RequirementSpec,
+    "ExpansionResult": ExpansionResult,
+    "OutlineLite": OutlineLite,
+    "StoryBible": StoryBible,
+    "OutlineFull": OutlineFull,
+    "ChapterDraft": ChapterDraft,
+    "OutlineChapter": OutlineChapter,
+}
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from backend.graph.consistency import build_outline_index, prepare_plan
+from backend.graph.nodes_llm import freeze_bible_node, plan_book_node
+from backend.graph.schemas import OutlineFull, ProposalPackage, ProposalStatus
+from backend.llm.scheduler import priority_scope
+from backend.observability.metrics import metrics, session_scope, usage_scope
+from backend.storage.base import SessionConflict, SessionStore
+
+if TYPE_CHECKING:
+    from backend.llm.client import LLMClient
+
+SpeculativePlan = tuple[dict[str, Any], dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class SpeculationPolicy:
+    token_budget: int = 200_000
+    window_s: float = 3600.0
+    workers: int = 1
+    reserve_tokens: int = 20_000
+
+
+@dataclass
+class _Speculation:
+    version: int
+    future: Future[SpeculativePlan | None]
+    reserved: int = 0
+    approved: bool = False
+
+
+class PlanSpeculator:
+    def __init__(
+        self,
+        repo: SessionStore,
+        client: LLMClient,
+        policy: SpeculationPolicy,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.repo = repo
+        self.client = client
+        self.policy = policy
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._spend: deque[tuple[float, int]] = deque()
+        self._reserved = 0
+        self._entries: dict[str, _Speculation] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=policy.workers, thread_name_prefix="plan-speculation")
+
+    def spent(self) -> int:
+        with self._lock:
+            return self._spent()
+
+    def submit(self, session_id: str, proposal: ProposalPackage) -> bool:
+        with self._lock:
+            current = self._entries.get(session_id)
+            if current is not None and current.version == proposal.version:
+                return False
+            over_budget = self._spent() + self._reserved >= self.policy.token_budget
+            if not over_budget:
+                reservation = self._estimate()
+                self._reserved += reservation
+                previous = self._entries.get(session_id)
+                future = self._executor.submit(self._run, session_id, proposal, reservation)
+                entry = _Speculation(proposal.version, future, reserved=reservation)
+                self._entries[session_id] = entry
+        if over_budget:
+            self.discard(session_id)
+            metrics.inc("novel_flow_plan_speculation_total", outcome="over_budget")
+            return False
+
+        if previous is not None:
+            self._drop(previous)
+        metrics.inc("novel_flow_plan_speculation_total", outcome="started")
+        entry.future.add_done_callback(lambda _: self._finished(session_id, entry))
+        return True
+
+    def discard(self, session_id: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            self._drop(entry)
+
+    def promote(self, session_id: str, version: int) -> bool:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and entry.version == version and not entry.future.done():
+                entry.approved = True
+                return True
+            self._entries.pop(session_id, None)
+        if entry is None or entry.version != version:
+            if entry is not None:
+                self._drop(entry)
+            self._record(hit=False)
+            return False
+        return self._save(session_id, entry)
+
+    def claim(self, session_id: str, version: int) -> SpeculativePlan | None:
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+        if entry is None:
+            return None
+        if entry.version != version or not (entry.future.running() or entry.future.done()):
+            self._drop(entry)
+            self._record(hit=False)
+            return None
+        plan = self._result(entry)
+        self._record(hit=plan is not None)
+        return plan
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            in_flight = sum(not entry.future.done() for entry in self._entries.values())
+            resolved = self.hits + self.misses
+            stats = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / resolved if resolved else 0.0,
+                "in_flight": in_flight,
+                "token_budget": self.policy.token_budget,
+                "reserved_tokens": self._reserved,
+            }
+        stats["spent_tokens"] = self.spent()
+        return stats
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _current(self, session_id: str, version: int) -> bool:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            return entry is not None and entry.version == version
+
+    def _spent(self) -> int:
+        horizon = self.clock() - self.policy.window_s
+        while self._spend and self._spend[0][0] < horizon:
+            self._spend.popleft()
+        return sum(tokens for _, tokens in self._spend)
+
+    def _estimate(self) -> int:
+        costs = [tokens for _, tokens in self._spend if tokens]
+        return sum(costs) // len(costs) if costs else self.policy.reserve_tokens
+
+    def _run(self, session_id: str, proposal: ProposalPackage, reservation: int) -> SpeculativePlan | None:
+        try:
+            return self._generate(session_id, proposal)
+        finally:
+            with self._lock:
+                self._reserved -= reservation
+
+    def _generate(self, session_id: str, proposal: ProposalPackage) -> SpeculativePlan | None:
+        if not self._current(session_id, proposal.version):
+            return None
+        spec = proposal.requirement_spec
+        with session_scope(session_id), priority_scope("background"), usage_scope() as usage:
+            try:
+                bible = freeze_bible_node(spec=spec, proposal=proposal, client=self.client)
+                if not self._current(session_id, proposal.version):
+                    return None
+                outline_full = plan_book_node(bible=bible, spec=spec, client=self.client)
+                outline_full, _, _ = prepare_plan(bible, outline_full, self.client)
+            finally:
+                with self._lock:
+                    self._spend.append((self.clock(), usage.total_tokens))
+                metrics.inc("novel_flow_plan_speculation_tokens_total", usage.total_tokens)
+        return bible.model_dump(mode="json"), outline_full.model_dump(mode="json")
+
+    def _finished(self, session_id: str, entry: _Speculation) -> None:
+        with self._lock:
+            if entry.future.cancelled():
+                self._reserved -= entry.reserved
+            if self._entries.get(session_id) is not entry or not entry.approved:
+                return
+            del self._entries[session_id]
+        self._save(session_id, entry)
+
+    def _save(self, session_id: str, entry: _Speculation) -> bool:
+        plan = self._result(entry)
+        current = self.repo.get_projection(session_id) if plan is not None else None
+        if (
+            plan is None
+            or current is None
+            or current["status"] != ProposalStatus.APPROVED.value
+            or current["version"] != entry.version
+            or current["bible_version"] is not None
+        ):
+            self._record(hit=False)
+            return False
+        bible_json, outline_full_json = plan
+        outline_index = build_outline_index(OutlineFull.model_validate(outline_full_json))
+        try:
+            saved = self.repo.save_plan(
+                session_id,
+                bible_json=bible_json,
+                outline_full_json=outline_full_json,
+                bump=False,
+                outline_index_json=outline_index.model_dump(mode="json"),
+                expected_revision=int(current["revision"]),
+            )
+        except SessionConflict:
+            saved = None
+        self._record(hit=saved is not None)
+        return saved is not None
+
+    def _result(self, entry: _Speculation) -> SpeculativePlan | None:
+        try:
+            return entry.future.result()
+        except Exception:
+            metrics.inc("novel_flow_plan_speculation_total", outcome="failed")
+            return None
+
+    def _drop(self, entry: _Speculation) -> None:
+        entry.future.cancel()
+        metrics.inc("novel_flow_plan_speculation_total", outcome="discarded")
+
+    def _record(self, *, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        metrics.inc("novel_flow_plan_speculation_total", outcome="hit" if hit else "miss")
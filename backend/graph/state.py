@@ -12,6 +12,7 @@ class SessionState(BaseModel):
     proposal: ProposalPackage | None = None
     status: str = "NEW"
     version: int = 0
+    revision: int = 0
     last_user_action: str | None = None
     edit_text: str | None = None
     expansion_suggestions: list[str] = Field(default_factory=list)
@@ -1,3 +1,16 @@
-from backend.llm.client import LLMClient
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from backend.llm.client import LLMClient
 
 __all__ = ["LLMClient"]
+
+
+def __getattr__(name: str) -> Any:
+    if name == "LLMClient":
+        from backend.llm.client import LLMClient
+
+        return LLMClient
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
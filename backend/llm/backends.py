@@ -0,0 +1,438 @@
+from __future__ import annotations
+
+import functools
+import gzip
+import hashlib
+import http.client
+import json
+import math
+import os
+import random
+import socket
+import threading
+import time
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import IO, Any, Protocol
+from urllib import error, request
+
+from backend.graph import placeholder
+from backend.graph.schemas import ForeshadowingRow, OutlineChapter, RequirementSpec, StoryBible
+from backend.llm.deadline import current_deadline
+
+OPENAI_CHAT_URL = "https://api.openai.com/v1/chat/completions"
+SATURATED_STATUS_CODES = {429, 502, 503, 504, 529}
+
+
+class StructuredOutputUnsupported(RuntimeError):
+    pass
+
+
+class BackendSaturated(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class TokenUsage:
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+    @classmethod
+    def from_openai(cls, usage: dict[str, Any] | None) -> TokenUsage | None:
+        if not usage:
+            return None
+        details = usage.get("prompt_tokens_details") or {}
+        return cls(
+            prompt_tokens=int(usage.get("prompt_tokens") or 0),
+            completion_tokens=int(usage.get("completion_tokens") or 0),
+            cached_tokens=int(details.get("cached_tokens") or 0),
+        )
+
+
+class Completion(str):
+    usage: TokenUsage | None
+
+    def __new__(cls, text: str, usage: TokenUsage | None = None) -> Completion:
+        completion = super().__new__(cls, text)
+        completion.usage = usage
+        return completion
+
+
+@dataclass(frozen=True)
+class CompletionRequest:
+    system_prompt: str
+    user_prompt: str
+    schema_name: str
+    model_name: str
+    timeout_s: float
+    temperature: float
+    response_format: dict[str, Any]
+    max_tokens: int | None = None
+
+
+class LLMBackend(Protocol):
+    name: str
+    billable: bool
+
+    def complete(self, req: CompletionRequest) -> str: ...
+
+
+def request_key(req: CompletionRequest) -> str:
+    digest = hashlib.sha256()
+    for part in (req.model_name, str(req.max_tokens), req.schema_name, req.system_prompt, req.user_prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+@functools.cache
+def _cancellable(connection_class: type[http.client.HTTPConnection]) -> type[http.client.HTTPConnection]:
+    class CancellableConnection(connection_class):  # type: ignore[valid-type, misc]
+        _unregister: Callable[[], object] | None = None
+
+        def connect(self) -> None:
+            super().connect()
+            deadline = current_deadline.get()
+            if deadline is not None:
+                self._unregister = deadline.on_cancel(self.abort)
+
+        def abort(self) -> None:
+            sock = self.sock
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+        def close(self) -> None:
+            if self._unregister is not None:
+                self._unregister()
+                self._unregister = None
+            super().close()
+
+    return CancellableConnection
+
+
+class _CancellableHTTPHandler(request.HTTPHandler):
+    def do_open(self, http_class: Any, req: Any, **kwargs: Any) -> Any:
+        return super().do_open(_cancellable(http_class), req, **kwargs)
+
+
+class _CancellableHTTPSHandler(request.HTTPSHandler):
+    def do_open(self, http_class: Any, req: Any, **kwargs: Any) -> Any:
+        return super().do_open(_cancellable(http_class), req, **kwargs)
+
+
+class OpenAIHTTPBackend:
+    name = "openai"
+    billable = True
+
+    def __init__(self, *, api_key: str, url: str = OPENAI_CHAT_URL) -> None:
+        self.api_key = api_key
+        self.url = url
+        self._opener = request.build_opener(_CancellableHTTPHandler, _CancellableHTTPSHandler)
+
+    def complete(self, req: CompletionRequest) -> str:
+        body: dict[str, Any] = {
+            "model": req.model_name,
+            "response_format": req.response_format,
+            "temperature": req.temperature,
+            "messages": [
+                {"role": "system", "content": req.system_prompt},
+                {"role": "user", "content": req.user_prompt},
+            ],
+        }
+        if req.max_tokens:
+            body["max_tokens"] = req.max_tokens
+        http_req = request.Request(
+            url=self.url,
+            data=json.dumps(body).encode("utf-8"),
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.api_key}",
+            },
+            method="POST",
+        )
+        try:
+            with self._opener.open(http_req, timeout=req.timeout_s) as resp:
+                payload: dict[str, Any] = json.loads(resp.read().decode("utf-8"))
+        except error.HTTPError as exc:
+            if exc.code == 400 and req.response_format["type"] == "json_schema" and _mentions_response_format(exc):
+                raise StructuredOutputUnsupported("Provider rejected json_schema response_format") from exc
+            if exc.code in SATURATED_STATUS_CODES:
+                raise BackendSaturated(f"LLM request failed with status {exc.code}") from exc
+            raise RuntimeError(f"LLM request failed with status {exc.code}") from exc
+        except (TimeoutError, socket.timeout) as exc:
+            raise BackendSaturated("LLM request timed out") from exc
+        except error.URLError as exc:
+            if isinstance(exc.reason, (TimeoutError, socket.timeout)):
+                raise BackendSaturated("LLM request timed out") from exc
+            raise RuntimeError("LLM request failed due to network error") from exc
+
+        choices = payload.get("choices") or []
+        if not choices:
+            raise RuntimeError("LLM response did not include choices")
+        message = choices[0].get("message") or {}
+        content = message.get("content")
+        if not isinstance(content, str):
+            raise RuntimeError("LLM response content was not a string")
+        return Completion(content, usage=TokenUsage.from_openai(payload.get("usage")))
+
+
+class PlaceholderBackend:
+    name = "placeholder"
+    billable = False
+
+    def complete(self, req: CompletionRequest) -> str:
+        prompt = req.user_prompt
+        if req.schema_name == "RequirementSpec":
+            data: Any = placeholder.analyze_requirement(_after(prompt, "Input text:\n"))
+        elif req.schema_name == "ExpansionResult":
+            spec = self._spec(_after(prompt, "Spec:\n"))
+            data = {
+                "expansion_suggestions": placeholder.expansion_suggestions(spec),
+                "open_questions": placeholder.open_questions(spec),
+            }
+        elif req.schema_name == "OutlineLite":
+            data = placeholder.outline_lite(self._spec(_after(prompt, "Spec:\n")))
+        elif req.schema_name == "StoryBible":
+            spec_text = _between(prompt, "Requirement spec:\n", "\nApproved proposal:\n")
+            data = placeholder.story_bible(self._spec(spec_text))
+        elif req.schema_name == "OutlineFull":
+            bible = StoryBible.model_validate_json(_between(prompt, "Story bible:\n", "\nRequirement spec:\n"))
+            spec = self._spec(_after(prompt, "Requirement spec:\n"))
+            data = placeholder.outline_full(bible, spec)
+        elif req.schema_name == "ChapterDraft":
+            chapter = OutlineChapter.model_validate_json(_between(prompt, "Chapter:\n", "\nRelevant bible:\n"))
+            data = placeholder.chapter_draft(chapter, _after(prompt, "Story so far:\n"))
+        elif req.schema_name == "OutlineChapter":
+            characters = json.loads(_between(prompt, "Allowed characters:\n", "\nForeshadowing rows:\n"))
+            rows = [
+                ForeshadowingRow.model_validate(row)
+                for row in json.loads(_between(prompt, "Foreshadowing rows:\n", "\nChapter:\n"))
+            ]
+            chapter = OutlineChapter.model_validate_json(_after(prompt, "\nChapter:\n"))
+            data = placeholder.revise_chapter(chapter, characters, rows)
+        else:
+            raise ValueError(f"Unsupported schema_name: {req.schema_name}")
+        if hasattr(data, "model_dump_json"):
+            return data.model_dump_json()
+        return json.dumps(data)
+
+    @staticmethod
+    def _spec(text: str) -> RequirementSpec:
+        try:
+            return RequirementSpec.model_validate_json(text)
+        except ValueError:
+            return placeholder.analyze_requirement(text)
+
+
+@dataclass(frozen=True)
+class CassetteEntry:
+    key: str
+    response: str
+    schema_name: str = ""
+    model_name: str = ""
+    latency_s: float = 0.0
+    usage: dict[str, int] | None = None
+
+
+@dataclass(frozen=True)
+class LatencyModel:
+    kind: str = "none"
+    value: float = 1.0
+    sigma: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> LatencyModel:
+        kind, _, args = spec.partition(":")
+        params = [float(arg) for arg in args.split(",") if arg]
+        if kind == "none":
+            return cls()
+        if kind == "recorded":
+            return cls(kind, params[0] if params else 1.0)
+        if kind == "fixed" and len(params) == 1:
+            return cls(kind, params[0])
+        if kind == "lognormal" and len(params) == 2:
+            return cls(kind, params[0], params[1])
+        raise ValueError(f"Unsupported latency model: {spec}")
+
+    def sample(self, recorded_s: float, rng: random.Random) -> float:
+        if self.kind == "recorded":
+            return recorded_s * self.value
+        if self.kind == "fixed":
+            return self.value
+        if self.kind == "lognormal":
+            return rng.lognormvariate(math.log(self.value), self.sigma)
+        return 0.0
+
+
+def _open_cassette(path: str | Path, mode: str) -> IO[str]:
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def read_cassette(path: str | Path) -> list[CassetteEntry]:
+    with _open_cassette(path, "r") as handle:
+        return [CassetteEntry(**json.loads(line)) for line in handle if line.strip()]
+
+
+class RecordingBackend:
+    def __init__(self, inner: LLMBackend, path: str | Path) -> None:
+        self.inner = inner
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.name = f"record({inner.name})"
+        self.billable = inner.billable
+        self._lock = threading.Lock()
+
+    def complete(self, req: CompletionRequest) -> str:
+        started = time.perf_counter()
+        response = self.inner.complete(req)
+        entry = CassetteEntry(
+            key=request_key(req),
+            response=response,
+            schema_name=req.schema_name,
+            model_name=req.model_name,
+            latency_s=round(time.perf_counter() - started, 4),
+            usage=asdict(response.usage) if getattr(response, "usage", None) else None,
+        )
+        line = json.dumps(asdict(entry), separators=(",", ":"), ensure_ascii=False)
+        with self._lock, _open_cassette(self.path, "a") as handle:
+            handle.write(line + "\n")
+        return response
+
+
+class ReplayBackend:
+    name = "replay"
+    billable = False
+
+    def __init__(
+        self,
+        entries: Iterable[CassetteEntry] | Mapping[str, str],
+        *,
+        latency: LatencyModel | None = None,
+        miss_backend: LLMBackend | None = None,
+        seed: int = 0,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if isinstance(entries, Mapping):
+            entries = [CassetteEntry(key=key, response=response) for key, response in entries.items()]
+        self.entries: dict[str, list[CassetteEntry]] = {}
+        for entry in entries:
+            self.entries.setdefault(entry.key, []).append(entry)
+        self.latency = latency or LatencyModel()
+        self.miss_backend = miss_backend
+        self.misses = 0
+        self._rng = random.Random(seed)
+        self._sleep = sleep
+        self._cursor: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str | Path, **kwargs: Any) -> ReplayBackend:
+        return cls(read_cassette(path), **kwargs)
+
+    def complete(self, req: CompletionRequest) -> str:
+        key = request_key(req)
+        recorded = self.entries.get(key)
+        if not recorded:
+            self.misses += 1
+            if self.miss_backend is not None:
+                return self.miss_backend.complete(req)
+            raise RuntimeError(f"No recorded response for {req.schema_name} request")
+        with self._lock:
+            index = self._cursor.get(key, 0)
+            self._cursor[key] = index + 1
+            delay = self.latency.sample(recorded[index % len(recorded)].latency_s, self._rng)
+        if delay > 0:
+            self._sleep(delay)
+        entry = recorded[index % len(recorded)]
+        return Completion(entry.response, usage=TokenUsage(**entry.usage) if entry.usage else None)
+
+
+class DelayedBackend:
+    def __init__(
+        self,
+        inner: LLMBackend,
+        latency: LatencyModel,
+        *,
+        seed: int = 0,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.inner = inner
+        self.latency = latency
+        self.name = f"delayed({inner.name})"
+        self.billable = inner.billable
+        self._rng = random.Random(seed)
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def complete(self, req: CompletionRequest) -> str:
+        with self._lock:
+            delay = self.latency.sample(0.0, self._rng)
+        if delay > 0:
+            self._sleep(delay)
+        return self.inner.complete(req)
+
+
+class FailoverBackend:
+    def __init__(self, primary: LLMBackend, fallback: LLMBackend) -> None:
+        self.primary = primary
+        self.fallback = fallback
+        self.name = f"{primary.name}+{fallback.name}"
+        self.billable = primary.billable
+        self.failovers = 0
+
+    def complete(self, req: CompletionRequest) -> str:
+        try:
+            return self.primary.complete(req)
+        except BackendSaturated:
+            self.failovers += 1
+            return self.fallback.complete(req)
+
+
+def build_backend(spec: str | None = None, *, api_key: str | None = None) -> LLMBackend:
+    spec = spec if spec is not None else os.getenv("NOVEL_FLOW_LLM_BACKEND", "")
+    api_key = api_key if api_key is not None else os.getenv("OPENAI_API_KEY")
+    kind, _, arg = spec.partition(":")
+    if not kind:
+        kind = "openai" if api_key else "placeholder"
+    if kind == "placeholder":
+        latency = os.getenv("NOVEL_FLOW_PLACEHOLDER_LATENCY")
+        if latency:
+            return DelayedBackend(PlaceholderBackend(), LatencyModel.parse(latency))
+        return PlaceholderBackend()
+    if kind == "replay":
+        if not arg:
+            raise ValueError("replay backend requires a path, e.g. replay:/path/to/cassette.jsonl")
+        latency = LatencyModel.parse(os.getenv("NOVEL_FLOW_REPLAY_LATENCY", "none"))
+        return ReplayBackend.from_file(arg, latency=latency)
+    if kind in {"openai", "failover"}:
+        if not api_key:
+            raise ValueError(f"{kind} backend requires OPENAI_API_KEY")
+        primary: LLMBackend = OpenAIHTTPBackend(api_key=api_key, url=arg or OPENAI_CHAT_URL)
+        record_path = os.getenv("NOVEL_FLOW_LLM_RECORD")
+        if record_path:
+            primary = RecordingBackend(primary, record_path)
+        return FailoverBackend(primary, PlaceholderBackend()) if kind == "failover" else primary
+    raise ValueError(f"Unsupported LLM backend: {spec}")
+
+
+def _after(text: str, marker: str) -> str:
+    return text.split(marker, 1)[-1].strip()
+
+
+def _between(text: str, start: str, end: str) -> str:
+    return _after(text, start).split(end.strip(), 1)[0].strip()
+
+
+def _mentions_response_format(exc: error.HTTPError) -> bool:
+    try:
+        detail = exc.read().decode("utf-8", errors="replace")
+    except Exception:
+        return False
+    return "response_format" in detail or "json_schema" in detail
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from pydantic import ValidationError
+
+from backend.graph.schemas import SCHEMA_MODELS
+from backend.llm.backends import Completion, CompletionRequest, LLMBackend, TokenUsage, request_key
+
+CACHE_MMAP_BYTES = 256 * 1024 * 1024
+
+
+fresh_responses: ContextVar[bool] = ContextVar("fresh_responses", default=False)
+
+
+@contextmanager
+def fresh_responses_scope() -> Iterator[None]:
+    token = fresh_responses.set(True)
+    try:
+        yield
+    finally:
+        fresh_responses.reset(token)
+
+
+def cache_key(req: CompletionRequest) -> str:
+    response_format = json.dumps(req.response_format, sort_keys=True)
+    text = f"{response_format}\n{request_key(req)}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    schema_name TEXT NOT NULL,
+                    model_name TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute(f"PRAGMA mmap_size={CACHE_MMAP_BYTES}")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> str | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT response FROM llm_responses WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, response: str, *, schema_name: str, model_name: str, replace: bool = False) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                f"""
+                INSERT OR {"REPLACE" if replace else "IGNORE"} INTO llm_responses
+                    (key, schema_name, model_name, response, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, schema_name, model_name, str(response), time.time()),
+            )
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return int(conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0])
+
+
+class CachingBackend:
+    def __init__(self, inner: LLMBackend, cache: ResponseCache) -> None:
+        self.inner = inner
+        self.cache = cache
+        self.name = f"cache({inner.name})"
+        self.billable = inner.billable
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._lock = threading.Lock()
+
+    def complete(self, req: CompletionRequest) -> str:
+        if req.temperature != 0:
+            return self.inner.complete(req)
+        key = cache_key(req)
+        fresh = fresh_responses.get()
+        cached = None if fresh else self.cache.get(key)
+        with self._lock:
+            if fresh:
+                self.bypassed += 1
+            elif cached is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if cached is not None:
+            return Completion(cached, usage=TokenUsage())
+
+        response = self.inner.complete(req)
+        if _is_valid(req.schema_name, response):
+            self.cache.put(key, response, schema_name=req.schema_name, model_name=req.model_name, replace=fresh)
+        return response
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "bypassed": self.bypassed}
+
+
+def _is_valid(schema_name: str, response: str) -> bool:
+    model = SCHEMA_MODELS.get(schema_name)
+    if model is None:
+        return False
+    try:
+        model.model_validate_json(response)
+    except ValidationError:
+        return False
+    return True
@@ -1,13 +1,36 @@
 from __future__ import annotations
 
+import contextvars
 import json
 import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from contextlib import nullcontext
+from dataclasses import replace
 from typing import Any
-from urllib import error, request
 
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
 
-from backend.graph.schemas import ExpansionResult, OutlineFull, OutlineLite, RequirementSpec, StoryBible
+from backend.graph.schemas import SCHEMA_MODELS
+from backend.llm.backends import (
+    CompletionRequest,
+    LLMBackend,
+    StructuredOutputUnsupported,
+    TokenUsage,
+    build_backend,
+)
+from backend.llm.deadline import Deadline, check_deadline, current_deadline, deadline_scope, remaining_s
+from backend.llm.hedging import HedgeBudget, HedgePolicy, LatencyWindow
+from backend.llm.repair import repair_json
+from backend.llm.scheduler import LLMScheduler, SchedulerPolicy, SchedulerRejected
+from backend.llm.routing import DEFAULT_ROUTES, Route, RouteStats, estimate_cost, estimate_tokens
+from backend.llm.structured import response_format_for
+from backend.observability.metrics import metrics
+from backend.observability.tracing import tracer
+
+JSON_OBJECT_FORMAT: dict[str, Any] = {"type": "json_object"}
 
 
 class LLMClient:
@@ -19,196 +42,400 @@ class LLMClient:
         timeout_s: int = 30,
         max_retries: int = 3,
         temperature: float = 0,
+        structured_output: bool = True,
+        routes: dict[str, Route] | None = None,
+        speculative: bool = False,
+        hedging: HedgePolicy | None = None,
+        scheduler: LLMScheduler | None = None,
+        backend: LLMBackend | None = None,
     ) -> None:
         self.api_key = api_key if api_key is not None else os.getenv("OPENAI_API_KEY")
+        self.backend = backend or build_backend(api_key=self.api_key)
         self.model_name = model_name
         self.timeout_s = timeout_s
         self.max_retries = max_retries
         self.temperature = temperature
+        self.structured_output = structured_output
+        self.routes = dict(DEFAULT_ROUTES if routes is None else routes)
+        self.speculative = speculative
+        self.outcomes: Counter[tuple[str, str]] = Counter()
+        self.route_stats: dict[tuple[str, str], RouteStats] = {}
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self.hedging = hedging
+        self.latencies = LatencyWindow(hedging.window if hedging else 0)
+        self.hedge_budget = HedgeBudget(hedging.budget, hedging.burst) if hedging else None
+        self._hedge_executor: ThreadPoolExecutor | None = None
+        self.scheduler = scheduler
 
     def generate_json(self, *, system_prompt: str, user_prompt: str, schema_name: str) -> dict[str, Any]:
-        if not self.api_key:
-            return self._mock_json(schema_name=schema_name, user_prompt=user_prompt)
-
+        model = self._schema_model(schema_name)
+        route = self.route_for(schema_name)
         prompt = user_prompt
         last_error = "unknown error"
-        for _ in range(self.max_retries):
-            raw = self._call_model(system_prompt=system_prompt, user_prompt=prompt)
+        usages: list[TokenUsage] = []
+        for attempt in range(self.max_retries):
+            with tracer.span("llm.attempt", schema=schema_name) as span:
+                span.set_attribute("attempt", attempt)
+                span.set_attribute("model", route.model_name)
+                check_deadline(f"llm.{schema_name}", needs_s=self._expected_latency(schema_name, route))
+                if attempt == 0 and self.speculative and route.speculative_model:
+                    raw, data, repaired, error_text = self._speculate(
+                        system_prompt=system_prompt,
+                        user_prompt=prompt,
+                        schema_name=schema_name,
+                        route=route,
+                        usage_sink=usages,
+                    )
+                elif self.hedging is not None:
+                    raw, data, repaired, error_text = self._hedge(
+                        system_prompt=system_prompt,
+                        user_prompt=prompt,
+                        schema_name=schema_name,
+                        route=route,
+                        usage_sink=usages,
+                    )
+                else:
+                    raw = self._request_json(
+                        system_prompt=system_prompt,
+                        user_prompt=prompt,
+                        schema_name=schema_name,
+                        route=route,
+                        usage_sink=usages,
+                    )
+                    data, repaired, error_text = self._parse(raw, model)
+                if data is not None:
+                    outcome = "repaired" if repaired else "success" if attempt == 0 else "retried"
+                    span.set_attribute("outcome", outcome)
+                    self._record_outcome(schema_name, outcome, route=route, usages=usages)
+                    return data
+                span.set_attribute("outcome", "invalid")
+                span.set_attribute("retry_reason", error_text.splitlines()[0][:200] if error_text else "")
+            last_error = error_text
+            prompt = (
+                "Your previous output was invalid. Return JSON only and repair it to fit the required schema.\n"
+                f"Schema name: {schema_name}\n"
+                f"Error: {last_error}\n"
+                f"Previous output:\n{raw}"
+            )
+
+        self._record_outcome(schema_name, "failed", route=route, usages=usages)
+        raise ValueError(f"Failed to generate valid JSON for {schema_name} after {self.max_retries} attempts: {last_error}")
+
+    def route_for(self, schema_name: str) -> Route:
+        return self.routes.get(schema_name, Route()).resolve(model_name=self.model_name, timeout_s=self.timeout_s)
+
+    def outcome_counts(self, schema_name: str | None = None) -> dict[str, int]:
+        counts = {"success": 0, "repaired": 0, "retried": 0, "failed": 0}
+        for (name, outcome), count in self.outcomes.items():
+            if schema_name is None or name == schema_name:
+                counts[outcome] += count
+        return counts
+
+    def _record_outcome(
+        self, schema_name: str, outcome: str, *, route: Route, usages: list[TokenUsage]
+    ) -> None:
+        with self._lock:
+            self.outcomes[(schema_name, outcome)] += 1
+        model_name = route.model_name or self.model_name
+        prompt_tokens = sum(usage.prompt_tokens for usage in usages)
+        completion_tokens = sum(usage.completion_tokens for usage in usages)
+        cached_tokens = sum(usage.cached_tokens for usage in usages)
+        metrics.record_llm_generation(
+            schema=schema_name,
+            model=model_name,
+            outcome=outcome,
+            calls=len(usages),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_tokens=cached_tokens,
+            cost_usd=(
+                estimate_cost(model_name, prompt_tokens, completion_tokens, cached_tokens)
+                if self.backend.billable
+                else 0.0
+            ),
+        )
+
+    @staticmethod
+    def _parse(raw: str, model: type[BaseModel]) -> tuple[dict[str, Any] | None, bool, str]:
+        try:
+            return model.model_validate(json.loads(raw)).model_dump(mode="json"), False, ""
+        except (json.JSONDecodeError, ValidationError, ValueError) as exc:
+            repaired = repair_json(raw, model)
+            return repaired, repaired is not None, str(exc)
+
+    def _speculate(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        schema_name: str,
+        route: Route,
+        usage_sink: list[TokenUsage],
+    ) -> tuple[str, dict[str, Any] | None, bool, str]:
+        with self._lock:
+            if self._executor is None:
+                policy = self.scheduler.policy if self.scheduler is not None else SchedulerPolicy()
+                self._executor = ThreadPoolExecutor(
+                    max_workers=2 * policy.concurrency, thread_name_prefix="llm-speculative"
+                )
+            executor = self._executor
+        model = self._schema_model(schema_name)
+        draft_route = replace(route, model_name=route.speculative_model)
+        parent = current_deadline.get()
+        candidates: dict[Future[str], tuple[Route, Deadline, list[TokenUsage]]] = {}
+
+        def attempt(candidate: Route, deadline: Deadline, sink: list[TokenUsage]) -> str:
             try:
-                data = json.loads(raw)
-                return self._validate_schema(schema_name=schema_name, data=data)
-            except (json.JSONDecodeError, ValidationError, ValueError) as exc:
-                last_error = str(exc)
-                prompt = (
-                    "Your previous output was invalid. Return JSON only and repair it to fit the required schema.\n"
-                    f"Schema name: {schema_name}\n"
-                    f"Error: {last_error}\n"
-                    f"Previous output:\n{raw}"
+                with deadline_scope(deadline):
+                    return self._request_json(
+                        system_prompt=system_prompt,
+                        user_prompt=user_prompt,
+                        schema_name=schema_name,
+                        route=candidate,
+                        usage_sink=sink,
+                    )
+            finally:
+                deadline.detach()
+
+        for candidate in (draft_route, route):
+            deadline = parent.child() if parent is not None else Deadline()
+            sink: list[TokenUsage] = []
+            future = executor.submit(contextvars.copy_context().run, attempt, candidate, deadline, sink)
+            candidates[future] = (candidate, deadline, sink)
+
+        fallback_raw = ""
+        last_exc: RuntimeError | None = None
+        last_error = "unknown error"
+        try:
+            for future in as_completed(candidates):
+                try:
+                    raw = future.result()
+                except SchedulerRejected:
+                    raise
+                except RuntimeError as exc:
+                    last_exc, last_error = exc, str(exc)
+                    continue
+                data, repaired, error_text = self._parse(raw, model)
+                if data is not None:
+                    return raw, data, repaired, ""
+                last_error = error_text
+                if candidates[future][0] is route or not fallback_raw:
+                    fallback_raw = raw
+        finally:
+            for future, (_, deadline, sink) in candidates.items():
+                if future.done():
+                    usage_sink.extend(sink)
+                    continue
+                future.cancel()
+                deadline.cancel("speculation_lost", counted=False)
+                metrics.inc("novel_flow_llm_speculative_total", schema=schema_name, outcome="loser_cancelled")
+        if not fallback_raw and last_exc is not None:
+            raise last_exc
+        return fallback_raw, None, False, last_error
+
+    def _hedge(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        schema_name: str,
+        route: Route,
+        usage_sink: list[TokenUsage],
+    ) -> tuple[str, dict[str, Any] | None, bool, str]:
+        policy = self.hedging or HedgePolicy()
+        budget = self.hedge_budget or HedgeBudget(policy.budget, policy.burst)
+        with self._lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=policy.max_workers, thread_name_prefix="llm-hedge"
                 )
+            executor = self._hedge_executor
+        model = self._schema_model(schema_name)
+        parent = current_deadline.get()
+        attempts: dict[Future[str], Deadline] = {}
 
-        raise ValueError(f"Failed to generate valid JSON for {schema_name} after {self.max_retries} attempts: {last_error}")
+        primary_sent = threading.Event()
+
+        def attempt(deadline: Deadline, sent: threading.Event | None) -> str:
+            try:
+                with deadline_scope(deadline):
+                    return self._request_json(
+                        system_prompt=system_prompt,
+                        user_prompt=user_prompt,
+                        schema_name=schema_name,
+                        route=route,
+                        usage_sink=usage_sink,
+                        sent=sent,
+                    )
+            finally:
+                deadline.detach()
+
+        def submit(sent: threading.Event | None = None) -> Future[str]:
+            deadline = parent.child() if parent is not None else Deadline()
+            future = executor.submit(contextvars.copy_context().run, attempt, deadline, sent)
+            attempts[future] = deadline
+            return future
+
+        primary = submit(primary_sent)
+        primary.add_done_callback(lambda _: primary_sent.set())
+        pending = {primary}
+        hedged = False
+        budget.deposit()
+        delay = self.latencies.percentile(schema_name, policy.percentile, min_samples=policy.min_samples)
+        if delay is not None:
+            primary_sent.wait()
+        if delay is not None and not wait(pending, timeout=max(delay, policy.min_delay_s)).done:
+            hedged = budget.withdraw()
+            if hedged:
+                pending.add(submit())
+            metrics.inc("novel_flow_llm_hedges_total", schema=schema_name, outcome="fired" if hedged else "denied")
+
+        fallback_raw = ""
+        last_exc: RuntimeError | None = None
+        last_error = "unknown error"
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    raw = future.result()
+                except SchedulerRejected:
+                    raise
+                except RuntimeError as exc:
+                    last_exc, last_error = exc, str(exc)
+                    continue
+                data, repaired, error_text = self._parse(raw, model)
+                if data is not None:
+                    for loser in pending:
+                        loser.cancel()
+                        attempts[loser].cancel("hedge_lost", counted=False)
+                        metrics.inc("novel_flow_llm_hedges_total", schema=schema_name, outcome="loser_cancelled")
+                    if hedged:
+                        winner = "primary_won" if future is primary else "hedge_won"
+                        metrics.inc("novel_flow_llm_hedges_total", schema=schema_name, outcome=winner)
+                    return raw, data, repaired, ""
+                last_error = error_text
+                fallback_raw = fallback_raw or raw
+        if not fallback_raw and last_exc is not None:
+            raise last_exc
+        return fallback_raw, None, False, last_error
+
+    def _request_json(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        schema_name: str,
+        route: Route,
+        usage_sink: list[TokenUsage] | None = None,
+        sent: threading.Event | None = None,
+    ) -> str:
+        started = time.perf_counter()
+        raw = ""
+        metrics.add_gauge("novel_flow_llm_in_flight", 1)
+        try:
+            if self.structured_output:
+                try:
+                    raw = self._call_model(
+                        system_prompt=system_prompt,
+                        user_prompt=user_prompt,
+                        schema_name=schema_name,
+                        response_format=response_format_for(schema_name),
+                        route=route,
+                        sent=sent,
+                    )
+                    return raw
+                except StructuredOutputUnsupported:
+                    self.structured_output = False
+            raw = self._call_model(
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                schema_name=schema_name,
+                response_format=JSON_OBJECT_FORMAT,
+                route=route,
+                sent=sent,
+            )
+            return raw
+        except Exception:
+            check_deadline(f"llm.{schema_name}")
+            raise
+        finally:
+            metrics.add_gauge("novel_flow_llm_in_flight", -1)
+            usage = self._record_route(
+                schema_name=schema_name,
+                model_name=route.model_name or self.model_name,
+                latency_s=time.perf_counter() - started,
+                prompt=system_prompt + user_prompt,
+                completion=raw,
+            )
+            if usage_sink is not None:
+                usage_sink.append(usage)
+
+    def _expected_latency(self, schema_name: str, route: Route) -> float:
+        with self._lock:
+            stats = self.route_stats.get((schema_name, route.model_name or self.model_name))
+            return stats.mean_latency_s if stats is not None else 0.0
+
+    def _record_route(
+        self, *, schema_name: str, model_name: str, latency_s: float, prompt: str, completion: str
+    ) -> TokenUsage:
+        usage = getattr(completion, "usage", None) or TokenUsage(
+            prompt_tokens=estimate_tokens(prompt),
+            completion_tokens=estimate_tokens(completion) if completion else 0,
+        )
+        metrics.observe("novel_flow_llm_call_duration_seconds", latency_s, schema=schema_name, model=model_name)
+        with self._lock:
+            stats = self.route_stats.setdefault((schema_name, model_name), RouteStats())
+            stats.calls += 1
+            stats.errors += 0 if completion else 1
+            stats.latency_s += latency_s
+            stats.prompt_tokens += usage.prompt_tokens
+            stats.completion_tokens += usage.completion_tokens
+            stats.cached_tokens += usage.cached_tokens
+            if self.backend.billable:
+                stats.cost_usd += estimate_cost(
+                    model_name, usage.prompt_tokens, usage.completion_tokens, usage.cached_tokens
+                )
+        return usage
 
-    def _validate_schema(self, schema_name: str, data: dict[str, Any]) -> dict[str, Any]:
-        validators = {
-            "RequirementSpec": RequirementSpec,
-            "ExpansionResult": ExpansionResult,
-            "OutlineLite": OutlineLite,
-            "StoryBible": StoryBible,
-            "OutlineFull": OutlineFull,
-        }
-        model = validators.get(schema_name)
+    @staticmethod
+    def _schema_model(schema_name: str) -> type[BaseModel]:
+        model = SCHEMA_MODELS.get(schema_name)
         if model is None:
             raise ValueError(f"Unsupported schema_name: {schema_name}")
-        return model.model_validate(data).model_dump(mode="json")
-
-    def _call_model(self, *, system_prompt: str, user_prompt: str) -> str:
-        body = {
-            "model": self.model_name,
-            "response_format": {"type": "json_object"},
-            "temperature": self.temperature,
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-        }
-        req = request.Request(
-            url="https://api.openai.com/v1/chat/completions",
-            data=json.dumps(body).encode("utf-8"),
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_key}",
-            },
-            method="POST",
-        )
-        try:
-            with request.urlopen(req, timeout=self.timeout_s) as resp:
-                payload: dict[str, Any] = json.loads(resp.read().decode("utf-8"))
-        except error.HTTPError as exc:
-            raise RuntimeError(f"LLM request failed with status {exc.code}") from exc
-        except error.URLError as exc:
-            raise RuntimeError("LLM request failed due to network error") from exc
-
-        choices = payload.get("choices") or []
-        if not choices:
-            raise RuntimeError("LLM response did not include choices")
-        message = choices[0].get("message") or {}
-        content = message.get("content")
-        if not isinstance(content, str):
-            raise RuntimeError("LLM response content was not a string")
-        return content
-
-    def _mock_json(self, *, schema_name: str, user_prompt: str) -> dict[str, Any]:
-        text = user_prompt.split("Input text:\n")[-1].strip()
-        if schema_name == "RequirementSpec":
-            lowered = text.lower()
-            genre = "fantasy" if "magic" in lowered else "mystery" if "detective" in lowered else "general fiction"
-            tone = "dark" if "dark" in lowered else "hopeful" if "hope" in lowered else "balanced"
-            return {
-                "raw_text": text,
-                "objective": f"Develop a novel plan for: {text[:80] or 'Untitled project'}",
-                "genre_hint": genre,
-                "tone_hint": tone,
-                "constraints": ["Narrative voice: first person"] if "first person" in lowered else [],
-            }
-        if schema_name == "ExpansionResult":
-            return {
-                "expansion_suggestions": [
-                    "Clarify protagonist arc.",
-                    "Define conflict escalation points.",
-                    "Set narrative voice consistency.",
-                ],
-                "open_questions": [
-                    "Who is the target readership?",
-                    "Standalone or series potential?",
-                    "Any hard constraints on setting or POV?",
-                ],
-            }
-        if schema_name == "OutlineLite":
-            return {
-                "chapter_beats": [
-                    "Chapter 1: Introduce premise and protagonist.",
-                    "Chapter 2: Inciting incident disrupts normal life.",
-                    "Chapter 3: First commitment to core conflict.",
-                    "Chapter 4: Rising stakes and complications.",
-                    "Chapter 5: Midpoint reversal changes the plan.",
-                    "Chapter 6: Crisis narrows available options.",
-                    "Chapter 7: Climax and decisive confrontation.",
-                    "Chapter 8: Resolution and thematic closure.",
-                ]
-            }
-        if schema_name == "StoryBible":
-            return {
-                "title_working": "The Glass Ember",
-                "genre": "fantasy mystery",
-                "tone": "brooding but hopeful",
-                "pov": "first person",
-                "style_guide": {
-                    "diction": "contemporary with lyrical spikes",
-                    "sentence_length": "mostly medium, short in action",
-                    "dialogue_ratio": "40%",
-                    "taboo_list": ["anachronistic slang", "omniscient narration"],
-                    "examples": ["sensory detail anchored in emotion"],
-                },
-                "world": {
-                    "setting_time": "late industrial era",
-                    "setting_place": "river-city of Vael",
-                    "rules": ["binding magic requires true names"],
-                    "factions": ["Guild of Lamps", "Harbor Wardens"],
-                    "tech_or_magic_level": "mixed steampunk + ritual magic",
-                },
-                "characters": [
-                    {
-                        "name": "Iris Vale",
-                        "role": "protagonist investigator",
-                        "goal": "clear her brother's name",
-                        "flaw": "impulsive risk-taking",
-                        "secret": "she can hear bound names",
-                        "voice": "wry and observant",
-                        "relationships": ["protective of Tomas", "rivalry with Captain Roan"],
-                    }
-                ],
-                "timeline": [
-                    {"id": "T1", "event": "artifact theft", "when": "Day 0", "consequences": "city lockdown"}
-                ],
-                "canon_rules": ["No resurrection magic", "Magic leaves physical residue"],
-            }
-        if schema_name == "OutlineFull":
-            return {
-                "chapters": [
-                    {
-                        "index": 1,
-                        "title": "Ash on the River",
-                        "goal": "establish mystery",
-                        "conflict": "Iris is framed",
-                        "twist": "evidence points to Tomas",
-                        "hook": "Iris pockets forbidden residue",
-                        "locations": ["Dock Nine"],
-                        "characters_involved": ["Iris Vale", "Captain Roan"],
-                        "foreshadowing_in": ["F1"],
-                        "foreshadowing_out": [],
-                    }
-                ],
-                "character_arcs": [
-                    {
-                        "character": "Iris Vale",
-                        "start_state": "reactive and isolated",
-                        "key_turns": ["accepts help", "reveals secret"],
-                        "end_state": "trusted leader",
-                    }
-                ],
-                "foreshadowing_table": [
-                    {
-                        "id": "F1",
-                        "setup_chapter": 1,
-                        "payoff_chapter": 8,
-                        "description": "residue pattern matches a ward key",
-                        "evidence_style": "forensic breadcrumb",
-                    }
-                ],
-                "ending": {
-                    "type": "bittersweet victory",
-                    "final_reveal": "Guild master orchestrated theft",
-                    "emotional_resolution": "Iris reconciles with Tomas",
-                },
-            }
-        raise ValueError(f"Unsupported schema_name: {schema_name}")
+        return model
+
+    def _call_model(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        schema_name: str = "",
+        response_format: dict[str, Any] | None = None,
+        route: Route | None = None,
+        sent: threading.Event | None = None,
+    ) -> str:
+        route = route or self.route_for(schema_name)
+        with self.scheduler.slot() if self.scheduler is not None else nullcontext():
+            if sent is not None:
+                sent.set()
+            timeout_s: float = route.timeout_s or self.timeout_s
+            remaining = remaining_s()
+            if remaining is not None:
+                timeout_s = max(0.001, min(timeout_s, remaining))
+            started = time.perf_counter()
+            raw = self.backend.complete(
+                CompletionRequest(
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                    schema_name=schema_name,
+                    model_name=route.model_name or self.model_name,
+                    timeout_s=timeout_s,
+                    temperature=self.temperature,
+                    response_format=response_format or JSON_OBJECT_FORMAT,
+                    max_tokens=route.max_tokens,
+                )
+            )
+            if raw and self.hedging is not None:
+                self.latencies.observe(schema_name, time.perf_counter() - started)
+            return raw
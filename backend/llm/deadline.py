@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from backend.observability.metrics import metrics
+
+
+class RequestCancelled(Exception):
+    def __init__(self, reason: str, stage: str) -> None:
+        super().__init__(f"Request cancelled at {stage}: {reason}")
+        self.reason = reason
+        self.stage = stage
+
+
+class Deadline:
+    def __init__(self, timeout_s: float | None = None, *, clock: Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock
+        self.expires_at = None if timeout_s is None else clock() + timeout_s
+        self.reason: str | None = None
+        self.counted = True
+        self._callbacks: dict[int, Callable[[], None]] = {}
+        self._next_callback = 0
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._detach: Callable[[], object] = lambda: None
+
+    def child(self) -> Deadline:
+        child = Deadline(clock=self.clock)
+        child.expires_at = self.expires_at
+        child._detach = self.on_cancel(lambda: child.cancel(self.reason or "cancelled"))
+        return child
+
+    def detach(self) -> None:
+        self._detach()
+
+    def remaining(self) -> float | None:
+        return None if self.expires_at is None else self.expires_at - self.clock()
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self, reason: str, *, counted: bool = True) -> None:
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+            self.reason = reason
+            self.counted = counted
+            self._cancelled.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        with self._lock:
+            if not self._cancelled.is_set():
+                key = self._next_callback
+                self._next_callback += 1
+                self._callbacks[key] = callback
+                return lambda: self._callbacks.pop(key, None)
+        callback()
+        return lambda: None
+
+    def check(self, stage: str, *, needs_s: float = 0.0) -> None:
+        if self._cancelled.is_set():
+            reason = self.reason or "cancelled"
+        else:
+            remaining = self.remaining()
+            if remaining is None or (remaining > 0 and remaining >= needs_s):
+                return
+            reason = "deadline"
+        if self.counted:
+            metrics.inc("novel_flow_cancelled_stages_total", stage=stage, reason=reason)
+        raise RequestCancelled(reason, stage)
+
+
+current_deadline: ContextVar[Deadline | None] = ContextVar("current_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(deadline: Deadline) -> Iterator[Deadline]:
+    token = current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        current_deadline.reset(token)
+
+
+def check_deadline(stage: str, *, needs_s: float = 0.0) -> None:
+    deadline = current_deadline.get()
+    if deadline is not None:
+        deadline.check(stage, needs_s=needs_s)
+
+
+def remaining_s() -> float | None:
+    deadline = current_deadline.get()
+    return None if deadline is None else deadline.remaining()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    percentile: float = 95.0
+    budget: float = 0.05
+    burst: float = 2.0
+    min_samples: int = 20
+    window: int = 200
+    min_delay_s: float = 0.05
+    max_workers: int = 64
+
+    @classmethod
+    def parse(cls, spec: str) -> HedgePolicy:
+        percentile, _, budget = spec.strip().lower().removeprefix("p").partition(",")
+        try:
+            policy = cls(percentile=float(percentile), **({"budget": float(budget)} if budget else {}))
+        except ValueError as exc:
+            raise ValueError(f"Invalid hedge policy {spec!r}; expected <percentile>[,<budget>]") from exc
+        if not 0 < policy.percentile < 100 or not 0 <= policy.budget <= 1:
+            raise ValueError(f"Invalid hedge policy {spec!r}; expected 0 < percentile < 100 and 0 <= budget <= 1")
+        return policy
+
+
+class LatencyWindow:
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._samples: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, key: str, latency_s: float) -> None:
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.size)
+            samples.append(latency_s)
+
+    def percentile(self, key: str, percentile: float, *, min_samples: int) -> float | None:
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[max(0, math.ceil(percentile / 100 * len(samples)) - 1)]
+
+
+class HedgeBudget:
+    def __init__(self, ratio: float, burst: float) -> None:
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst if ratio > 0 else 0.0
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+from typing import Any, get_args, get_origin
+
+from pydantic import BaseModel, ValidationError
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def strip_code_fences(raw: str) -> str:
+    text = raw.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    start = min((idx for idx in (text.find("{"), text.find("[")) if idx != -1), default=-1)
+    return text[start:] if start > 0 else text
+
+
+def repair_text(raw: str) -> str | None:
+    text = strip_code_fences(raw)
+    out: list[str] = []
+    stack: list[str] = []
+    in_string = False
+    escaped = False
+    for char in text:
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+        elif char in "}]":
+            _drop_trailing_comma(out)
+            if not stack or stack.pop() != char:
+                return None
+            out.append(char)
+            if not stack:
+                break
+            continue
+        out.append(char)
+
+    if in_string or stack:
+        return None
+    return "".join(out)
+
+
+def _drop_trailing_comma(out: list[str]) -> None:
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+
+def conform_to_model(data: Any, model: type[BaseModel]) -> Any:
+    if not isinstance(data, dict):
+        return data
+    result: dict[str, Any] = {}
+    for name, field in model.model_fields.items():
+        if name not in data:
+            continue
+        value = data[name]
+        if value is None and not field.is_required():
+            continue
+        result[name] = _conform_value(value, field.annotation)
+    if model.model_config.get("extra") != "forbid":
+        result.update({key: value for key, value in data.items() if key not in model.model_fields})
+    return result
+
+
+def _conform_value(value: Any, annotation: Any) -> Any:
+    if get_origin(annotation) is list:
+        item_type = (get_args(annotation) or (Any,))[0]
+        items = value if isinstance(value, list) else [value]
+        return [_conform_value(item, item_type) for item in items]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return conform_to_model(value, annotation)
+    return value
+
+
+def repair_json(raw: str, model: type[BaseModel]) -> dict[str, Any] | None:
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError:
+        text = repair_text(raw)
+        if text is None:
+            return None
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+    try:
+        return model.model_validate(conform_to_model(data, model)).model_dump(mode="json")
+    except ValidationError:
+        return None
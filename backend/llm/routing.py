@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+
+MODEL_PRICES_PER_1M: dict[str, tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+
+CACHED_INPUT_DISCOUNT = 0.5
+
+
+@dataclass(frozen=True)
+class Route:
+    model_name: str | None = None
+    timeout_s: int | None = None
+    max_tokens: int | None = None
+    speculative_model: str | None = None
+
+    def resolve(self, *, model_name: str, timeout_s: int) -> Route:
+        return replace(
+            self,
+            model_name=self.model_name or model_name,
+            timeout_s=self.timeout_s or timeout_s,
+        )
+
+
+DEFAULT_ROUTES: dict[str, Route] = {
+    "RequirementSpec": Route(timeout_s=20, max_tokens=800),
+    "ExpansionResult": Route(timeout_s=20, max_tokens=800),
+    "OutlineLite": Route(timeout_s=30, max_tokens=1200),
+    "StoryBible": Route(timeout_s=90, max_tokens=6000),
+    "OutlineFull": Route(timeout_s=120, max_tokens=12000),
+}
+
+
+@dataclass
+class RouteStats:
+    calls: int = 0
+    errors: int = 0
+    latency_s: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost_usd: float = 0.0
+
+    @property
+    def mean_latency_s(self) -> float:
+        return self.latency_s / self.calls if self.calls else 0.0
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def estimate_cost(model_name: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    input_price, output_price = MODEL_PRICES_PER_1M.get(model_name, (0.0, 0.0))
+    uncached_tokens = prompt_tokens - cached_tokens
+    return (
+        uncached_tokens * input_price + cached_tokens * input_price * CACHED_INPUT_DISCOUNT + completion_tokens * output_price
+    ) / 1_000_000
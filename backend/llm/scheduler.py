@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from backend.llm.deadline import check_deadline, current_deadline
+from backend.observability.metrics import current_session_id, metrics
+
+PRIORITY_CLASSES = ("interactive", "background", "bulk")
+
+current_priority: ContextVar[str] = ContextVar("current_priority", default="interactive")
+
+
+@contextmanager
+def priority_scope(priority: str) -> Iterator[None]:
+    if priority not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority class: {priority}")
+    token = current_priority.set(priority)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+class SchedulerRejected(RuntimeError):
+    def __init__(self, priority: str, queued: int) -> None:
+        super().__init__(f"LLM scheduler queue for {priority} work is full ({queued} waiting)")
+        self.priority = priority
+
+
+@dataclass(frozen=True)
+class SchedulerPolicy:
+    concurrency: int = 16
+    weights: dict[str, float] = field(default_factory=lambda: {"interactive": 8.0, "background": 2.0, "bulk": 1.0})
+    max_share: dict[str, float] = field(default_factory=lambda: {"interactive": 1.0, "background": 0.75, "bulk": 0.5})
+    max_queued: dict[str, int] = field(default_factory=lambda: {"interactive": 256, "background": 256, "bulk": 4096})
+
+    def limit(self, priority: str) -> int:
+        return max(1, int(self.concurrency * self.max_share.get(priority, 1.0)))
+
+
+class _Ticket:
+    __slots__ = ("priority", "session_id", "enqueued_at", "granted", "wake")
+
+    def __init__(self, priority: str, session_id: str) -> None:
+        self.priority = priority
+        self.session_id = session_id
+        self.enqueued_at = time.perf_counter()
+        self.granted = False
+        self.wake = threading.Event()
+
+
+class LLMScheduler:
+    def __init__(self, policy: SchedulerPolicy | None = None) -> None:
+        self.policy = policy or SchedulerPolicy()
+        self._queues: dict[str, OrderedDict[str, deque[_Ticket]]] = {name: OrderedDict() for name in PRIORITY_CLASSES}
+        self._queued: Counter[str] = Counter()
+        self._in_flight: Counter[str] = Counter()
+        self._finish: dict[str, float] = dict.fromkeys(PRIORITY_CLASSES, 0.0)
+        self._virtual_now = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, priority: str | None = None, session_id: str | None = None) -> Iterator[None]:
+        ticket = self._enqueue(priority or current_priority.get(), session_id or current_session_id.get() or "")
+        self._await(ticket)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight[ticket.priority] -= 1
+                self._dispatch()
+
+    def queue_depths(self) -> dict[str, float]:
+        with self._lock:
+            return {name: self._queued[name] for name in PRIORITY_CLASSES}
+
+    def in_flight(self) -> dict[str, float]:
+        with self._lock:
+            return {name: self._in_flight[name] for name in PRIORITY_CLASSES}
+
+    def _enqueue(self, priority: str, session_id: str) -> _Ticket:
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class: {priority}")
+        with self._lock:
+            queued = self._queued[priority]
+            if queued >= self.policy.max_queued.get(priority, queued + 1):
+                metrics.inc("novel_flow_llm_scheduler_rejected_total", priority=priority)
+                raise SchedulerRejected(priority, queued)
+            if not queued:
+                self._finish[priority] = max(self._finish[priority], self._virtual_now)
+            ticket = _Ticket(priority, session_id)
+            self._queues[priority].setdefault(session_id, deque()).append(ticket)
+            self._queued[priority] += 1
+            self._dispatch()
+        return ticket
+
+    def _dispatch(self) -> None:
+        while sum(self._in_flight.values()) < self.policy.concurrency:
+            ready = [
+                name
+                for name in PRIORITY_CLASSES
+                if self._queued[name] and self._in_flight[name] < self.policy.limit(name)
+            ]
+            if not ready:
+                return
+            priority = min(ready, key=lambda name: self._finish[name])
+            sessions = self._queues[priority]
+            session_id, tickets = next(iter(sessions.items()))
+            ticket = tickets.popleft()
+            if tickets:
+                sessions.move_to_end(session_id)
+            else:
+                del sessions[session_id]
+            self._queued[priority] -= 1
+            self._in_flight[priority] += 1
+            self._virtual_now = self._finish[priority]
+            self._finish[priority] += 1.0 / self.policy.weights.get(priority, 1.0)
+            ticket.granted = True
+            ticket.wake.set()
+
+    def _await(self, ticket: _Ticket) -> None:
+        deadline = current_deadline.get()
+        unregister = deadline.on_cancel(ticket.wake.set) if deadline is not None else None
+        try:
+            while True:
+                remaining = deadline.remaining() if deadline is not None else None
+                ticket.wake.wait(None if remaining is None else max(0.0, remaining))
+                with self._lock:
+                    if ticket.granted:
+                        return
+                    ticket.wake.clear()
+                    abandon = deadline is not None and (deadline.cancelled() or deadline.expired())
+                    if abandon:
+                        self._remove(ticket)
+                if abandon:
+                    check_deadline("llm.queue")
+        finally:
+            if unregister is not None:
+                unregister()
+            metrics.observe(
+                "novel_flow_llm_queue_wait_seconds", time.perf_counter() - ticket.enqueued_at, priority=ticket.priority
+            )
+
+    def _remove(self, ticket: _Ticket) -> None:
+        sessions = self._queues[ticket.priority]
+        tickets = sessions.get(ticket.session_id)
+        if tickets is not None and ticket in tickets:
+            tickets.remove(ticket)
+            if not tickets:
+                del sessions[ticket.session_id]
+            self._queued[ticket.priority] -= 1
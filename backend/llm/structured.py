@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from typing import Any
+
+from pydantic import BaseModel
+
+from backend.graph.schemas import SCHEMA_MODELS
+
+_DROPPED_KEYWORDS = {"default"}
+_NAMED_CHILDREN = {"properties", "$defs"}
+
+
+def strict_json_schema(model: type[BaseModel]) -> dict[str, Any]:
+    return _strictify(model.model_json_schema())
+
+
+def _strictify(node: Any) -> Any:
+    if isinstance(node, list):
+        return [_strictify(item) for item in node]
+    if not isinstance(node, dict):
+        return node
+
+    result: dict[str, Any] = {}
+    for key, value in node.items():
+        if key in _DROPPED_KEYWORDS:
+            continue
+        if key in _NAMED_CHILDREN and isinstance(value, dict):
+            result[key] = {name: _strictify(child) for name, child in value.items()}
+        else:
+            result[key] = _strictify(value)
+    if result.get("type") == "object" and "properties" in result:
+        result["required"] = list(result["properties"])
+        result["additionalProperties"] = False
+    return result
+
+
+class _SchemaCache(dict[str, dict[str, Any]]):
+    def __missing__(self, schema_name: str) -> dict[str, Any]:
+        schema = self[schema_name] = strict_json_schema(SCHEMA_MODELS[schema_name])
+        return schema
+
+
+STRUCTURED_SCHEMAS: dict[str, dict[str, Any]] = _SchemaCache()
+
+
+def precompute_schemas() -> None:
+    for schema_name in SCHEMA_MODELS:
+        STRUCTURED_SCHEMAS[schema_name]
+
+
+def response_format_for(schema_name: str) -> dict[str, Any]:
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": schema_name,
+            "strict": True,
+            "schema": STRUCTURED_SCHEMAS[schema_name],
+        },
+    }
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from backend.observability.tracing import HistogramRegistry, tracer
+
+current_session_id: ContextVar[str | None] = ContextVar("current_session_id", default=None)
+current_usage_sinks: ContextVar[tuple[SessionUsage, ...]] = ContextVar("current_usage_sinks", default=())
+
+
+@contextmanager
+def session_scope(session_id: str) -> Iterator[None]:
+    token = current_session_id.set(session_id)
+    try:
+        yield
+    finally:
+        current_session_id.reset(token)
+
+
+@contextmanager
+def usage_scope() -> Iterator[SessionUsage]:
+    usage = SessionUsage()
+    token = current_usage_sinks.set((*current_usage_sinks.get(), usage))
+    try:
+        yield usage
+    finally:
+        current_usage_sinks.reset(token)
+
+
+@dataclass
+class SessionUsage:
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost_usd: float = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+class MetricsRegistry:
+    def __init__(self, *, max_sessions: int = 10_000) -> None:
+        self.max_sessions = max_sessions
+        self.histograms = HistogramRegistry()
+        self._counters: dict[tuple[str, tuple[tuple[str, str], ...]], float] = {}
+        self._gauges: dict[tuple[str, tuple[tuple[str, str], ...]], float] = {}
+        self._gauge_callbacks: dict[str, tuple[str, Callable[[], dict[str, float]]]] = {}
+        self._sessions: OrderedDict[str, SessionUsage] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def add_gauge(self, name: str, delta: float, **labels: Any) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0.0) + delta
+
+    def register_gauge(self, name: str, label: str, callback: Callable[[], dict[str, float]]) -> None:
+        self._gauge_callbacks[name] = (label, callback)
+
+    def counter(self, name: str, **labels: Any) -> float:
+        return self._counters.get((name, _labels(labels)), 0.0)
+
+    def gauge(self, name: str, **labels: Any) -> float:
+        return self._gauges.get((name, _labels(labels)), 0.0)
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        self.histograms.observe(name, value, labels)
+
+    def record_llm_generation(
+        self,
+        *,
+        schema: str,
+        model: str,
+        outcome: str,
+        calls: int,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cached_tokens: int,
+        cost_usd: float,
+    ) -> None:
+        labels = {"schema": schema, "model": model, "outcome": outcome}
+        self.inc("novel_flow_llm_generations_total", **labels)
+        self.inc("novel_flow_llm_calls_total", calls, **labels)
+        self.inc("novel_flow_llm_tokens_total", prompt_tokens, kind="prompt", **labels)
+        self.inc("novel_flow_llm_tokens_total", completion_tokens, kind="completion", **labels)
+        self.inc("novel_flow_llm_tokens_total", cached_tokens, kind="cached", **labels)
+        self.inc("novel_flow_llm_cost_usd_total", cost_usd, **labels)
+
+        session_id = current_session_id.get()
+        sinks = current_usage_sinks.get()
+        if session_id is None and not sinks:
+            return
+        with self._lock:
+            for sink in sinks:
+                sink.calls += calls
+                sink.prompt_tokens += prompt_tokens
+                sink.completion_tokens += completion_tokens
+                sink.cached_tokens += cached_tokens
+                sink.cost_usd += cost_usd
+            if session_id is None:
+                return
+            usage = self._sessions.pop(session_id, None) or SessionUsage()
+            usage.calls += calls
+            usage.prompt_tokens += prompt_tokens
+            usage.completion_tokens += completion_tokens
+            usage.cached_tokens += cached_tokens
+            usage.cost_usd += cost_usd
+            self._sessions[session_id] = usage
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def session_usage(self, session_id: str) -> SessionUsage | None:
+        return self._sessions.get(session_id)
+
+    def top_sessions(self, limit: int = 10) -> list[dict[str, Any]]:
+        with self._lock:
+            ranked = sorted(
+                self._sessions.items(), key=lambda item: (item[1].cost_usd, item[1].total_tokens), reverse=True
+            )
+        return [
+            {"session_id": session_id, **asdict(usage), "total_tokens": usage.total_tokens}
+            for session_id, usage in ranked[:limit]
+        ]
+
+    def render(self) -> str:
+        lines: list[str] = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+        _render_samples(lines, "counter", counters)
+        callback_gauges = [
+            ((name, ((label, key),)), value)
+            for name, (label, callback) in sorted(self._gauge_callbacks.items())
+            for key, value in sorted(callback().items())
+        ]
+        _render_samples(lines, "gauge", gauges + callback_gauges)
+        _render_histograms(lines, self.histograms, "")
+        if tracer.enabled:
+            _render_histograms(lines, tracer.registry, "novel_flow_span_duration_seconds", label_name="span")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: dict[str, Any]) -> tuple[tuple[str, str], ...]:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...] | dict[str, str]) -> str:
+    items = list(labels.items() if isinstance(labels, dict) else labels)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in items) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _render_samples(
+    lines: list[str], kind: str, samples: list[tuple[tuple[str, tuple[tuple[str, str], ...]], float]]
+) -> None:
+    seen: set[str] = set()
+    for (name, labels), value in samples:
+        if name not in seen:
+            lines.append(f"# TYPE {name} {kind}")
+            seen.add(name)
+        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+
+def _render_histograms(lines: list[str], registry: HistogramRegistry, fixed_name: str, label_name: str = "") -> None:
+    seen: set[str] = set()
+    for name, labels, histogram in registry.items():
+        metric = fixed_name or name
+        if label_name:
+            labels = {label_name: name, **labels}
+        if metric not in seen:
+            lines.append(f"# TYPE {metric} histogram")
+            seen.add(metric)
+        for bound, count in histogram.cumulative():
+            lines.append(f"{metric}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {count}")
+        lines.append(f"{metric}_sum{_format_labels(labels)} {histogram.sum!r}")
+        lines.append(f"{metric}_count{_format_labels(labels)} {histogram.count}")
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import functools
+import importlib.util
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+DEFAULT_BUCKETS_S: tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+LabelKey = tuple[tuple[str, str], ...]
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS_S) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def cumulative(self) -> Iterator[tuple[float, int]]:
+        seen = 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            seen += count
+            yield bound, seen
+
+
+class HistogramRegistry:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS_S) -> None:
+        self.buckets = buckets
+        self._histograms: dict[tuple[str, LabelKey], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, labels: dict[str, Any] | None = None) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def get(self, name: str, **labels: Any) -> Histogram | None:
+        return self._histograms.get((name, _label_key(labels)))
+
+    def items(self) -> list[tuple[str, dict[str, str], Histogram]]:
+        with self._lock:
+            return [(name, dict(labels), histogram) for (name, labels), histogram in sorted(self._histograms.items())]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+def _label_key(labels: dict[str, Any] | None) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in (labels or {}).items()))
+
+
+@dataclass
+class SpanRecord:
+    name: str
+    duration_s: float
+    labels: dict[str, Any]
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+
+class Span:
+    __slots__ = ("tracer", "name", "labels", "attributes", "_started", "_otel_cm", "_otel_span")
+
+    def __init__(self, tracer: Tracer, name: str, labels: dict[str, Any]) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.labels = labels
+        self.attributes: dict[str, Any] = {}
+        self._otel_cm: Any = None
+        self._otel_span: Any = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+        if self._otel_span is not None:
+            self._otel_span.set_attribute(key, value)
+
+    def __enter__(self) -> Span:
+        if self.tracer.otel_tracer is not None:
+            self._otel_cm = self.tracer.otel_tracer.start_as_current_span(
+                self.name, attributes={key: str(value) for key, value in self.labels.items()}
+            )
+            self._otel_span = self._otel_cm.__enter__()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        duration = time.perf_counter() - self._started
+        status = "ok" if exc_type is None else "error"
+        self.tracer.registry.observe(self.name, duration, {**self.labels, "status": status})
+        self.tracer.recent.append(
+            SpanRecord(
+                name=self.name,
+                duration_s=duration,
+                labels=self.labels,
+                attributes=self.attributes,
+                error=None if exc is None else f"{exc_type.__name__}: {exc}",
+            )
+        )
+        if self._otel_cm is not None:
+            self._otel_cm.__exit__(exc_type, exc, tb)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> _NoopSpan:
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    def __init__(self, registry: HistogramRegistry | None = None, *, recent_limit: int = 512) -> None:
+        self.enabled = False
+        self.registry = registry or HistogramRegistry()
+        self.recent: deque[SpanRecord] = deque(maxlen=recent_limit)
+        self.otel_tracer: Any = None
+
+    def configure(self, *, enabled: bool = True, otel: bool = False) -> None:
+        self.enabled = enabled
+        self.otel_tracer = None
+        if enabled and otel:
+            if importlib.util.find_spec("opentelemetry") is None:
+                raise RuntimeError("OpenTelemetry export requested but opentelemetry-api is not installed")
+            from opentelemetry import trace
+
+            self.otel_tracer = trace.get_tracer("novel_flow")
+
+    def span(self, name: str, **labels: Any) -> Span | _NoopSpan:
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, labels)
+
+
+tracer = Tracer()
+
+
+def configure_from_env(value: str | None) -> None:
+    if value:
+        tracer.configure(enabled=value.lower() not in {"0", "false", "off"}, otel=value.lower() == "otel")
+
+
+def traced(name: str, fn: F) -> F:
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if not tracer.enabled:
+            return fn(*args, **kwargs)
+        with tracer.span(name):
+            return fn(*args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
+
+from backend.observability.metrics import metrics
+from backend.storage.sqlite import SessionsRepo
+
+if TYPE_CHECKING:
+    from backend.storage.dedup import RequirementIndex
+
+DEFAULT_ARCHIVE_TTLS = {
+    "NEW": timedelta(days=7),
+    "NEEDS_CONFIRMATION": timedelta(days=30),
+    "APPROVED": timedelta(days=180),
+}
+TTL_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+TTL_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)([smhd])$")
+
+
+def parse_ttls(spec: str) -> dict[str, timedelta]:
+    if spec.strip().lower() in {"1", "default", "on"}:
+        return dict(DEFAULT_ARCHIVE_TTLS)
+    ttls = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        status, _, ttl = item.partition("=")
+        match = TTL_PATTERN.match(ttl.strip())
+        if not status or match is None:
+            raise ValueError(f"Invalid archive TTL {item!r}; expected STATUS=<number><s|m|h|d>")
+        ttls[status.strip().upper()] = timedelta(**{TTL_UNITS[match.group(2)]: float(match.group(1))})
+    return ttls
+
+
+@dataclass(frozen=True)
+class ArchivePolicy:
+    ttls: dict[str, timedelta] = field(default_factory=lambda: dict(DEFAULT_ARCHIVE_TTLS))
+    batch_size: int = 200
+    interval_s: float = 5.0
+    vacuum_pages: int = 256
+
+
+class Archiver:
+    def __init__(
+        self,
+        repo: SessionsRepo,
+        policy: ArchivePolicy,
+        *,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+        requirements: RequirementIndex | None = None,
+    ) -> None:
+        self.repo = repo
+        self.policy = policy
+        self.clock = clock
+        self.requirements = requirements
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def cutoffs(self) -> dict[str, str]:
+        now = self.clock()
+        return {status: (now - ttl).strftime("%Y-%m-%d %H:%M:%S") for status, ttl in self.policy.ttls.items()}
+
+    def run_once(self) -> dict[str, int]:
+        archived = self.repo.archive_sessions(self.cutoffs(), limit=self.policy.batch_size)
+        for status, session_ids in archived.items():
+            metrics.inc("novel_flow_archived_sessions_total", len(session_ids), status=status)
+        session_ids = [session_id for ids in archived.values() for session_id in ids]
+        if self.requirements is not None:
+            self.requirements.remove(session_ids)
+        vacuumed = self.repo.incremental_vacuum(self.policy.vacuum_pages)
+        metrics.inc("novel_flow_archive_vacuumed_pages_total", vacuumed)
+        return {"archived": len(session_ids), "vacuumed_pages": vacuumed}
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="session-archiver", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.policy.interval_s + 5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.policy.interval_s):
+            try:
+                self.run_once()
+            except sqlite3.OperationalError:
+                metrics.inc("novel_flow_archive_errors_total")
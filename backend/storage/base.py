@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+from backend.storage.coordination import FileLease
+
+JSON_COLUMNS = ("spec_json", "proposal_json", "bible_json", "outline_full_json", "outline_index_json")
+SESSION_COLUMNS = (
+    "session_id",
+    "requirement_text",
+    *JSON_COLUMNS,
+    "status",
+    "version",
+    "bible_version",
+    "outline_version",
+    "last_user_action",
+    "edit_text",
+    "revision",
+    "created_at",
+    "updated_at",
+)
+SUMMARY_COLUMNS = ("session_id", "status", "version", "created_at", "updated_at")
+VALIDATOR_COLUMNS = ("session_id", "status", "version", "revision", "bible_version", "outline_version", "updated_at")
+UPDATABLE_COLUMNS = frozenset(SESSION_COLUMNS) - {"session_id", "revision", "created_at", "updated_at"}
+POSTGRES_SCHEMES = ("postgresql://", "postgres://")
+LISTING_INDEXES = {
+    "idx_sessions_updated": "(updated_at, session_id, status, version, created_at)",
+    "idx_sessions_status_updated": "(status, updated_at, session_id, version, created_at)",
+}
+
+
+class SessionConflict(RuntimeError):
+    def __init__(self, session_id: str, expected_revision: int, actual_revision: int | None) -> None:
+        super().__init__(
+            f"Session {session_id} changed concurrently (expected revision {expected_revision}, found {actual_revision})"
+        )
+        self.session_id = session_id
+        self.expected_revision = expected_revision
+        self.actual_revision = actual_revision
+
+
+@dataclass(frozen=True)
+class SessionFilter:
+    status: str | None = None
+    updated_after: str | None = None
+    updated_before: str | None = None
+    version: int | None = None
+
+
+class SessionStore(Protocol):
+    def create_session(self, text: str) -> str: ...
+
+    def get_session(self, session_id: str) -> dict[str, Any] | None: ...
+
+    def get_revision(self, session_id: str) -> int | None: ...
+
+    def get_projection(self, session_id: str, documents: tuple[str, ...] = ()) -> dict[str, Any] | None: ...
+
+    def update_session(
+        self, session_id: str, *, expected_revision: int | None = None, **fields: Any
+    ) -> dict[str, Any] | None: ...
+
+    def list_sessions(
+        self, *, limit: int = 50, filters: SessionFilter | None = None, after: tuple[str, str] | None = None
+    ) -> list[dict[str, Any]]: ...
+
+    def save_plan(
+        self,
+        session_id: str,
+        *,
+        bible_json: dict[str, Any],
+        outline_full_json: dict[str, Any],
+        bump: bool,
+        outline_index_json: dict[str, Any] | None = None,
+        expected_revision: int | None = None,
+    ) -> dict[str, Any] | None: ...
+
+    def save_draft(
+        self, session_id: str, *, outline_version: int, draft_json: dict[str, Any], tokens: int
+    ) -> None: ...
+
+    def list_requirements(self, *, status: str, after: str | None = None, limit: int) -> list[dict[str, Any]]: ...
+
+    def list_drafts(self, session_id: str, *, outline_version: int) -> list[dict[str, Any]]: ...
+
+    def carry_drafts(
+        self, session_id: str, *, from_version: int, to_version: int, chapter_indexes: list[int]
+    ) -> int: ...
+
+    def pool_stats(self) -> dict[str, float]: ...
+
+    def checkpointer(self) -> Any: ...
+
+
+def check_columns(fields: dict[str, Any]) -> None:
+    unknown = set(fields) - UPDATABLE_COLUMNS
+    if unknown:
+        raise ValueError(f"Unknown session columns: {', '.join(sorted(unknown))}")
+
+
+def check_documents(documents: tuple[str, ...]) -> None:
+    unknown = set(documents) - set(JSON_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown document columns: {', '.join(sorted(unknown))}")
+
+
+def listing_where(
+    filters: SessionFilter | None, after: tuple[str, str] | None, *, param: str, timestamp: str
+) -> tuple[str, list[Any]]:
+    filters = filters or SessionFilter()
+    clauses: list[str] = []
+    params: list[Any] = []
+    if filters.status is not None:
+        clauses.append(f"status = {param}")
+        params.append(filters.status)
+    if filters.updated_after is not None:
+        clauses.append(f"updated_at >= {timestamp}")
+        params.append(filters.updated_after)
+    if filters.updated_before is not None:
+        clauses.append(f"updated_at < {timestamp}")
+        params.append(filters.updated_before)
+    if filters.version is not None:
+        clauses.append(f"version = {param}")
+        params.append(filters.version)
+    if after is not None:
+        clauses.append(f"(updated_at, session_id) < ({timestamp}, {param})")
+        params.extend(after)
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+def encode_cursor(row: dict[str, Any]) -> str:
+    raw = json.dumps([row["updated_at"], row["session_id"]], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        updated_at, session_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(updated_at, str) or not isinstance(session_id, str):
+        raise ValueError("Invalid cursor")
+    return updated_at, session_id
+
+
+def open_store(url: str, *, write_lease: FileLease | None = None) -> SessionStore:
+    if url.startswith(POSTGRES_SCHEMES):
+        from backend.storage.postgres import PostgresSessionsRepo
+
+        return PostgresSessionsRepo(url)
+    from backend.storage.sqlite import SessionsRepo
+
+    return SessionsRepo(url, write_lease=write_lease)
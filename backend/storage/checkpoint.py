@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import random
+from collections.abc import Iterator, Sequence
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from backend.graph import schemas
+from backend.storage.sqlite import SessionsRepo
+
+ALLOWED_STATE_TYPES = [
+    ("backend.graph.schemas", name)
+    for name in dir(schemas)
+    if isinstance(getattr(schemas, name), type) and getattr(schemas, name).__module__ == schemas.__name__
+]
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver[str]):
+    def __init__(self, repo: SessionsRepo) -> None:
+        super().__init__(serde=JsonPlusSerializer(allowed_msgpack_modules=ALLOWED_STATE_TYPES))
+        self.repo = repo
+        self._init_db()
+
+    def _init_db(self) -> None:
+        with self.repo._connect(write=True) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS graph_checkpoints (
+                    thread_id TEXT NOT NULL,
+                    checkpoint_ns TEXT NOT NULL DEFAULT '',
+                    checkpoint_id TEXT NOT NULL,
+                    parent_checkpoint_id TEXT,
+                    checkpoint_type TEXT NOT NULL,
+                    checkpoint BLOB NOT NULL,
+                    metadata_type TEXT NOT NULL,
+                    metadata BLOB NOT NULL,
+                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS graph_writes (
+                    thread_id TEXT NOT NULL,
+                    checkpoint_ns TEXT NOT NULL DEFAULT '',
+                    checkpoint_id TEXT NOT NULL,
+                    task_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    channel TEXT NOT NULL,
+                    value_type TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    task_path TEXT NOT NULL DEFAULT '',
+                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+                )
+                """
+            )
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return next(self.list(config, limit=1), None)
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        clauses: list[str] = []
+        params: list[Any] = []
+        if config is not None:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = f"SELECT * FROM graph_checkpoints {where} ORDER BY checkpoint_id DESC"
+        if limit is not None and not filter:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        tuples: list[CheckpointTuple] = []
+        with self.repo._connect() as conn:
+            for row in conn.execute(query, params):
+                metadata = self.serde.loads_typed((row["metadata_type"], row["metadata"]))
+                if filter and not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+                if limit is not None and len(tuples) >= limit:
+                    break
+                writes = conn.execute(
+                    """
+                    SELECT task_id, channel, value_type, value FROM graph_writes
+                    WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?
+                    ORDER BY task_path, task_id, idx
+                    """,
+                    (row["thread_id"], row["checkpoint_ns"], row["checkpoint_id"]),
+                ).fetchall()
+                tuples.append(self._tuple(row, metadata, writes))
+        yield from tuples
+
+    def _tuple(self, row: Any, metadata: CheckpointMetadata, writes: Sequence[Any]) -> CheckpointTuple:
+        def config_for(checkpoint_id: str) -> RunnableConfig:
+            return {
+                "configurable": {
+                    "thread_id": row["thread_id"],
+                    "checkpoint_ns": row["checkpoint_ns"],
+                    "checkpoint_id": checkpoint_id,
+                }
+            }
+
+        return CheckpointTuple(
+            config=config_for(row["checkpoint_id"]),
+            checkpoint=self.serde.loads_typed((row["checkpoint_type"], row["checkpoint"])),
+            metadata=metadata,
+            parent_config=config_for(row["parent_checkpoint_id"]) if row["parent_checkpoint_id"] else None,
+            pending_writes=[
+                (write["task_id"], write["channel"], self.serde.loads_typed((write["value_type"], write["value"])))
+                for write in writes
+            ],
+        )
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_type, checkpoint_blob = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_blob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self.repo._connect(write=True) as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO graph_checkpoints (
+                    thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,
+                    checkpoint_type, checkpoint, metadata_type, metadata
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    checkpoint_type,
+                    checkpoint_blob,
+                    metadata_type,
+                    metadata_blob,
+                ),
+            )
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        configurable = config["configurable"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            value_type, value_blob = self.serde.dumps_typed(value)
+            rows.append(
+                (
+                    configurable["thread_id"],
+                    configurable.get("checkpoint_ns", ""),
+                    configurable["checkpoint_id"],
+                    task_id,
+                    WRITES_IDX_MAP.get(channel, idx),
+                    channel,
+                    value_type,
+                    value_blob,
+                    task_path,
+                )
+            )
+        verb = "INSERT OR REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "INSERT OR IGNORE"
+        with self.repo._connect(write=True) as conn:
+            conn.executemany(
+                f"""
+                {verb} INTO graph_writes (
+                    thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, value_type, value, task_path
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self.repo._connect(write=True) as conn:
+            conn.execute("DELETE FROM graph_checkpoints WHERE thread_id = ?", (thread_id,))
+            conn.execute("DELETE FROM graph_writes WHERE thread_id = ?", (thread_id,))
+
+    def prune_thread(self, thread_id: str) -> None:
+        with self.repo._connect(write=True) as conn:
+            latest = conn.execute(
+                "SELECT MAX(checkpoint_id) FROM graph_checkpoints WHERE thread_id = ?", (thread_id,)
+            ).fetchone()[0]
+            if latest is None:
+                return
+            conn.execute(
+                "DELETE FROM graph_checkpoints WHERE thread_id = ? AND checkpoint_id != ?", (thread_id, latest)
+            )
+            conn.execute("DELETE FROM graph_writes WHERE thread_id = ? AND checkpoint_id != ?", (thread_id, latest))
+            conn.execute(
+                "UPDATE graph_checkpoints SET parent_checkpoint_id = NULL WHERE thread_id = ?", (thread_id,)
+            )
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+SINGLE_FLIGHT_STRIPES = 1024
+
+
+class FileLease:
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.acquired = 0
+        self.contended = 0
+        self.wait_s = 0.0
+        self._stats_lock = threading.Lock()
+
+    @contextmanager
+    def hold(self) -> Iterator[bool]:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            started = time.perf_counter()
+            waited = False
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                waited = True
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            with self._stats_lock:
+                self.acquired += 1
+                self.contended += int(waited)
+                self.wait_s += time.perf_counter() - started
+            try:
+                yield waited
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def stats(self) -> dict[str, float]:
+        with self._stats_lock:
+            return {"acquired": self.acquired, "contended": self.contended, "wait_seconds": self.wait_s}
+
+
+class SingleFlight:
+    def __init__(self, directory: str | Path, *, stripes: int = SINGLE_FLIGHT_STRIPES) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.stripes = stripes
+        self._leases: dict[int, FileLease] = {}
+        self._lock = threading.Lock()
+
+    def lease(self, key: str) -> FileLease:
+        stripe = int.from_bytes(hashlib.sha256(key.encode("utf-8")).digest()[:8], "big") % self.stripes
+        with self._lock:
+            lease = self._leases.get(stripe)
+            if lease is None:
+                lease = self._leases[stripe] = FileLease(self.directory / f"{stripe:04d}.lock")
+            return lease
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[bool]:
+        with self.lease(key).hold() as waited:
+            yield waited
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            leases = list(self._leases.values())
+        totals = {"acquired": 0.0, "contended": 0.0, "wait_seconds": 0.0}
+        for lease in leases:
+            for key, value in lease.stats().items():
+                totals[key] += value
+        return totals
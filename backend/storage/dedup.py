@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import hashlib
+import random
+import re
+import sqlite3
+import unicodedata
+from array import array
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from backend.observability.metrics import metrics
+from backend.observability.tracing import tracer
+from backend.storage.coordination import FileLease
+
+if TYPE_CHECKING:
+    from backend.storage.base import SessionStore
+
+MERSENNE_PRIME = (1 << 61) - 1
+DEDUP_MODES = ("suggest", "auto")
+WORD = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class DedupPolicy:
+    mode: str = "suggest"
+    threshold: float = 0.7
+    num_perm: int = 64
+    bands: int = 16
+    shingle_words: int = 3
+    max_candidates: int = 50
+
+    @classmethod
+    def parse(cls, spec: str) -> DedupPolicy:
+        mode, _, threshold = spec.strip().lower().partition(",")
+        try:
+            policy = cls(mode=mode, **({"threshold": float(threshold)} if threshold else {}))
+        except ValueError as exc:
+            raise ValueError(f"Invalid dedup policy {spec!r}; expected <suggest|auto>[,<threshold>]") from exc
+        if policy.mode not in DEDUP_MODES or not 0 < policy.threshold <= 1:
+            raise ValueError(f"Invalid dedup policy {spec!r}; expected 0 < threshold <= 1 and mode suggest or auto")
+        return policy
+
+
+def normalize_requirement(text: str) -> list[str]:
+    return WORD.findall(unicodedata.normalize("NFKC", text).casefold())
+
+
+def shingles(text: str, size: int) -> set[bytes]:
+    words = normalize_requirement(text)
+    if len(words) <= size:
+        return {" ".join(words).encode("utf-8")} if words else set()
+    return {" ".join(words[idx : idx + size]).encode("utf-8") for idx in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm: int, *, seed: int = 1) -> None:
+        rng = random.Random(seed)
+        self.permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME)) for _ in range(num_perm)
+        ]
+
+    def signature(self, items: set[bytes]) -> tuple[int, ...]:
+        hashes = [int.from_bytes(hashlib.blake2b(item, digest_size=8).digest(), "little") for item in items]
+        return tuple(min((a * value + b) % MERSENNE_PRIME for value in hashes) for a, b in self.permutations)
+
+
+def similarity(left: Sequence[int], right: Sequence[int]) -> float:
+    return sum(a == b for a, b in zip(left, right)) / len(left) if left else 0.0
+
+
+def band_buckets(signature: Sequence[int], bands: int) -> list[int]:
+    rows = len(signature) // bands
+    buckets = []
+    for band in range(bands):
+        chunk = array("Q", signature[band * rows : (band + 1) * rows]).tobytes()
+        digest = hashlib.blake2b(chunk, digest_size=8, person=band.to_bytes(4, "little")).digest()
+        buckets.append(int.from_bytes(digest, "little", signed=True))
+    return buckets
+
+
+class RequirementIndex:
+    def __init__(self, path: str | Path, policy: DedupPolicy, *, write_lease: FileLease | None = None) -> None:
+        self.path = Path(path)
+        self.policy = policy
+        self.write_lease = write_lease
+        self.hasher = MinHasher(policy.num_perm)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect(write=True) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS requirement_signatures (
+                    doc_id INTEGER PRIMARY KEY,
+                    session_id TEXT NOT NULL UNIQUE,
+                    signature BLOB NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS requirement_lsh (
+                    bucket INTEGER NOT NULL,
+                    doc_id INTEGER NOT NULL,
+                    PRIMARY KEY (bucket, doc_id)
+                ) WITHOUT ROWID
+                """
+            )
+
+    @contextmanager
+    def _connect(self, *, write: bool = False) -> Iterator[sqlite3.Connection]:
+        lease = self.write_lease.hold() if write and self.write_lease else nullcontext()
+        with lease:
+            conn = sqlite3.connect(self.path, timeout=30)
+            try:
+                with conn:
+                    yield conn
+            finally:
+                conn.close()
+
+    def signature(self, text: str) -> tuple[int, ...] | None:
+        items = shingles(text, self.policy.shingle_words)
+        return self.hasher.signature(items) if items else None
+
+    def add(self, session_id: str, text: str) -> bool:
+        indexed = self._index([(session_id, text)])
+        if indexed:
+            metrics.inc("novel_flow_requirement_index_total", outcome="indexed")
+        return bool(indexed)
+
+    def remove(self, session_ids: Sequence[str]) -> int:
+        if not session_ids:
+            return 0
+        with tracer.span("db.unindex_requirements"), self._connect(write=True) as conn:
+            removed = self._remove(conn, session_ids)
+        metrics.inc("novel_flow_requirement_index_total", removed, outcome="removed")
+        return removed
+
+    def indexed(self, session_ids: Sequence[str]) -> set[str]:
+        if not session_ids:
+            return set()
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT session_id FROM requirement_signatures
+                WHERE session_id IN ({", ".join("?" * len(session_ids))})
+                """,
+                list(session_ids),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def backfill(self, repo: SessionStore, *, batch_size: int = 500) -> int:
+        backfilled = 0
+        after: str | None = None
+        while True:
+            rows = repo.list_requirements(status="APPROVED", after=after, limit=batch_size)
+            if not rows:
+                break
+            after = rows[-1]["session_id"]
+            known = self.indexed([row["session_id"] for row in rows])
+            indexed = self._index(
+                [(row["session_id"], row["requirement_text"]) for row in rows if row["session_id"] not in known]
+            )
+            metrics.inc("novel_flow_requirement_index_total", indexed, outcome="backfilled")
+            backfilled += indexed
+            if len(rows) < batch_size:
+                break
+        return backfilled
+
+    def _index(self, items: Sequence[tuple[str, str]]) -> int:
+        signed = [(session_id, self.signature(text)) for session_id, text in items]
+        signed = [(session_id, signature) for session_id, signature in signed if signature is not None]
+        if not signed:
+            return 0
+        with tracer.span("db.index_requirement"), self._connect(write=True) as conn:
+            self._remove(conn, [session_id for session_id, _ in signed])
+            for session_id, signature in signed:
+                doc_id = conn.execute(
+                    "INSERT INTO requirement_signatures (session_id, signature) VALUES (?, ?) RETURNING doc_id",
+                    (session_id, array("Q", signature).tobytes()),
+                ).fetchone()[0]
+                conn.executemany(
+                    "INSERT OR IGNORE INTO requirement_lsh (bucket, doc_id) VALUES (?, ?)",
+                    [(bucket, doc_id) for bucket in band_buckets(signature, self.policy.bands)],
+                )
+        return len(signed)
+
+    def _remove(self, conn: sqlite3.Connection, session_ids: Sequence[str]) -> int:
+        removed = 0
+        for session_id in session_ids:
+            previous = conn.execute(
+                "SELECT doc_id, signature FROM requirement_signatures WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if previous is None:
+                continue
+            previous_id, previous_signature = previous
+            stale = band_buckets(array("Q", previous_signature), self.policy.bands)
+            conn.executemany(
+                "DELETE FROM requirement_lsh WHERE bucket = ? AND doc_id = ?",
+                [(bucket, previous_id) for bucket in stale],
+            )
+            conn.execute("DELETE FROM requirement_signatures WHERE doc_id = ?", (previous_id,))
+            removed += 1
+        return removed
+
+    def similar(self, text: str, *, limit: int = 5) -> list[tuple[str, float]]:
+        signature = self.signature(text)
+        if signature is None:
+            return []
+        buckets = band_buckets(signature, self.policy.bands)
+        with tracer.span("db.similar_requirements"), self._connect() as conn:
+            candidates = conn.execute(
+                f"""
+                SELECT doc_id FROM requirement_lsh WHERE bucket IN ({", ".join("?" * len(buckets))})
+                GROUP BY doc_id ORDER BY COUNT(*) DESC LIMIT ?
+                """,
+                [*buckets, self.policy.max_candidates],
+            ).fetchall()
+            doc_ids = [row[0] for row in candidates]
+            rows = []
+            if doc_ids:
+                rows = conn.execute(
+                    f"""
+                    SELECT session_id, signature FROM requirement_signatures
+                    WHERE doc_id IN ({", ".join("?" * len(doc_ids))})
+                    """,
+                    doc_ids,
+                ).fetchall()
+        scored = []
+        for session_id, blob in rows:
+            score = similarity(signature, array("Q", blob))
+            if score >= self.policy.threshold:
+                scored.append((session_id, round(score, 3)))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        metrics.inc("novel_flow_requirement_lookups_total", outcome="match" if scored else "miss")
+        return scored[:limit]
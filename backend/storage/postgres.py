@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import importlib.util
+import uuid
+from typing import Any
+
+from backend.observability.tracing import tracer
+from backend.storage.base import (
+    JSON_COLUMNS,
+    LISTING_INDEXES,
+    SESSION_COLUMNS,
+    SUMMARY_COLUMNS,
+    VALIDATOR_COLUMNS,
+    SessionConflict,
+    SessionFilter,
+    check_columns,
+    check_documents,
+    listing_where,
+)
+
+TIMESTAMP_FORMAT = "YYYY-MM-DD HH24:MI:SS"
+
+
+def _select_list(columns: tuple[str, ...]) -> str:
+    return ", ".join(
+        f"to_char({column} AT TIME ZONE 'UTC', '{TIMESTAMP_FORMAT}') AS {column}"
+        if column in {"created_at", "updated_at"}
+        else column
+        for column in columns
+    )
+
+
+SESSION_SELECT = _select_list(SESSION_COLUMNS)
+SUMMARY_SELECT = _select_list(SUMMARY_COLUMNS)
+VALIDATOR_SELECT = _select_list(VALIDATOR_COLUMNS)
+
+
+class PostgresSessionsRepo:
+    def __init__(self, dsn: str, *, min_size: int = 1, max_size: int = 10) -> None:
+        if importlib.util.find_spec("psycopg") is None or importlib.util.find_spec("psycopg_pool") is None:
+            raise RuntimeError("PostgreSQL storage requested but psycopg[pool] is not installed")
+        from psycopg.rows import dict_row
+        from psycopg.types.json import Jsonb
+        from psycopg_pool import ConnectionPool
+
+        self.dsn = dsn
+        self._jsonb = Jsonb
+        self.pool = ConnectionPool(
+            dsn,
+            min_size=min_size,
+            max_size=max_size,
+            kwargs={"autocommit": True, "row_factory": dict_row, "prepare_threshold": 0},
+            open=True,
+        )
+        self._init_db()
+
+    def close(self) -> None:
+        self.pool.close()
+
+    def pool_stats(self) -> dict[str, float]:
+        stats = self.pool.get_stats()
+        size = stats.get("pool_size", 0)
+        return {"open": size - stats.get("pool_available", 0), "pool_size": size, "waiting": stats.get("requests_waiting", 0)}
+
+    def _init_db(self) -> None:
+        with self.pool.connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    requirement_text TEXT NOT NULL,
+                    spec_json JSONB,
+                    proposal_json JSONB,
+                    bible_json JSONB,
+                    outline_full_json JSONB,
+                    outline_index_json JSONB,
+                    status TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    bible_version INTEGER,
+                    outline_version INTEGER,
+                    last_user_action TEXT,
+                    edit_text TEXT,
+                    revision INTEGER NOT NULL DEFAULT 0,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT date_trunc('second', now()),
+                    updated_at TIMESTAMPTZ NOT NULL DEFAULT date_trunc('second', now())
+                )
+                """
+            )
+            conn.execute("ALTER TABLE sessions ADD COLUMN IF NOT EXISTS revision INTEGER NOT NULL DEFAULT 0")
+            conn.execute("ALTER TABLE sessions ADD COLUMN IF NOT EXISTS outline_index_json JSONB")
+            for name, columns_ddl in LISTING_INDEXES.items():
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON sessions {columns_ddl}")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chapter_drafts (
+                    session_id TEXT NOT NULL,
+                    outline_version INTEGER NOT NULL,
+                    chapter_index INTEGER NOT NULL,
+                    draft_json JSONB NOT NULL,
+                    tokens INTEGER NOT NULL DEFAULT 0,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT date_trunc('second', now()),
+                    PRIMARY KEY (session_id, outline_version, chapter_index)
+                )
+                """
+            )
+
+    def create_session(self, text: str) -> str:
+        session_id = str(uuid.uuid4())
+        with tracer.span("db.create_session"), self.pool.connection() as conn:
+            conn.execute(
+                "INSERT INTO sessions (session_id, requirement_text, status, version) VALUES (%s, %s, 'NEW', 0)",
+                (session_id, text),
+            )
+        return session_id
+
+    def get_session(self, session_id: str) -> dict[str, Any] | None:
+        with tracer.span("db.get_session"), self.pool.connection() as conn:
+            return conn.execute(f"SELECT {SESSION_SELECT} FROM sessions WHERE session_id = %s", (session_id,)).fetchone()
+
+    def get_projection(self, session_id: str, documents: tuple[str, ...] = ()) -> dict[str, Any] | None:
+        check_documents(documents)
+        select = ", ".join((VALIDATOR_SELECT, *(f"{document}::text AS {document}" for document in documents)))
+        with tracer.span("db.get_projection"), self.pool.connection() as conn:
+            return conn.execute(f"SELECT {select} FROM sessions WHERE session_id = %s", (session_id,)).fetchone()
+
+    def get_revision(self, session_id: str) -> int | None:
+        with tracer.span("db.get_revision"), self.pool.connection() as conn:
+            row = conn.execute("SELECT revision FROM sessions WHERE session_id = %s", (session_id,)).fetchone()
+        return None if row is None else int(row["revision"])
+
+    def update_session(
+        self, session_id: str, *, expected_revision: int | None = None, **fields: Any
+    ) -> dict[str, Any] | None:
+        if not fields:
+            return self.get_session(session_id)
+        check_columns(fields)
+
+        assignments = [f"{key} = %s" for key in fields]
+        values = [
+            self._jsonb(value) if key in JSON_COLUMNS and value is not None else value for key, value in fields.items()
+        ]
+        where = "session_id = %s"
+        values.append(session_id)
+        if expected_revision is not None:
+            where += " AND revision = %s"
+            values.append(expected_revision)
+        query = (
+            f"UPDATE sessions SET {', '.join(assignments)}, revision = revision + 1, "
+            f"updated_at = date_trunc('second', now()) WHERE {where} RETURNING {SESSION_SELECT}"
+        )
+        with tracer.span("db.update_session"), self.pool.connection() as conn:
+            row = conn.execute(query, values).fetchone()
+            if row is None and expected_revision is not None:
+                current = conn.execute("SELECT revision FROM sessions WHERE session_id = %s", (session_id,)).fetchone()
+                if current is not None:
+                    raise SessionConflict(session_id, expected_revision, int(current["revision"]))
+            return row
+
+    def list_sessions(
+        self, *, limit: int = 50, filters: SessionFilter | None = None, after: tuple[str, str] | None = None
+    ) -> list[dict[str, Any]]:
+        where, params = listing_where(filters, after, param="%s", timestamp="(%s::timestamp AT TIME ZONE 'UTC')")
+        query = (
+            f"SELECT {SUMMARY_SELECT} FROM sessions {where} "
+            "ORDER BY sessions.updated_at DESC, session_id DESC LIMIT %s"
+        )
+        with tracer.span("db.list_sessions"), self.pool.connection() as conn:
+            return conn.execute(query, [*params, limit]).fetchall()
+
+    def list_requirements(self, *, status: str, after: str | None = None, limit: int) -> list[dict[str, Any]]:
+        where, params = "status = %s", [status]
+        if after is not None:
+            where += " AND session_id > %s"
+            params.append(after)
+        with tracer.span("db.list_requirements"), self.pool.connection() as conn:
+            return conn.execute(
+                f"SELECT session_id, requirement_text FROM sessions WHERE {where} ORDER BY session_id LIMIT %s",
+                [*params, limit],
+            ).fetchall()
+
+    def save_plan(
+        self,
+        session_id: str,
+        *,
+        bible_json: dict[str, Any],
+        outline_full_json: dict[str, Any],
+        bump: bool,
+        outline_index_json: dict[str, Any] | None = None,
+        expected_revision: int | None = None,
+    ) -> dict[str, Any] | None:
+        values = [
+            self._jsonb(bible_json),
+            self._jsonb(outline_full_json),
+            self._jsonb(outline_index_json) if outline_index_json is not None else None,
+            int(bump),
+            int(bump),
+            session_id,
+        ]
+        where = "session_id = %s"
+        if expected_revision is not None:
+            where += " AND revision = %s"
+            values.append(expected_revision)
+        with tracer.span("db.save_plan"), self.pool.connection() as conn:
+            row = conn.execute(
+                f"""
+                UPDATE sessions SET
+                    bible_json = %s,
+                    outline_full_json = %s,
+                    outline_index_json = %s,
+                    bible_version = COALESCE(bible_version, 1) + %s,
+                    outline_version = COALESCE(outline_version, 1) + %s,
+                    revision = revision + 1,
+                    updated_at = date_trunc('second', now())
+                WHERE {where}
+                RETURNING {SESSION_SELECT}
+                """,
+                values,
+            ).fetchone()
+            if row is None and expected_revision is not None:
+                current = conn.execute("SELECT revision FROM sessions WHERE session_id = %s", (session_id,)).fetchone()
+                if current is not None:
+                    raise SessionConflict(session_id, expected_revision, int(current["revision"]))
+            return row
+
+    def save_draft(
+        self, session_id: str, *, outline_version: int, draft_json: dict[str, Any], tokens: int
+    ) -> None:
+        with tracer.span("db.save_draft"), self.pool.connection() as conn:
+            conn.execute(
+                "DELETE FROM chapter_drafts WHERE session_id = %s AND outline_version <> %s",
+                (session_id, outline_version),
+            )
+            conn.execute(
+                """
+                INSERT INTO chapter_drafts (session_id, outline_version, chapter_index, draft_json, tokens)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (session_id, outline_version, chapter_index)
+                DO UPDATE SET draft_json = EXCLUDED.draft_json, tokens = EXCLUDED.tokens
+                """,
+                (session_id, outline_version, int(draft_json["index"]), self._jsonb(draft_json), tokens),
+            )
+
+    def carry_drafts(
+        self, session_id: str, *, from_version: int, to_version: int, chapter_indexes: list[int]
+    ) -> int:
+        with tracer.span("db.carry_drafts"), self.pool.connection() as conn:
+            carried = conn.execute(
+                """
+                INSERT INTO chapter_drafts (session_id, outline_version, chapter_index, draft_json, tokens, created_at)
+                SELECT session_id, %s, chapter_index, draft_json, tokens, created_at FROM chapter_drafts
+                WHERE session_id = %s AND outline_version = %s AND chapter_index = ANY(%s)
+                ON CONFLICT (session_id, outline_version, chapter_index) DO NOTHING
+                """,
+                (to_version, session_id, from_version, list(chapter_indexes)),
+            ).rowcount
+            conn.execute(
+                "DELETE FROM chapter_drafts WHERE session_id = %s AND outline_version <> %s", (session_id, to_version)
+            )
+        return carried
+
+    def list_drafts(self, session_id: str, *, outline_version: int) -> list[dict[str, Any]]:
+        with tracer.span("db.list_drafts"), self.pool.connection() as conn:
+            return conn.execute(
+                """
+                SELECT chapter_index, draft_json, tokens FROM chapter_drafts
+                WHERE session_id = %s AND outline_version = %s ORDER BY chapter_index
+                """,
+                (session_id, outline_version),
+            ).fetchall()
+
+    def checkpointer(self) -> Any:
+        if importlib.util.find_spec("langgraph.checkpoint.postgres") is None:
+            raise RuntimeError("PostgreSQL storage requested but langgraph-checkpoint-postgres is not installed")
+        from langgraph.checkpoint.postgres import PostgresSaver
+
+        saver = PostgresSaver(self.pool)
+        saver.setup()
+        return saver
@@ -2,24 +2,65 @@ from __future__ import annotations
 
 import json
 import sqlite3
+import threading
 import uuid
+import zlib
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
 from typing import Any
 
+from backend.observability.metrics import metrics
+from backend.observability.tracing import tracer
+from backend.storage.base import (
+    JSON_COLUMNS,
+    LISTING_INDEXES,
+    SUMMARY_COLUMNS,
+    VALIDATOR_COLUMNS,
+    SessionConflict,
+    SessionFilter,
+    check_columns,
+    check_documents,
+    listing_where,
+)
+from backend.storage.coordination import FileLease
+
 
 class SessionsRepo:
-    def __init__(self, db_path: str = "novel_flow.db") -> None:
+    def __init__(self, db_path: str = "novel_flow.db", *, write_lease: FileLease | None = None) -> None:
         self.db_path = db_path
+        self.write_lease = write_lease
+        self.connections_open = 0
+        self.connections_opened = 0
+        self._stats_lock = threading.Lock()
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
         self._init_db()
 
-    def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    @contextmanager
+    def _connect(self, *, write: bool = False) -> Iterator[sqlite3.Connection]:
+        lease = self.write_lease.hold() if write and self.write_lease else nullcontext()
+        with lease:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            with self._stats_lock:
+                self.connections_opened += 1
+                self.connections_open += 1
+            try:
+                with conn:
+                    yield conn
+            finally:
+                conn.close()
+                with self._stats_lock:
+                    self.connections_open -= 1
+
+    def pool_stats(self) -> dict[str, float]:
+        return {"open": self.connections_open, "opened_total": self.connections_opened}
 
     def _init_db(self) -> None:
-        with self._connect() as conn:
+        with self._connect(write=True) as conn:
+            self._migrate_auto_vacuum(conn)
+            if self.write_lease is not None:
+                conn.execute("PRAGMA journal_mode=WAL")
             conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS sessions (
@@ -29,12 +70,14 @@ class SessionsRepo:
                     proposal_json TEXT,
                     bible_json TEXT,
                     outline_full_json TEXT,
+                    outline_index_json TEXT,
                     status TEXT NOT NULL,
                     version INTEGER NOT NULL,
                     bible_version INTEGER,
                     outline_version INTEGER,
                     last_user_action TEXT,
                     edit_text TEXT,
+                    revision INTEGER NOT NULL DEFAULT 0,
                     created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
                     updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
                 )
@@ -46,15 +89,53 @@ class SessionsRepo:
                 ("edit_text", "ALTER TABLE sessions ADD COLUMN edit_text TEXT"),
                 ("bible_json", "ALTER TABLE sessions ADD COLUMN bible_json TEXT"),
                 ("outline_full_json", "ALTER TABLE sessions ADD COLUMN outline_full_json TEXT"),
+                ("outline_index_json", "ALTER TABLE sessions ADD COLUMN outline_index_json TEXT"),
                 ("bible_version", "ALTER TABLE sessions ADD COLUMN bible_version INTEGER"),
                 ("outline_version", "ALTER TABLE sessions ADD COLUMN outline_version INTEGER"),
+                ("revision", "ALTER TABLE sessions ADD COLUMN revision INTEGER NOT NULL DEFAULT 0"),
             ):
                 if column not in columns:
                     conn.execute(ddl)
+            for name, columns_ddl in LISTING_INDEXES.items():
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON sessions {columns_ddl}")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sessions_archive (
+                    session_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    archived_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    payload BLOB NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chapter_drafts (
+                    session_id TEXT NOT NULL,
+                    outline_version INTEGER NOT NULL,
+                    chapter_index INTEGER NOT NULL,
+                    draft_json TEXT NOT NULL,
+                    tokens INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (session_id, outline_version, chapter_index)
+                )
+                """
+            )
+
+    @staticmethod
+    def _migrate_auto_vacuum(conn: sqlite3.Connection) -> None:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        if conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone() is not None:
+            with tracer.span("db.migrate_auto_vacuum"):
+                conn.execute("VACUUM")
+            metrics.inc("novel_flow_db_migrations_total", migration="auto_vacuum_incremental")
 
     def create_session(self, text: str) -> str:
         session_id = str(uuid.uuid4())
-        with self._connect() as conn:
+        with tracer.span("db.create_session"), self._connect(write=True) as conn:
             conn.execute(
                 """
                 INSERT INTO sessions (
@@ -68,33 +149,263 @@ class SessionsRepo:
         return session_id
 
     def get_session(self, session_id: str) -> dict[str, Any] | None:
-        with self._connect() as conn:
+        with tracer.span("db.get_session"), self._connect() as conn:
             row = conn.execute("SELECT * FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            archived = row is None and conn.execute(
+                "SELECT 1 FROM sessions_archive WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if archived:
+            row = self._rehydrate(session_id)
+        return self._decode(row)
+
+    def _rehydrate(self, session_id: str) -> sqlite3.Row | None:
+        with tracer.span("db.rehydrate_session"), self._connect(write=True) as conn:
+            archived = conn.execute(
+                "DELETE FROM sessions_archive WHERE session_id = ? RETURNING payload", (session_id,)
+            ).fetchone()
+            if archived is not None:
+                metrics.inc("novel_flow_rehydrated_sessions_total")
+                restored = json.loads(zlib.decompress(archived["payload"]))
+                restored.pop("updated_at", None)
+                drafts = restored.pop("chapter_drafts", [])
+                columns = list(restored)
+                conn.execute(
+                    f"INSERT OR IGNORE INTO sessions ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                    [restored[column] for column in columns],
+                )
+                conn.executemany(
+                    """
+                    INSERT OR IGNORE INTO chapter_drafts
+                        (session_id, outline_version, chapter_index, draft_json, tokens, created_at)
+                    VALUES (:session_id, :outline_version, :chapter_index, :draft_json, :tokens, :created_at)
+                    """,
+                    drafts,
+                )
+            return conn.execute("SELECT * FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+
+    def archive_sessions(self, cutoffs: dict[str, str], *, limit: int) -> dict[str, list[str]]:
+        archived: dict[str, list[str]] = {}
+        with tracer.span("db.archive_sessions"), self._connect(write=True) as conn:
+            for status, cutoff in cutoffs.items():
+                remaining = limit - sum(map(len, archived.values()))
+                if remaining <= 0:
+                    break
+                rows = conn.execute(
+                    "SELECT * FROM sessions WHERE status = ? AND updated_at < ? ORDER BY updated_at LIMIT ?",
+                    (status, cutoff, remaining),
+                ).fetchall()
+                if not rows:
+                    continue
+                ids = [(row["session_id"],) for row in rows]
+                drafts: dict[str, list[dict[str, Any]]] = {}
+                for draft in conn.execute(
+                    f"SELECT * FROM chapter_drafts WHERE session_id IN ({', '.join('?' * len(ids))})",
+                    [session_id for session_id, in ids],
+                ).fetchall():
+                    drafts.setdefault(draft["session_id"], []).append(dict(draft))
+                with tracer.span("json.encode"):
+                    documents = [{**dict(row), "chapter_drafts": drafts.get(row["session_id"], [])} for row in rows]
+                    payloads = [zlib.compress(json.dumps(document).encode("utf-8")) for document in documents]
+                conn.executemany(
+                    """
+                    INSERT OR REPLACE INTO sessions_archive (session_id, status, updated_at, payload)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    [(row["session_id"], row["status"], row["updated_at"], payload) for row, payload in zip(rows, payloads)],
+                )
+                conn.executemany("DELETE FROM sessions WHERE session_id = ?", ids)
+                conn.executemany("DELETE FROM chapter_drafts WHERE session_id = ?", ids)
+                if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'graph_checkpoints'").fetchone():
+                    conn.executemany("DELETE FROM graph_checkpoints WHERE thread_id = ?", ids)
+                    conn.executemany("DELETE FROM graph_writes WHERE thread_id = ?", ids)
+                archived[status] = [session_id for session_id, in ids]
+        return archived
+
+    def incremental_vacuum(self, pages: int) -> int:
+        with tracer.span("db.incremental_vacuum"), self._connect(write=True) as conn:
+            before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+            return before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    @staticmethod
+    def _decode(row: sqlite3.Row | None) -> dict[str, Any] | None:
         if row is None:
             return None
 
         result = dict(row)
-        for key in ("spec_json", "proposal_json", "bible_json", "outline_full_json"):
-            if result[key]:
-                result[key] = json.loads(result[key])
+        with tracer.span("json.decode"):
+            for key in JSON_COLUMNS:
+                if result[key]:
+                    result[key] = json.loads(result[key])
         return result
 
-    def update_session(self, session_id: str, **fields: Any) -> None:
+    def get_projection(self, session_id: str, documents: tuple[str, ...] = ()) -> dict[str, Any] | None:
+        check_documents(documents)
+        query = f"SELECT {', '.join((*VALIDATOR_COLUMNS, *documents))} FROM sessions WHERE session_id = ?"
+        with tracer.span("db.get_projection"), self._connect() as conn:
+            row = conn.execute(query, (session_id,)).fetchone()
+            archived = row is None and conn.execute(
+                "SELECT 1 FROM sessions_archive WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if archived and self._rehydrate(session_id) is not None:
+            with self._connect() as conn:
+                row = conn.execute(query, (session_id,)).fetchone()
+        return None if row is None else dict(row)
+
+    def get_revision(self, session_id: str) -> int | None:
+        with tracer.span("db.get_revision"), self._connect() as conn:
+            row = conn.execute("SELECT revision FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return None if row is None else int(row["revision"])
+
+    def update_session(
+        self, session_id: str, *, expected_revision: int | None = None, **fields: Any
+    ) -> dict[str, Any] | None:
         if not fields:
-            return
+            return self.get_session(session_id)
+        check_columns(fields)
 
         assignments = []
         values = []
-        for key, value in fields.items():
-            db_key = key
-            if key in {"spec_json", "proposal_json", "bible_json", "outline_full_json"} and value is not None:
-                value = json.dumps(value)
-            assignments.append(f"{db_key} = ?")
-            values.append(value)
+        with tracer.span("json.encode"):
+            for key, value in fields.items():
+                if key in JSON_COLUMNS and value is not None:
+                    value = json.dumps(value)
+                assignments.append(f"{key} = ?")
+                values.append(value)
 
+        assignments.append("revision = revision + 1")
         assignments.append("updated_at = CURRENT_TIMESTAMP")
+        where = "session_id = ?"
         values.append(session_id)
+        if expected_revision is not None:
+            where += " AND revision = ?"
+            values.append(expected_revision)
+
+        query = f"UPDATE sessions SET {', '.join(assignments)} WHERE {where} RETURNING *"
+        with tracer.span("db.update_session"), self._connect(write=True) as conn:
+            row = conn.execute(query, values).fetchone()
+            if row is None and expected_revision is not None:
+                current = conn.execute("SELECT revision FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+                if current is not None:
+                    raise SessionConflict(session_id, expected_revision, int(current["revision"]))
+        return self._decode(row)
+
+    def list_sessions(
+        self, *, limit: int = 50, filters: SessionFilter | None = None, after: tuple[str, str] | None = None
+    ) -> list[dict[str, Any]]:
+        where, params = listing_where(filters, after, param="?", timestamp="?")
+        query = (
+            f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM sessions {where} "
+            "ORDER BY updated_at DESC, session_id DESC LIMIT ?"
+        )
+        with tracer.span("db.list_sessions"), self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, [*params, limit]).fetchall()]
+
+    def list_requirements(self, *, status: str, after: str | None = None, limit: int) -> list[dict[str, Any]]:
+        where, params = "status = ?", [status]
+        if after is not None:
+            where += " AND session_id > ?"
+            params.append(after)
+        with tracer.span("db.list_requirements"), self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT session_id, requirement_text FROM sessions WHERE {where} ORDER BY session_id LIMIT ?",
+                [*params, limit],
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def save_plan(
+        self,
+        session_id: str,
+        *,
+        bible_json: dict[str, Any],
+        outline_full_json: dict[str, Any],
+        bump: bool,
+        outline_index_json: dict[str, Any] | None = None,
+        expected_revision: int | None = None,
+    ) -> dict[str, Any] | None:
+        with tracer.span("json.encode"):
+            bible_text = json.dumps(bible_json)
+            outline_text = json.dumps(outline_full_json)
+            index_text = json.dumps(outline_index_json) if outline_index_json is not None else None
+        values = [bible_text, outline_text, index_text, int(bump), int(bump), session_id]
+        where = "session_id = ?"
+        if expected_revision is not None:
+            where += " AND revision = ?"
+            values.append(expected_revision)
+        with tracer.span("db.save_plan"), self._connect(write=True) as conn:
+            row = conn.execute(
+                f"""
+                UPDATE sessions SET
+                    bible_json = ?,
+                    outline_full_json = ?,
+                    outline_index_json = ?,
+                    bible_version = COALESCE(bible_version, 1) + ?,
+                    outline_version = COALESCE(outline_version, 1) + ?,
+                    revision = revision + 1,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE {where}
+                RETURNING *
+                """,
+                values,
+            ).fetchone()
+            if row is None and expected_revision is not None:
+                current = conn.execute("SELECT revision FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+                if current is not None:
+                    raise SessionConflict(session_id, expected_revision, int(current["revision"]))
+        return self._decode(row)
+
+    def save_draft(
+        self, session_id: str, *, outline_version: int, draft_json: dict[str, Any], tokens: int
+    ) -> None:
+        with tracer.span("json.encode"):
+            draft_text = json.dumps(draft_json)
+        with tracer.span("db.save_draft"), self._connect(write=True) as conn:
+            conn.execute(
+                "DELETE FROM chapter_drafts WHERE session_id = ? AND outline_version <> ?",
+                (session_id, outline_version),
+            )
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO chapter_drafts (session_id, outline_version, chapter_index, draft_json, tokens)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (session_id, outline_version, int(draft_json["index"]), draft_text, tokens),
+            )
+
+    def carry_drafts(
+        self, session_id: str, *, from_version: int, to_version: int, chapter_indexes: list[int]
+    ) -> int:
+        placeholders = ", ".join("?" * len(chapter_indexes))
+        with tracer.span("db.carry_drafts"), self._connect(write=True) as conn:
+            carried = 0
+            if chapter_indexes:
+                carried = conn.execute(
+                    f"""
+                    INSERT OR IGNORE INTO chapter_drafts
+                        (session_id, outline_version, chapter_index, draft_json, tokens, created_at)
+                    SELECT session_id, ?, chapter_index, draft_json, tokens, created_at FROM chapter_drafts
+                    WHERE session_id = ? AND outline_version = ? AND chapter_index IN ({placeholders})
+                    """,
+                    (to_version, session_id, from_version, *chapter_indexes),
+                ).rowcount
+            conn.execute(
+                "DELETE FROM chapter_drafts WHERE session_id = ? AND outline_version <> ?", (session_id, to_version)
+            )
+        return carried
+
+    def list_drafts(self, session_id: str, *, outline_version: int) -> list[dict[str, Any]]:
+        with tracer.span("db.list_drafts"), self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT chapter_index, draft_json, tokens FROM chapter_drafts
+                WHERE session_id = ? AND outline_version = ? ORDER BY chapter_index
+                """,
+                (session_id, outline_version),
+            ).fetchall()
+        with tracer.span("json.decode"):
+            return [{**dict(row), "draft_json": json.loads(row["draft_json"])} for row in rows]
+
+    def checkpointer(self) -> Any:
+        from backend.storage.checkpoint import SqliteCheckpointSaver
 
-        query = f"UPDATE sessions SET {', '.join(assignments)} WHERE session_id = ?"
-        with self._connect() as conn:
-            conn.execute(query, values)
+        return SqliteCheckpointSaver(self)
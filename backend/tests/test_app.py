@@ -120,3 +120,327 @@ def test_plan_second_call_does_not_reinvoke_generation(tmp_path, monkeypatch) ->
     assert local_client.get(f"/plan/{session_id}").status_code == 200
 
     assert calls == {"bible": 1, "outline": 1}
+
+
+def test_metrics_exposes_token_usage_and_request_latency(client: "TestClient") -> None:
+    session_id = client.post("/intake", json={"text": "Plan a costly novel"}).json()["session_id"]
+    client.get(f"/proposal/{session_id}")
+
+    body = client.get("/metrics").text
+    assert '# TYPE novel_flow_llm_tokens_total counter' in body
+    assert 'novel_flow_llm_generations_total{model="gpt-4o-mini",outcome="success",schema="OutlineLite"}' in body
+    assert 'novel_flow_http_request_duration_seconds_count{method="GET",route="/proposal/{session_id}",status="200"}' in body
+    assert 'novel_flow_db_connections{state="open"}' in body
+
+    usage = client.get("/metrics/sessions", params={"session_id": session_id}).json()[0]
+    assert usage["calls"] == 3
+    assert usage["total_tokens"] > 0
+    assert any(row["session_id"] == session_id for row in client.get("/metrics/sessions?limit=1000").json())
+
+
+def test_sessions_listing_filters_and_paginates(client: "TestClient") -> None:
+    ids = {client.post("/intake", json={"text": f"Story {idx}"}).json()["session_id"] for idx in range(3)}
+    approved = next(iter(ids))
+    client.get(f"/proposal/{approved}")
+    client.post("/decision", json={"session_id": approved, "action": "approve"})
+
+    first = client.get("/sessions", params={"limit": 2}).json()
+    second = client.get("/sessions", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    filtered = client.get("/sessions", params={"status": "APPROVED", "updated_after": "2000-01-01T00:00:00Z"}).json()
+
+    assert {item["session_id"] for item in first["items"] + second["items"]} == ids
+    assert second["next_cursor"] is None
+    assert [item["session_id"] for item in filtered["items"]] == [approved]
+    assert "proposal_json" not in filtered["items"][0]
+    assert client.get("/sessions", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_decision_on_stale_proposal_version_returns_409(client: "TestClient") -> None:
+    session_id = client.post("/intake", json={"text": "A hopeful detective tale"}).json()["session_id"]
+    version = client.get(f"/proposal/{session_id}").json()["version"]
+    client.post("/decision", json={"session_id": session_id, "action": "edit", "text": "Add a twin", "version": version})
+
+    stale = client.post("/decision", json={"session_id": session_id, "action": "approve", "version": version})
+
+    assert stale.status_code == 409
+    assert client.get("/sessions", params={"status": "APPROVED"}).json()["items"] == []
+
+
+def test_create_app_defers_database_until_first_use(tmp_path) -> None:
+    db_path = tmp_path / "lazy.db"
+    app = create_app(str(db_path))
+    assert not db_path.exists()
+
+    with TestClient(app) as client:
+        assert client.get("/health").status_code == 200
+        assert db_path.exists()
+
+
+def test_proposal_and_plan_support_conditional_get(client: "TestClient") -> None:
+    session_id = client.post("/intake", json={"text": "Plan a novel"}).json()["session_id"]
+    generated = client.get(f"/proposal/{session_id}")
+    stored = client.get(f"/proposal/{session_id}")
+    etag = generated.headers["etag"]
+
+    assert stored.json() == generated.json()
+    assert stored.headers["etag"] == etag
+    assert client.get(f"/proposal/{session_id}", headers={"If-None-Match": etag}).status_code == 304
+
+    client.post("/decision", json={"session_id": session_id, "action": "approve"})
+    assert client.get(f"/proposal/{session_id}", headers={"If-None-Match": etag}).status_code == 200
+
+    plan = client.get(f"/plan/{session_id}")
+    cached = client.get(f"/plan/{session_id}", headers={"If-None-Match": plan.headers["etag"]})
+    assert cached.status_code == 304
+    assert client.get(f"/plan/{session_id}").json() == plan.json()
+
+    client.post(f"/plan/{session_id}/regenerate", json={"force": True})
+    refreshed = client.get(f"/plan/{session_id}", headers={"If-None-Match": plan.headers["etag"]})
+    assert refreshed.status_code == 200
+    assert refreshed.json()["bible_version"] == 2
+    assert 'novel_flow_conditional_responses_total{outcome="not_modified",route="/plan/{session_id}"}' in client.get(
+        "/metrics"
+    ).text
+
+
+def test_speculative_plan_serves_plan_after_approve(tmp_path) -> None:
+    from backend.graph.speculation import SpeculationPolicy
+
+    app = create_app(str(tmp_path / "spec.db"), speculation_policy=SpeculationPolicy())
+    with TestClient(app) as local_client:
+        session_id = local_client.post("/intake", json={"text": "Plan a heist novel"}).json()["session_id"]
+        local_client.get(f"/proposal/{session_id}")
+        local_client.post("/decision", json={"session_id": session_id, "action": "approve"})
+        plan = local_client.get(f"/plan/{session_id}")
+
+        assert plan.status_code == 200
+        assert plan.json()["bible_version"] == 1
+        assert app.state.services().speculator.stats()["hits"] == 1
+
+
+def test_request_deadline_stops_graph_and_next_request_resumes(tmp_path) -> None:
+    from backend.llm.backends import DelayedBackend, LatencyModel, PlaceholderBackend
+    from backend.observability.metrics import metrics
+
+    backend = DelayedBackend(PlaceholderBackend(), LatencyModel("fixed", 0.2))
+    with TestClient(create_app(str(tmp_path / "deadline.db"), llm_backend=backend)) as local_client:
+        session_id = local_client.post("/intake", json={"text": "Plan a slow novel"}).json()["session_id"]
+        before = metrics.counter("novel_flow_cancelled_requests_total", route="/proposal/{session_id}", reason="deadline")
+
+        timed_out = local_client.get(f"/proposal/{session_id}", headers={"X-Request-Timeout": "0.3"})
+        resumed = local_client.get(f"/proposal/{session_id}")
+
+        assert timed_out.status_code == 504
+        assert resumed.status_code == 200
+        assert resumed.json()["status"] == "NEEDS_CONFIRMATION"
+        assert metrics.counter(
+            "novel_flow_cancelled_requests_total", route="/proposal/{session_id}", reason="deadline"
+        ) == before + 1
+        assert local_client.get(f"/proposal/{session_id}", headers={"X-Request-Timeout": "soon"}).status_code == 400
+
+
+def test_draft_requires_plan_and_is_stored_per_chapter(client: "TestClient") -> None:
+    session_id = client.post("/intake", json={"text": "Plan a long saga"}).json()["session_id"]
+    client.get(f"/proposal/{session_id}")
+    client.post("/decision", json={"session_id": session_id, "action": "approve"})
+    assert client.post(f"/draft/{session_id}").status_code == 409
+
+    plan = client.get(f"/plan/{session_id}").json()
+    assert client.get(f"/draft/{session_id}").json() == {"outline_version": 1, "chapters": [], "complete": False}
+    drafted = client.post(f"/draft/{session_id}")
+    assert drafted.status_code == 200
+    chapters = drafted.json()["chapters"]
+    assert [chapter["index"] for chapter in chapters] == [chapter["index"] for chapter in plan["outline_full"]["chapters"]]
+    assert client.get(f"/draft/{session_id}").json() == drafted.json()
+
+
+def test_plan_validation_and_targeted_repair(tmp_path) -> None:
+    from backend.storage.sqlite import SessionsRepo
+
+    local_client = TestClient(create_app(str(tmp_path / "test.db")))
+    session_id = local_client.post("/intake", json={"text": "Plan a long saga"}).json()["session_id"]
+    local_client.get(f"/proposal/{session_id}")
+    local_client.post("/decision", json={"session_id": session_id, "action": "approve"})
+    assert local_client.get(f"/plan/{session_id}/validation").status_code == 409
+
+    plan = local_client.get(f"/plan/{session_id}").json()
+    assert local_client.get(f"/plan/{session_id}/validation").json() == {
+        "outline_version": 1,
+        "valid": True,
+        "violations": [],
+    }
+
+    repo = SessionsRepo(str(tmp_path / "test.db"))
+    outline = plan["outline_full"]
+    outline["chapters"][1]["characters_involved"].append("Ghost")
+    repo.update_session(session_id, outline_full_json=outline, outline_index_json=None)
+    report = local_client.get(f"/plan/{session_id}/validation").json()
+    assert report["valid"] is False
+    assert [(item["kind"], item["chapter"]) for item in report["violations"]] == [("unknown_character", 2)]
+
+    repaired = local_client.post(f"/plan/{session_id}/repair")
+    assert repaired.status_code == 200
+    assert repaired.json()["outline_version"] == 2
+    assert repaired.json()["outline_full"]["chapters"][2:] == outline["chapters"][2:]
+    assert local_client.get(f"/plan/{session_id}/validation").json()["valid"] is True
+    assert repo.get_session(session_id)["outline_index_json"] is not None
+
+
+def test_repair_keeps_drafts_of_unchanged_chapters(tmp_path) -> None:
+    from backend.observability.metrics import metrics
+    from backend.storage.sqlite import SessionsRepo
+
+    local_client = TestClient(create_app(str(tmp_path / "test.db")))
+    session_id = local_client.post("/intake", json={"text": "Plan a long saga"}).json()["session_id"]
+    local_client.post("/decision", json={"session_id": session_id, "action": "approve"})
+    outline = local_client.get(f"/plan/{session_id}").json()["outline_full"]
+    first = local_client.post(f"/draft/{session_id}").json()["chapters"]
+
+    outline["chapters"][1]["characters_involved"].append("Ghost")
+    SessionsRepo(str(tmp_path / "test.db")).update_session(
+        session_id, outline_full_json=outline, outline_index_json=None
+    )
+    assert local_client.post(f"/plan/{session_id}/repair").json()["outline_version"] == 2
+    drafted_before = metrics.counter("novel_flow_draft_chapters_total", outcome="drafted")
+    second = local_client.post(f"/draft/{session_id}").json()
+
+    assert metrics.counter("novel_flow_draft_chapters_total", outcome="drafted") == drafted_before + 1
+    assert second["outline_version"] == 2
+    assert [chapter for chapter in second["chapters"] if chapter["index"] != 2] == [
+        chapter for chapter in first if chapter["index"] != 2
+    ]
+
+
+def test_decisions_are_never_dropped_by_an_interrupted_run(tmp_path) -> None:
+    from backend.llm.backends import PlaceholderBackend
+
+    class FlakyBackend:
+        name = "flaky"
+        billable = False
+
+        def __init__(self) -> None:
+            self.inner = PlaceholderBackend()
+            self.fail_expand = False
+
+        def complete(self, req):
+            if req.schema_name == "ExpansionResult" and self.fail_expand:
+                self.fail_expand = False
+                raise RuntimeError("backend unavailable")
+            return self.inner.complete(req)
+
+    backend = FlakyBackend()
+    local_client = TestClient(create_app(str(tmp_path / "test.db"), llm_backend=backend), raise_server_exceptions=False)
+
+    fresh = local_client.post("/intake", json={"text": "Plan a novel"}).json()["session_id"]
+    approved = local_client.post("/decision", json={"session_id": fresh, "action": "approve"})
+    assert (approved.status_code, approved.json()["status"]) == (200, "APPROVED")
+    reopened = local_client.post("/decision", json={"session_id": fresh, "action": "edit", "text": "First person"})
+    assert (reopened.status_code, reopened.json()["status"], reopened.json()["version"]) == (200, "NEEDS_CONFIRMATION", 2)
+
+    session_id = local_client.post("/intake", json={"text": "Plan a thriller"}).json()["session_id"]
+    local_client.get(f"/proposal/{session_id}")
+    backend.fail_expand = True
+    failed = local_client.post("/decision", json={"session_id": session_id, "action": "edit", "text": "First person"})
+    assert failed.status_code == 500
+
+    conflict = local_client.post("/decision", json={"session_id": session_id, "action": "approve"})
+    assert conflict.status_code == 409
+    proposal = local_client.get(f"/proposal/{session_id}").json()
+    assert (proposal["status"], proposal["version"]) == ("NEEDS_CONFIRMATION", 2)
+    approved = local_client.post("/decision", json={"session_id": session_id, "action": "approve", "version": 2})
+    assert (approved.status_code, approved.json()["status"]) == (200, "APPROVED")
+
+
+def test_forced_regenerate_bypasses_shared_response_cache(tmp_path) -> None:
+    from backend.llm.backends import PlaceholderBackend
+
+    class CountingBackend(PlaceholderBackend):
+        calls = 0
+
+        def complete(self, req):
+            self.calls += 1
+            return super().complete(req)
+
+    backend = CountingBackend()
+    local_client = TestClient(
+        create_app(str(tmp_path / "test.db"), llm_backend=backend, shared_dir=str(tmp_path / "shared"))
+    )
+    session_id = local_client.post("/intake", json={"text": "Plan a novel"}).json()["session_id"]
+    local_client.get(f"/proposal/{session_id}")
+    local_client.post("/decision", json={"session_id": session_id, "action": "approve"})
+    local_client.get(f"/plan/{session_id}")
+    before = backend.calls
+
+    regenerated = local_client.post(f"/plan/{session_id}/regenerate", json={"force": True})
+
+    assert regenerated.json()["outline_version"] == 2
+    assert backend.calls - before >= 2
+
+
+SAGA = (
+    "Write a dark fantasy novel about a young thief who steals a cursed crown from the royal palace "
+    "and must return it before the new moon, told in first person with a bittersweet ending."
+)
+
+
+def test_near_duplicate_intake_suggests_and_reuses_approved_proposal(tmp_path) -> None:
+    from backend.storage.dedup import DedupPolicy
+
+    local_client = TestClient(create_app(str(tmp_path / "test.db"), dedup_policy=DedupPolicy(threshold=0.6)))
+    source = local_client.post("/intake", json={"text": SAGA}).json()
+    assert source["similar"] == []
+    local_client.get(f"/proposal/{source['session_id']}")
+    local_client.post("/decision", json={"session_id": source["session_id"], "action": "approve"})
+
+    resubmitted = local_client.post("/intake", json={"text": SAGA.replace("bittersweet", "hopeful")}).json()
+    assert [match["session_id"] for match in resubmitted["similar"]] == [source["session_id"]]
+    assert resubmitted["reused_from"] is None
+    reused = local_client.post(
+        f"/intake/{resubmitted['session_id']}/reuse", json={"source_session_id": source["session_id"]}
+    )
+    assert reused.status_code == 200
+    assert reused.json()["status"] == "NEEDS_CONFIRMATION"
+    assert reused.json()["requirement_spec"]["raw_text"] == SAGA.replace("bittersweet", "hopeful")
+    assert local_client.get(f"/proposal/{resubmitted['session_id']}").json() == reused.json()
+    approved = local_client.post("/decision", json={"session_id": resubmitted["session_id"], "action": "approve"})
+    assert approved.json()["status"] == "APPROVED"
+
+    auto_policy = DedupPolicy(mode="auto", threshold=0.6)
+    auto_client = TestClient(create_app(str(tmp_path / "test.db"), dedup_policy=auto_policy))
+    auto = auto_client.post("/intake", json={"text": SAGA}).json()
+    assert auto["reused_from"] in {source["session_id"], resubmitted["session_id"]}
+    missing = auto_client.post(f"/intake/{auto['session_id']}/reuse", json={"source_session_id": "missing"})
+    assert missing.status_code == 409
+
+
+def test_plan_generation_does_not_overwrite_a_concurrent_change(tmp_path) -> None:
+    from backend.llm.backends import PlaceholderBackend
+    from backend.storage.sqlite import SessionsRepo
+
+    db_path = str(tmp_path / "test.db")
+
+    class InterleavingBackend:
+        name = "interleaving"
+        billable = False
+
+        def __init__(self) -> None:
+            self.inner = PlaceholderBackend()
+            self.session_id: str | None = None
+
+        def complete(self, req):
+            if req.schema_name == "StoryBible" and self.session_id is not None:
+                SessionsRepo(db_path).update_session(self.session_id, status="NEEDS_CONFIRMATION")
+                self.session_id = None
+            return self.inner.complete(req)
+
+    backend = InterleavingBackend()
+    local_client = TestClient(create_app(db_path, llm_backend=backend))
+    session_id = local_client.post("/intake", json={"text": "Plan a thriller"}).json()["session_id"]
+    local_client.post("/decision", json={"session_id": session_id, "action": "approve"})
+    backend.session_id = session_id
+
+    response = local_client.get(f"/plan/{session_id}")
+
+    assert response.status_code == 409
+    stored = SessionsRepo(db_path).get_session(session_id)
+    assert (stored["status"], stored["bible_json"]) == ("NEEDS_CONFIRMATION", None)
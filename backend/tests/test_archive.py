@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend.storage.archive import ArchivePolicy, Archiver, parse_ttls
+from backend.storage.sqlite import SessionsRepo
+
+
+def _later(days: float):
+    return lambda: datetime.now(timezone.utc) + timedelta(days=days)
+
+
+def test_parse_ttls_accepts_units_and_defaults() -> None:
+    assert parse_ttls("new=12h, APPROVED=90d") == {"NEW": timedelta(hours=12), "APPROVED": timedelta(days=90)}
+    assert parse_ttls("default")["NEEDS_CONFIRMATION"] == timedelta(days=30)
+    with pytest.raises(ValueError):
+        parse_ttls("NEW=soon")
+
+
+def test_archiver_moves_cold_sessions_by_status_ttl_and_rehydrates(tmp_path) -> None:
+    repo = SessionsRepo(str(tmp_path / "state.db"))
+    cold = repo.create_session("Abandoned idea")
+    waiting = repo.create_session("Waiting for approval")
+    repo.update_session(cold, spec_json={"genre_hint": "mystery"})
+    repo.update_session(waiting, status="NEEDS_CONFIRMATION", proposal_json={"version": 1})
+    policy = ArchivePolicy(ttls={"NEW": timedelta(days=7), "NEEDS_CONFIRMATION": timedelta(days=30)})
+
+    result = Archiver(repo, policy, clock=_later(10)).run_once()
+
+    assert result["archived"] == 1
+    assert [row["session_id"] for row in repo.list_sessions()] == [waiting]
+    restored = repo.get_session(cold)
+    assert restored is not None
+    assert restored["spec_json"] == {"genre_hint": "mystery"}
+    assert restored["requirement_text"] == "Abandoned idea"
+    assert {row["session_id"] for row in repo.list_sessions()} == {cold, waiting}
+    assert Archiver(repo, policy, clock=_later(1)).run_once()["archived"] == 0
+    assert repo.get_session("missing") is None
+
+
+def test_archiver_batches_and_vacuums_incrementally(tmp_path) -> None:
+    repo = SessionsRepo(str(tmp_path / "state.db"))
+    for idx in range(30):
+        session_id = repo.create_session(f"Idea {idx}")
+        repo.update_session(session_id, proposal_json={"payload": "x" * 8000})
+    archiver = Archiver(repo, ArchivePolicy(ttls={"NEW": timedelta(days=1)}, batch_size=10), clock=_later(2))
+
+    first = archiver.run_once()
+    archiver.run_once()
+    archiver.run_once()
+
+    assert first["archived"] == 10
+    assert first["vacuumed_pages"] > 0
+    assert repo.list_sessions() == []
+
+
+def test_existing_database_is_migrated_to_incremental_auto_vacuum(tmp_path) -> None:
+    import sqlite3
+
+    path = tmp_path / "legacy.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE legacy (value TEXT)")
+        conn.executemany("INSERT INTO legacy VALUES (?)", [("x" * 4000,) for _ in range(50)])
+    SessionsRepo(str(path))
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        conn.execute("DELETE FROM legacy")
+
+    assert SessionsRepo(str(path)).incremental_vacuum(1000) > 0
+
+
+def test_archive_moves_chapter_drafts_with_their_session(tmp_path) -> None:
+    repo = SessionsRepo(str(tmp_path / "state.db"))
+    session_id = repo.create_session("Abandoned saga")
+    repo.save_draft(session_id, outline_version=1, draft_json={"index": 1, "summary": "a"}, tokens=5)
+
+    Archiver(repo, ArchivePolicy(ttls={"NEW": timedelta(days=1)}), clock=_later(2)).run_once()
+
+    assert repo.list_drafts(session_id, outline_version=1) == []
+    assert repo.get_session(session_id) is not None
+    restored = repo.list_drafts(session_id, outline_version=1)
+    assert [(row["chapter_index"], row["tokens"]) for row in restored] == [(1, 5)]
+
+
+def test_archived_sessions_leave_the_requirement_index(tmp_path) -> None:
+    from backend.storage.dedup import DedupPolicy, RequirementIndex
+
+    repo = SessionsRepo(str(tmp_path / "state.db"))
+    requirements = RequirementIndex(repo.db_path, DedupPolicy())
+    text = "A dark fantasy novel about a young thief who steals a cursed crown from the royal palace"
+    cold = repo.create_session(text)
+    repo.update_session(cold, status="APPROVED")
+    requirements.add(cold, text)
+    policy = ArchivePolicy(ttls={"APPROVED": timedelta(days=1)})
+
+    assert Archiver(repo, policy, clock=_later(2), requirements=requirements).run_once()["archived"] == 1
+
+    assert requirements.similar(text) == []
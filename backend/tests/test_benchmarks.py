@@ -0,0 +1,78 @@
+import importlib.util
+
+import pytest
+
+HAS_FASTAPI = importlib.util.find_spec("fastapi") is not None and importlib.util.find_spec("uvicorn") is not None
+pytestmark = pytest.mark.skipif(not HAS_FASTAPI, reason="fastapi and uvicorn are not installed in this environment")
+
+if HAS_FASTAPI:
+    from benchmarks.dedup import run_dedup
+    from benchmarks.importtime import IMPORT_BUDGETS, measure
+    from benchmarks.listing import run_listing
+    from benchmarks.prompt_context import run_prompt_context
+    from benchmarks.scaling import run_scaling
+    from benchmarks.storage import run_store
+    from benchmarks.workflow import compare, percentile, run_benchmark
+
+
+def test_percentile_uses_nearest_rank() -> None:
+    values = [float(idx) for idx in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 95) == 0.0
+
+
+def test_workflow_benchmark_smoke(tmp_path) -> None:
+    run = run_benchmark(mode="inprocess", sessions=2, concurrency=2, latency="none", db_path=str(tmp_path / "b.db"))
+
+    assert run["endpoints"]["GET /plan"]["count"] == 2
+    assert all(stats["errors"] == 0 for stats in run["endpoints"].values())
+    assert run["sqlite"]["operations"]["create_session"]["count"] == 2
+    assert compare({"runs": [run]}, {"runs": [run]})
+
+
+def test_scaling_benchmark_smoke() -> None:
+    runs = run_scaling(workers=[1, 2], sessions=2, concurrency=2, latency="none")
+
+    assert [run["workers"] for run in runs] == [1, 2]
+    assert all(run["errors"] == 0 for run in runs)
+    assert runs[0]["speedup"] == 1.0
+
+
+def test_storage_benchmark_smoke(tmp_path) -> None:
+    run = run_store(name="sqlite", url=str(tmp_path / "s.db"), sessions=3, concurrency=2)
+
+    assert run["operations"]["save_plan"]["count"] == 3
+    assert run["operations_per_s"] > 0
+
+
+def test_listing_benchmark_smoke(tmp_path) -> None:
+    run = run_listing(rows=500, blob_bytes=16, repeats=2, db_path=str(tmp_path / "l.db"), compare_unindexed=True)
+
+    assert set(run["indexed"]) == set(run["unindexed"])
+    assert run["indexed"]["first_page"]["count"] == 2
+
+
+def test_prompt_context_benchmark_reports_token_reduction() -> None:
+    run = run_prompt_context(chapters=6, characters=12, top_k=4)
+
+    assert run["retrieved_prompt_tokens"]["mean"] < run["full_prompt_tokens"]["mean"]
+    assert run["token_reduction"] > 0.3
+    assert run["character_recall"] == 1.0
+    assert run["foreshadowing_recall"] == 1.0
+
+
+def test_dedup_benchmark_finds_resubmissions(tmp_path) -> None:
+    run = run_dedup(rows=200, lookups=5, db_path=str(tmp_path / "d.db"), compare_scan=True)
+
+    assert run["recall"] == 1.0
+    assert run["near_duplicate_lookup"]["count"] == 5
+    assert run["linear_scan"]["count"] == 3
+
+
+def test_importtime_keeps_heavy_modules_out_of_app_import() -> None:
+    budget = next(budget for budget in IMPORT_BUDGETS if budget.module == "backend.app")
+    result = measure(budget, runs=1)
+
+    assert result["forbidden_loaded"] == []
+    assert result["median_ms"] > 0
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import importlib.util
+import time
+
+import pytest
+
+HAS_PYDANTIC = importlib.util.find_spec("pydantic") is not None
+pytestmark = pytest.mark.skipif(not HAS_PYDANTIC, reason="pydantic is required in this environment")
+
+if HAS_PYDANTIC:
+    from backend.graph import placeholder
+    from backend.graph.consistency import build_outline_index, prepare_plan, validate_plan
+    from backend.graph.schemas import ForeshadowingRow, OutlineFull, StoryBible
+    from backend.llm.backends import CompletionRequest, PlaceholderBackend
+    from backend.llm.client import LLMClient
+    from benchmarks.prompt_context import synthetic_plan
+
+
+class CountingBackend:
+    name = "counting"
+    billable = False
+
+    def __init__(self) -> None:
+        self.inner = PlaceholderBackend()
+        self.schemas: list[str] = []
+
+    def complete(self, req: "CompletionRequest") -> str:
+        self.schemas.append(req.schema_name)
+        return self.inner.complete(req)
+
+
+def _plan() -> tuple[StoryBible, OutlineFull]:
+    spec = placeholder.analyze_requirement("A long fantasy saga about a thief")
+    bible = placeholder.story_bible(spec)
+    return bible, placeholder.outline_full(bible, spec)
+
+
+def test_index_maps_entities_to_chapters() -> None:
+    bible, outline = _plan()
+
+    index = build_outline_index(outline)
+
+    assert index.character_chapters == {
+        entry.name: [chapter.index for chapter in outline.chapters if entry.name in chapter.characters_involved]
+        for entry in bible.characters
+    }
+    assert index.foreshadowing_rows == {"F1": 0}
+    assert validate_plan(bible, outline, index) == []
+
+
+def test_validator_reports_each_broken_reference() -> None:
+    bible, outline = _plan()
+    outline.chapters[2].characters_involved.append("Ghost")
+    outline.chapters[3].foreshadowing_in.append("F9")
+    outline.chapters[4].foreshadowing_out.append("F1")
+    outline.foreshadowing_table.append(
+        ForeshadowingRow(id="F2", setup_chapter=6, payoff_chapter=2, description="a map", evidence_style="object")
+    )
+
+    violations = {(violation.kind, violation.chapter) for violation in validate_plan(bible, outline)}
+
+    assert violations == {
+        ("unknown_character", 3),
+        ("unknown_foreshadowing", 4),
+        ("foreshadowing_mismatch", 5),
+        ("foreshadowing_order", None),
+        ("foreshadowing_unreferenced", 6),
+        ("foreshadowing_unreferenced", 2),
+    }
+
+
+def test_prepare_plan_regenerates_only_violating_chapters() -> None:
+    bible, outline = _plan()
+    outline.chapters[2].characters_involved.append("Ghost")
+    outline.chapters[0].foreshadowing_in = []
+    untouched = [chapter for chapter in outline.chapters if chapter.index not in (1, 3)]
+    backend = CountingBackend()
+
+    repaired, index, violations = prepare_plan(bible, outline, LLMClient(backend=backend))
+
+    assert violations == []
+    assert backend.schemas == ["OutlineChapter", "OutlineChapter"]
+    assert [chapter for chapter in repaired.chapters if chapter.index not in (1, 3)] == untouched
+    assert "Ghost" not in index.character_chapters
+    assert repaired.chapters[0].foreshadowing_in == ["F1"]
+
+
+def test_validator_scales_linearly() -> None:
+    timings = []
+    for chapters in (200, 1600):
+        bible, outline = synthetic_plan(chapters=chapters, characters=chapters // 4)
+        index = build_outline_index(outline)
+        runs = []
+        for _ in range(3):
+            started = time.perf_counter()
+            assert validate_plan(bible, outline, index) == []
+            runs.append(time.perf_counter() - started)
+        timings.append(min(runs))
+
+    assert timings[1] < timings[0] * 8 * 4
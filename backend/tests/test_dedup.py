@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import pytest
+
+from backend.storage.dedup import DedupPolicy, RequirementIndex, shingles
+
+TEMPLATE = (
+    "Write a dark fantasy novel about a young thief who steals a cursed crown from the royal palace "
+    "and must return it before the new moon, told in first person with a bittersweet ending."
+)
+
+
+def test_near_duplicate_requirements_are_found_by_lsh(tmp_path) -> None:
+    index = RequirementIndex(tmp_path / "lsh.db", DedupPolicy(threshold=0.6))
+    index.add("template", TEMPLATE)
+    index.add("other", "A cozy mystery about a baker who solves murders in a quiet seaside village.")
+
+    resubmitted = (
+        "  WRITE a dark fantasy novel about a young thief who steals a cursed crown from the royal palace, "
+        "and must return it before the new moon -- told in first person with a hopeful ending!"
+    )
+    matches = index.similar(resubmitted)
+
+    assert [session_id for session_id, _ in matches] == ["template"]
+    assert matches[0][1] >= 0.6
+    assert index.similar("Hard science fiction about asteroid miners negotiating a strike.") == []
+    assert index.similar("") == []
+
+
+def test_reindexing_a_session_replaces_its_signature(tmp_path) -> None:
+    index = RequirementIndex(tmp_path / "lsh.db", DedupPolicy())
+    index.add("s1", TEMPLATE)
+    index.add("s1", "A cozy mystery about a baker who solves murders in a quiet seaside village.")
+
+    assert index.similar(TEMPLATE) == []
+    assert index.similar("A cozy mystery about a baker who solves murders in a quiet seaside village.") == [
+        ("s1", 1.0)
+    ]
+
+
+def test_policy_parse_and_shingles() -> None:
+    assert DedupPolicy.parse("auto,0.85") == DedupPolicy(mode="auto", threshold=0.85)
+    assert DedupPolicy.parse("suggest").threshold == DedupPolicy.threshold
+    with pytest.raises(ValueError):
+        DedupPolicy.parse("always")
+    assert shingles("One, two!", 3) == {b"one two"}
+
+
+def test_backfill_indexes_approved_sessions_once_and_remove_drops_them(tmp_path) -> None:
+    from backend.storage.sqlite import SessionsRepo
+
+    repo = SessionsRepo(str(tmp_path / "state.db"))
+    index = RequirementIndex(repo.db_path, DedupPolicy())
+    approved = []
+    for idx in range(5):
+        session_id = repo.create_session(f"{TEMPLATE} Variant number {idx}.")
+        repo.update_session(session_id, status="APPROVED")
+        approved.append(session_id)
+    repo.create_session(TEMPLATE)
+
+    assert index.backfill(repo, batch_size=2) == 5
+    assert index.backfill(repo, batch_size=2) == 0
+    assert {session_id for session_id, _ in index.similar(TEMPLATE)} == set(approved)
+
+    assert index.remove(approved[:4]) == 4
+    assert [session_id for session_id, _ in index.similar(TEMPLATE)] == approved[4:]
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import importlib.util
+import threading
+import time
+
+import pytest
+
+HAS_PYDANTIC = importlib.util.find_spec("pydantic") is not None
+pytestmark = pytest.mark.skipif(not HAS_PYDANTIC, reason="pydantic is required in this environment")
+
+if HAS_PYDANTIC:
+    from backend.graph import placeholder
+    from backend.graph.drafting import ChapterDrafter, DraftPolicy, chapter_dependencies
+    from backend.graph.retrieval import PlanIndex
+    from backend.graph.schemas import OutlineChapter, OutlineFull, StoryBible
+    from backend.llm.backends import CompletionRequest, PlaceholderBackend
+    from backend.llm.client import LLMClient
+    from backend.storage.sqlite import SessionsRepo
+
+
+class ScriptedBackend:
+    name = "scripted"
+    billable = False
+
+    def __init__(self, fail_chapter: int | None = None, delay_s: float = 0.0) -> None:
+        self.inner = PlaceholderBackend()
+        self.fail_chapter = fail_chapter
+        self.delay_s = delay_s
+        self.prompts: dict[int, str] = {}
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def complete(self, req: "CompletionRequest") -> str:
+        chapter = OutlineChapter.model_validate_json(req.user_prompt.split("Chapter:\n", 1)[1].split("\nRelevant")[0])
+        with self._lock:
+            self.prompts[chapter.index] = req.user_prompt
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay_s)
+            if chapter.index == self.fail_chapter:
+                raise RuntimeError("backend unavailable")
+            return self.inner.complete(req)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def _plan(chapters: int = 8) -> tuple[StoryBible, OutlineFull]:
+    spec = placeholder.analyze_requirement("A long fantasy saga about a thief")
+    bible = placeholder.story_bible(spec)
+    outline = placeholder.outline_full(bible, spec)
+    beats = (outline.chapters * (chapters // len(outline.chapters) + 1))[:chapters]
+    last = len(beats)
+    outline.chapters = [beat.model_copy(update={"index": index}) for index, beat in enumerate(beats, start=1)]
+    outline.foreshadowing_table[0].payoff_chapter = last
+    return bible, outline
+
+
+def _two_threads(outline: OutlineFull) -> None:
+    for chapter in outline.chapters:
+        thread = "A" if chapter.index % 2 else "B"
+        chapter.characters_involved = [f"{thread} lead"]
+        chapter.locations = [f"{thread} city"]
+        chapter.foreshadowing_out = []
+    outline.foreshadowing_table = []
+
+
+def test_independent_chapters_draft_in_parallel_and_resume(tmp_path) -> None:
+    bible, outline = _plan()
+    _two_threads(outline)
+    dependencies = chapter_dependencies(outline)
+    assert dependencies[1] == dependencies[2] == ()
+    assert dependencies[3] == (1,) and dependencies[4] == (2,)
+    repo = SessionsRepo(str(tmp_path / "state.db"))
+    session_id = repo.create_session("A long fantasy saga")
+
+    failing = ScriptedBackend(fail_chapter=5, delay_s=0.05)
+    drafter = ChapterDrafter(repo, LLMClient(backend=failing, max_retries=1), DraftPolicy(workers=2))
+    with pytest.raises(RuntimeError):
+        drafter.draft(session_id, bible, outline, outline_version=1)
+    assert failing.peak == 2
+    saved = {row["chapter_index"] for row in repo.list_drafts(session_id, outline_version=1)}
+    assert {1, 2, 3} <= saved and 5 not in saved
+
+    resumed = ScriptedBackend()
+    book = ChapterDrafter(repo, LLMClient(backend=resumed), DraftPolicy(workers=2)).draft(
+        session_id, bible, outline, outline_version=1
+    )
+    assert [draft.index for draft in book.chapters] == list(range(1, 9))
+    assert not saved & set(resumed.prompts)
+    assert "Chapter 3:" in resumed.prompts[5].split("Story so far:\n", 1)[1]
+
+
+def test_story_so_far_rolls_over_preceding_chapters_without_dependencies(tmp_path) -> None:
+    bible, outline = _plan(4)
+    _two_threads(outline)
+    assert chapter_dependencies(outline)[2] == ()
+    repo = SessionsRepo(str(tmp_path / "state.db"))
+    session_id = repo.create_session("A long fantasy saga")
+    backend = ScriptedBackend()
+
+    ChapterDrafter(repo, LLMClient(backend=backend), DraftPolicy(workers=1)).draft(
+        session_id, bible, outline, outline_version=1
+    )
+
+    assert "Chapter 1:" in backend.prompts[2].split("Story so far:\n", 1)[1]
+    assert "Chapter 2:" in backend.prompts[3].split("Story so far:\n", 1)[1]
+
+
+def test_chapter_prompts_stay_bounded_as_the_book_grows(tmp_path) -> None:
+    repo = SessionsRepo(str(tmp_path / "state.db"))
+    bible, outline = _plan(40)
+    backend = ScriptedBackend()
+    session_id = repo.create_session("A long fantasy saga")
+    policy = DraftPolicy(summary_chars=300)
+
+    book = ChapterDrafter(repo, LLMClient(backend=backend), policy).draft(session_id, bible, outline, outline_version=1)
+
+    assert len(book.chapters) == 40 and book.complete
+    assert all(len(draft.summary) <= policy.summary_chars for draft in book.chapters)
+    early = max(len(backend.prompts[index]) for index in range(2, 9))
+    late = max(len(backend.prompts[index]) for index in range(34, 41))
+    assert late <= early + 20
+
+
+def test_plan_index_retrieves_entries_for_the_chapter() -> None:
+    bible, outline = _plan()
+    extras = enumerate(bible.characters * 5)
+    bible.characters += [entry.model_copy(update={"name": f"Extra {idx}", "relationships": []}) for idx, entry in extras]
+    chapter = outline.chapters[-1].model_copy(update={"characters_involved": ["Antagonist"]})
+
+    context = PlanIndex(bible, outline).chapter_context(chapter, top_k=2)
+
+    assert context["characters"][0]["name"] == "Antagonist"
+    assert len(context["characters"]) == 2
+    assert [row["id"] for row in context["foreshadowing"]] == ["F1"]
+    assert len(str(context)) < len(bible.model_dump_json())
+
+
+def test_plan_index_always_includes_listed_characters_beyond_top_k() -> None:
+    bible, outline = _plan()
+    extras = enumerate(bible.characters * 5)
+    bible.characters += [entry.model_copy(update={"name": f"Extra {idx}", "relationships": []}) for idx, entry in extras]
+    listed = [entry.name for entry in bible.characters[::4]][:5]
+    chapter = outline.chapters[0].model_copy(update={"characters_involved": [*listed, "Ghost"]})
+
+    context = PlanIndex(bible, outline).chapter_context(chapter, top_k=2)
+
+    assert [entry["name"] for entry in context["characters"]] == listed
+    assert [row["id"] for row in context["foreshadowing"]] == chapter.foreshadowing_in + chapter.foreshadowing_out
+    assert {arc["character"] for arc in context["character_arcs"]} >= {
+        arc.character for arc in outline.character_arcs if arc.character in listed
+    }
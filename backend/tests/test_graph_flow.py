@@ -13,8 +13,22 @@ pytestmark = pytest.mark.skipif(
 if HAS_PYDANTIC and HAS_LANGGRAPH:
     from backend.graph.graph import ProposalGraphService
     from backend.llm.client import LLMClient
+    from backend.storage.base import SessionConflict
     from backend.storage.sqlite import SessionsRepo
 
+    class CountingClient(LLMClient):
+        def __init__(self) -> None:
+            super().__init__(api_key=None)
+            self.calls: list[str] = []
+
+        def generate_json(self, *, system_prompt: str, user_prompt: str, schema_name: str) -> dict:
+            self.calls.append(schema_name)
+            return super().generate_json(system_prompt=system_prompt, user_prompt=user_prompt, schema_name=schema_name)
+
+        def take(self) -> list[str]:
+            calls, self.calls = self.calls, []
+            return calls
+
 
 @pytest.mark.skipif(not (HAS_PYDANTIC and HAS_LANGGRAPH), reason="pydantic and langgraph are required in this environment")
 def test_edit_loops_back_and_increments_version(tmp_path) -> None:
@@ -47,3 +61,182 @@ def test_approve_reaches_terminal_status(tmp_path) -> None:
     stored = repo.get_session(session_id)
     assert stored is not None
     assert stored["status"] == "APPROVED"
+
+
+@pytest.mark.skipif(not (HAS_PYDANTIC and HAS_LANGGRAPH), reason="pydantic and langgraph are required in this environment")
+def test_interrupted_proposal_resumes_from_last_completed_node(tmp_path) -> None:
+    class FlakyClient(LLMClient):
+        def __init__(self) -> None:
+            super().__init__(api_key=None)
+            self.calls: list[str] = []
+            self.fail_outline = True
+
+        def generate_json(self, *, system_prompt: str, user_prompt: str, schema_name: str) -> dict:
+            self.calls.append(schema_name)
+            if schema_name == "OutlineLite" and self.fail_outline:
+                self.fail_outline = False
+                raise RuntimeError("worker died")
+            return super().generate_json(system_prompt=system_prompt, user_prompt=user_prompt, schema_name=schema_name)
+
+    repo = SessionsRepo(str(tmp_path / "state.db"))
+    client = FlakyClient()
+    service = ProposalGraphService(repo=repo, client=client)
+    session_id = repo.create_session("Plan a short thriller")
+
+    with pytest.raises(RuntimeError):
+        service.run_proposal(session_id)
+    resumed = ProposalGraphService(repo=repo, client=client).run_proposal(session_id)
+
+    assert client.calls == ["RequirementSpec", "ExpansionResult", "OutlineLite", "OutlineLite"]
+    assert resumed.status.value == "NEEDS_CONFIRMATION"
+    assert len(list(service.checkpointer.list(None))) == 1
+
+
+@pytest.mark.skipif(not (HAS_PYDANTIC and HAS_LANGGRAPH), reason="pydantic and langgraph are required in this environment")
+def test_decisions_resume_the_paused_graph_with_minimal_llm_calls(tmp_path) -> None:
+    repo = SessionsRepo(str(tmp_path / "state.db"))
+    client = CountingClient()
+    service = ProposalGraphService(repo=repo, client=client)
+    session_id = repo.create_session("Plan a short thriller")
+    full_run = ["RequirementSpec", "ExpansionResult", "OutlineLite"]
+
+    service.run_proposal(session_id)
+    assert client.take() == full_run
+
+    service.apply_decision(session_id, action="edit", text="Use first person perspective")
+    assert client.take() == full_run
+
+    reset = service.apply_decision(session_id, action="reset")
+    assert client.take() == full_run
+    assert reset.version == 1
+
+    approved = service.apply_decision(session_id, action="approve")
+    assert client.take() == []
+    assert approved.status.value == "APPROVED"
+    assert list(service.checkpointer.list(None)) == []
+
+
+@pytest.mark.skipif(not (HAS_PYDANTIC and HAS_LANGGRAPH), reason="pydantic and langgraph are required in this environment")
+def test_decision_rehydrates_pause_from_stored_session(tmp_path) -> None:
+    repo = SessionsRepo(str(tmp_path / "state.db"))
+    client = CountingClient()
+    service = ProposalGraphService(repo=repo, client=client)
+    session_id = repo.create_session("Plan a novel")
+    service.run_proposal(session_id)
+    service.checkpointer.delete_thread(session_id)
+    client.take()
+
+    approved = ProposalGraphService(repo=repo, client=client).apply_decision(session_id, action="approve")
+
+    assert client.take() == []
+    assert approved.status.value == "APPROVED"
+    assert service.apply_decision(session_id, action="approve").status.value == "APPROVED"
+    assert client.take() == []
+
+
+@pytest.mark.skipif(not (HAS_PYDANTIC and HAS_LANGGRAPH), reason="pydantic and langgraph are required in this environment")
+def test_decisions_outside_a_pause_follow_the_stored_session(tmp_path) -> None:
+    repo = SessionsRepo(str(tmp_path / "state.db"))
+    client = CountingClient()
+    service = ProposalGraphService(repo=repo, client=client)
+    full_run = ["RequirementSpec", "ExpansionResult", "OutlineLite"]
+
+    fresh = repo.create_session("Plan a novel")
+    approved = service.apply_decision(fresh, action="approve")
+    assert client.take() == full_run
+    assert (approved.status.value, approved.version) == ("APPROVED", 1)
+
+    reopened = service.apply_decision(fresh, action="edit", text="Use first person perspective")
+    assert client.take() == full_run
+    assert (reopened.status.value, reopened.version) == ("NEEDS_CONFIRMATION", 2)
+
+
+@pytest.mark.skipif(not (HAS_PYDANTIC and HAS_LANGGRAPH), reason="pydantic and langgraph are required in this environment")
+def test_decision_finishes_pending_run_and_rejects_when_it_changed_the_proposal(tmp_path) -> None:
+    class FlakyClient(CountingClient):
+        fail_expand = False
+
+        def generate_json(self, *, system_prompt: str, user_prompt: str, schema_name: str) -> dict:
+            if schema_name == "ExpansionResult" and self.fail_expand:
+                self.fail_expand = False
+                raise RuntimeError("worker died")
+            return super().generate_json(system_prompt=system_prompt, user_prompt=user_prompt, schema_name=schema_name)
+
+    repo = SessionsRepo(str(tmp_path / "state.db"))
+    client = FlakyClient()
+    service = ProposalGraphService(repo=repo, client=client)
+    session_id = repo.create_session("Plan a short thriller")
+    service.run_proposal(session_id)
+    client.fail_expand = True
+    with pytest.raises(RuntimeError):
+        service.apply_decision(session_id, action="edit", text="Use first person perspective")
+    client.take()
+
+    with pytest.raises(SessionConflict):
+        service.apply_decision(session_id, action="approve")
+    assert client.take() == ["ExpansionResult", "OutlineLite"]
+    assert (repo.get_session(session_id)["status"], repo.get_session(session_id)["version"]) == ("NEEDS_CONFIRMATION", 2)
+
+    approved = service.apply_decision(session_id, action="approve")
+    assert (approved.status.value, approved.version) == ("APPROVED", 2)
+    assert client.take() == []
+
+
+@pytest.mark.skipif(not (HAS_PYDANTIC and HAS_LANGGRAPH), reason="pydantic and langgraph are required in this environment")
+def test_concurrent_write_aborts_run_before_next_llm_stage(tmp_path) -> None:
+    repo = SessionsRepo(str(tmp_path / "state.db"))
+    client = CountingClient()
+    service = ProposalGraphService(repo=repo, client=client)
+    session_id = repo.create_session("Plan a short thriller")
+    service.run_proposal(session_id)
+    client.take()
+
+    class RacingClient(CountingClient):
+        def generate_json(self, *, system_prompt: str, user_prompt: str, schema_name: str) -> dict:
+            if schema_name == "RequirementSpec":
+                repo.update_session(session_id, edit_text="written by a concurrent request")
+            return super().generate_json(system_prompt=system_prompt, user_prompt=user_prompt, schema_name=schema_name)
+
+    racing = RacingClient()
+    with pytest.raises(SessionConflict):
+        ProposalGraphService(repo=repo, client=racing).apply_decision(session_id, action="edit", text="First person")
+
+    assert racing.take() == ["RequirementSpec"]
+    assert repo.get_session(session_id)["version"] == 1
+    assert service.apply_decision(session_id, action="approve").status.value == "APPROVED"
+    assert client.take() == []
+
+
+@pytest.mark.skipif(not (HAS_PYDANTIC and HAS_LANGGRAPH), reason="pydantic and langgraph are required in this environment")
+def test_latest_checkpoint_lookup_limits_rows_in_sql(tmp_path) -> None:
+    from contextlib import contextmanager
+
+    from langgraph.checkpoint.base import empty_checkpoint
+
+    from backend.storage.checkpoint import SqliteCheckpointSaver
+
+    class TracingRepo(SessionsRepo):
+        statements: list[str] = []
+
+        @contextmanager
+        def _connect(self, *, write: bool = False):
+            with super()._connect(write=write) as conn:
+                conn.set_trace_callback(self.statements.append)
+                yield conn
+
+    saver = SqliteCheckpointSaver(TracingRepo(str(tmp_path / "state.db")))
+    config = {"configurable": {"thread_id": "s1", "checkpoint_ns": ""}}
+    ids = []
+    for _ in range(5):
+        checkpoint = empty_checkpoint()
+        ids.append(checkpoint["id"])
+        config = saver.put(config, checkpoint, {"step": len(ids)}, {})
+    TracingRepo.statements.clear()
+
+    latest = saver.get_tuple({"configurable": {"thread_id": "s1", "checkpoint_ns": ""}})
+
+    assert latest is not None and latest.config["configurable"]["checkpoint_id"] == max(ids)
+    selects = [sql for sql in TracingRepo.statements if "FROM graph_checkpoints" in sql]
+    assert selects and all("LIMIT" in sql for sql in selects)
+    assert [item.metadata["step"] for item in saver.list(None, filter={"step": 2})] == [2]
+    assert len(list(saver.list(None, limit=3))) == 3
@@ -0,0 +1,370 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+import random
+import threading
+import time
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+HAS_PYDANTIC = importlib.util.find_spec("pydantic") is not None
+pytestmark = pytest.mark.skipif(not HAS_PYDANTIC, reason="pydantic is not installed in this environment")
+
+if HAS_PYDANTIC:
+    from backend.graph.nodes_llm import analyze, build_proposal, freeze_bible_node, plan_book_node
+    from backend.graph.schemas import ProposalStatus
+    from backend.llm.backends import (
+        BackendSaturated,
+        Completion,
+        CompletionRequest,
+        FailoverBackend,
+        LatencyModel,
+        OpenAIHTTPBackend,
+        PlaceholderBackend,
+        RecordingBackend,
+        ReplayBackend,
+        TokenUsage,
+        build_backend,
+        read_cassette,
+        request_key,
+    )
+    from backend.llm.client import LLMClient
+    from backend.llm.deadline import Deadline, RequestCancelled, deadline_scope
+    from backend.llm.hedging import HedgeBudget, HedgePolicy, LatencyWindow
+    from backend.llm.scheduler import LLMScheduler, SchedulerPolicy
+    from backend.observability.metrics import metrics
+
+    class SaturatedBackend:
+        name = "saturated"
+        billable = True
+
+        def complete(self, req: CompletionRequest) -> str:
+            raise BackendSaturated("LLM request failed with status 429")
+
+
+def test_placeholder_backend_drives_full_plan() -> None:
+    client = LLMClient(api_key=None, backend=PlaceholderBackend())
+
+    proposal = build_proposal("A dark magic heist", version=1, status=ProposalStatus.APPROVED, client=client)
+    bible = freeze_bible_node(spec=proposal.requirement_spec, proposal=proposal, client=client)
+    outline = plan_book_node(bible=bible, spec=proposal.requirement_spec, client=client)
+
+    assert proposal.requirement_spec.genre_hint == "fantasy"
+    assert bible.tone == "dark"
+    assert len(outline.chapters) == 8
+    assert client.outcome_counts()["success"] == 5
+    assert all(stats.cost_usd == 0 for stats in client.route_stats.values())
+
+
+def test_failover_backend_serves_locally_when_primary_saturated() -> None:
+    backend = FailoverBackend(SaturatedBackend(), PlaceholderBackend())
+    client = LLMClient(api_key="test-key", backend=backend)
+
+    spec = analyze("A murder on the night train", client=client)
+
+    assert spec.genre_hint == "mystery"
+    assert backend.failovers == 1
+
+
+def test_replay_backend_serves_recorded_responses(tmp_path) -> None:
+    req = CompletionRequest(
+        system_prompt="s",
+        user_prompt="u",
+        schema_name="ExpansionResult",
+        model_name="gpt-4o-mini",
+        timeout_s=30,
+        temperature=0,
+        response_format={"type": "json_object"},
+    )
+    cassette = tmp_path / "cassette.jsonl"
+    cassette.write_text(json.dumps({"key": request_key(req), "response": '{"ok": true}'}) + "\n", encoding="utf-8")
+
+    backend = ReplayBackend.from_file(cassette)
+
+    assert backend.complete(req) == '{"ok": true}'
+    with pytest.raises(RuntimeError):
+        backend.complete(CompletionRequest(**{**req.__dict__, "user_prompt": "other"}))
+    for change in ({"model_name": "gpt-4o"}, {"max_tokens": 256}):
+        with pytest.raises(RuntimeError):
+            backend.complete(CompletionRequest(**{**req.__dict__, **change}))
+
+
+def test_build_backend_selects_by_name() -> None:
+    assert isinstance(build_backend("", api_key=""), PlaceholderBackend)
+    assert isinstance(build_backend("openai", api_key="k"), OpenAIHTTPBackend)
+    assert isinstance(build_backend("failover", api_key="k"), FailoverBackend)
+    with pytest.raises(ValueError):
+        build_backend("bogus", api_key="k")
+
+
+def test_recorded_cassette_replays_flow_with_recorded_latency(tmp_path) -> None:
+    cassette = tmp_path / "flow.jsonl.gz"
+    recorder = LLMClient(api_key=None, backend=RecordingBackend(PlaceholderBackend(), cassette))
+    recorded = build_proposal("A hopeful space opera", version=1, status=ProposalStatus.APPROVED, client=recorder)
+
+    entries = read_cassette(cassette)
+    assert [entry.schema_name for entry in entries] == ["RequirementSpec", "ExpansionResult", "OutlineLite"]
+
+    delays: list[float] = []
+    replay = ReplayBackend.from_file(cassette, latency=LatencyModel.parse("recorded:2"), sleep=delays.append)
+    replayed = build_proposal(
+        "A hopeful space opera",
+        version=1,
+        status=ProposalStatus.APPROVED,
+        client=LLMClient(api_key=None, backend=replay),
+    )
+
+    assert replayed == recorded
+    assert delays == [entry.latency_s * 2 for entry in entries if entry.latency_s > 0]
+    assert replay.misses == 0
+
+
+def test_latency_model_parses_distributions() -> None:
+    rng = random.Random(7)
+    assert LatencyModel.parse("none").sample(3.0, rng) == 0.0
+    assert LatencyModel.parse("fixed:0.25").sample(3.0, rng) == 0.25
+    samples = [LatencyModel.parse("lognormal:1.0,0.5").sample(0.0, rng) for _ in range(200)]
+    assert 0.7 < sorted(samples)[100] < 1.4
+    with pytest.raises(ValueError):
+        LatencyModel.parse("fixed")
+
+
+def test_client_prefers_provider_usage_over_estimates() -> None:
+    usage = TokenUsage.from_openai(
+        {"prompt_tokens": 120, "completion_tokens": 30, "prompt_tokens_details": {"cached_tokens": 100}}
+    )
+
+    class UsageBackend:
+        name = "usage"
+        billable = True
+
+        def complete(self, req: CompletionRequest) -> str:
+            return Completion('{"expansion_suggestions":["a"],"open_questions":["b"]}', usage=usage)
+
+    client = LLMClient(api_key="test-key", backend=UsageBackend())
+    client.generate_json(system_prompt="s", user_prompt="u", schema_name="ExpansionResult")
+
+    stats = client.route_stats[("ExpansionResult", "gpt-4o-mini")]
+    assert usage == TokenUsage(prompt_tokens=120, completion_tokens=30, cached_tokens=100)
+    assert (stats.prompt_tokens, stats.completion_tokens, stats.cached_tokens) == (120, 30, 100)
+
+
+class _FakeChatServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, delays: Iterator[float]) -> None:
+        super().__init__(("127.0.0.1", 0), _FakeChatHandler)
+        self.delays = delays
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def next_delay(self) -> float:
+        with self.lock:
+            self.requests += 1
+            return next(self.delays, 0.0)
+
+
+class _FakeChatHandler(BaseHTTPRequestHandler):
+    server: _FakeChatServer
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(self.server.next_delay())
+        content = json.dumps({"expansion_suggestions": ["a"], "open_questions": ["b"]})
+        body = json.dumps({"choices": [{"message": {"content": content}}]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except BrokenPipeError:
+            pass
+
+    def log_message(self, format: str, *args: object) -> None:
+        return None
+
+
+@pytest.fixture
+def fake_chat():
+    servers = []
+
+    def start(delays: list[float]) -> tuple[_FakeChatServer, str]:
+        server = _FakeChatServer(iter(delays))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server, f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _timed_calls(client: "LLMClient", count: int) -> list[float]:
+    elapsed = []
+    for _ in range(count):
+        started = time.perf_counter()
+        client.generate_json(system_prompt="s", user_prompt="u", schema_name="ExpansionResult")
+        elapsed.append(time.perf_counter() - started)
+    return elapsed
+
+
+def test_hedged_request_beats_injected_tail_latency(fake_chat) -> None:
+    server, url = fake_chat([0.005] * 20 + [1.5, 0.005])
+    policy = HedgePolicy(percentile=90, min_samples=20, min_delay_s=0.02, budget=0.1)
+    client = LLMClient(backend=OpenAIHTTPBackend(api_key="test", url=url), hedging=policy)
+    won_before = metrics.counter("novel_flow_llm_hedges_total", schema="ExpansionResult", outcome="hedge_won")
+
+    latencies = _timed_calls(client, 21)
+
+    assert latencies[-1] < 0.75
+    assert server.requests == 22
+    assert metrics.counter("novel_flow_llm_hedges_total", schema="ExpansionResult", outcome="hedge_won") == won_before + 1
+
+
+def test_losing_hedge_is_aborted_at_the_socket(fake_chat) -> None:
+    server, url = fake_chat([0.005] * 20 + [3.0, 0.005])
+    policy = HedgePolicy(percentile=90, min_samples=20, min_delay_s=0.02, budget=0.1)
+    client = LLMClient(backend=OpenAIHTTPBackend(api_key="test", url=url), hedging=policy)
+    cancelled_before = metrics.counter(
+        "novel_flow_cancelled_stages_total", stage="llm.ExpansionResult", reason="hedge_lost"
+    )
+    lost_before = metrics.counter("novel_flow_llm_hedges_total", schema="ExpansionResult", outcome="loser_cancelled")
+
+    _timed_calls(client, 21)
+    stats = client.route_stats[("ExpansionResult", "gpt-4o-mini")]
+    waited = time.monotonic() + 1.0
+    while time.monotonic() < waited and not stats.errors:
+        time.sleep(0.01)
+
+    assert stats.errors == 1
+    assert metrics.counter("novel_flow_llm_hedges_total", schema="ExpansionResult", outcome="loser_cancelled") == (
+        lost_before + 1
+    )
+    assert (
+        metrics.counter("novel_flow_cancelled_stages_total", stage="llm.ExpansionResult", reason="hedge_lost")
+        == cancelled_before
+    )
+
+
+def test_local_queue_time_does_not_trigger_hedges(fake_chat) -> None:
+    server, url = fake_chat([0.005] * 30)
+    policy = HedgePolicy(percentile=90, min_samples=20, min_delay_s=0.02, budget=1.0)
+    scheduler = LLMScheduler(SchedulerPolicy(concurrency=1))
+    client = LLMClient(backend=OpenAIHTTPBackend(api_key="test", url=url), hedging=policy, scheduler=scheduler)
+    _timed_calls(client, 20)
+    fired_before = metrics.counter("novel_flow_llm_hedges_total", schema="ExpansionResult", outcome="fired")
+    held = threading.Event()
+
+    def hold_slot() -> None:
+        with scheduler.slot():
+            held.set()
+            time.sleep(0.3)
+
+    holder = threading.Thread(target=hold_slot)
+    holder.start()
+    held.wait(timeout=5)
+    elapsed = _timed_calls(client, 1)
+    holder.join()
+
+    assert elapsed[0] >= 0.25
+    assert server.requests == 21
+    assert metrics.counter("novel_flow_llm_hedges_total", schema="ExpansionResult", outcome="fired") == fired_before
+    assert client.latencies.percentile("ExpansionResult", 100, min_samples=1) < 0.25
+
+
+def test_hedge_budget_limits_duplicate_requests(fake_chat) -> None:
+    server, url = fake_chat([0.005] * 20 + [0.3, 0.3, 0.005, 0.005])
+    policy = HedgePolicy(percentile=90, min_samples=20, min_delay_s=0.02, budget=0.0)
+    client = LLMClient(backend=OpenAIHTTPBackend(api_key="test", url=url), hedging=policy)
+
+    latencies = _timed_calls(client, 22)
+
+    assert min(latencies[-2:]) >= 0.3
+    assert server.requests == 22
+    assert metrics.counter("novel_flow_llm_hedges_total", schema="ExpansionResult", outcome="denied") >= 2
+
+
+def test_hedging_primitives() -> None:
+    window = LatencyWindow(4)
+    for latency in (0.5, 0.1, 0.2, 0.3, 0.4):
+        window.observe("OutlineFull", latency)
+    budget = HedgeBudget(ratio=0.5, burst=1.0)
+
+    assert window.percentile("OutlineFull", 50, min_samples=4) == 0.2
+    assert window.percentile("OutlineFull", 99, min_samples=4) == 0.4
+    assert window.percentile("StoryBible", 50, min_samples=1) is None
+    assert budget.withdraw() and not budget.withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
+    assert HedgePolicy.parse("p99,0.02") == HedgePolicy(percentile=99, budget=0.02)
+    with pytest.raises(ValueError):
+        HedgePolicy.parse("p150")
+
+
+def test_cancellation_aborts_in_flight_http_call(fake_chat) -> None:
+    server, url = fake_chat([5.0])
+    client = LLMClient(backend=OpenAIHTTPBackend(api_key="test", url=url), max_retries=1)
+    deadline = Deadline()
+    outcome: list[BaseException] = []
+
+    def call() -> None:
+        with deadline_scope(deadline):
+            try:
+                client.generate_json(system_prompt="s", user_prompt="u", schema_name="ExpansionResult")
+            except RequestCancelled as exc:
+                outcome.append(exc)
+
+    worker = threading.Thread(target=call)
+    started = time.perf_counter()
+    worker.start()
+    while server.requests == 0 and time.perf_counter() - started < 2:
+        time.sleep(0.01)
+    deadline.cancel("disconnected")
+    worker.join(timeout=2)
+
+    assert not worker.is_alive()
+    assert time.perf_counter() - started < 2
+    assert [exc.reason for exc in outcome] == ["disconnected"]
+
+
+def test_deadline_skips_calls_that_cannot_finish() -> None:
+    class SlowBackend:
+        name = "slow"
+        billable = False
+        calls = 0
+
+        def complete(self, req: CompletionRequest) -> str:
+            SlowBackend.calls += 1
+            time.sleep(0.1)
+            return '{"expansion_suggestions":["a"],"open_questions":["b"]}'
+
+    client = LLMClient(backend=SlowBackend())
+    client.generate_json(system_prompt="s", user_prompt="u", schema_name="ExpansionResult")
+
+    with deadline_scope(Deadline(0.05)), pytest.raises(RequestCancelled) as cancelled:
+        client.generate_json(system_prompt="s", user_prompt="u", schema_name="ExpansionResult")
+
+    assert SlowBackend.calls == 1
+    assert cancelled.value.reason == "deadline"
+    assert cancelled.value.stage == "llm.ExpansionResult"
+
+
+def test_child_deadline_follows_parent_until_detached() -> None:
+    parent = Deadline(30)
+    linked, detached = parent.child(), parent.child()
+    detached.detach()
+
+    linked.cancel("hedge_lost")
+    assert not parent.cancelled()
+    parent.cancel("disconnected")
+
+    assert linked.expires_at == parent.expires_at
+    assert linked.reason == "hedge_lost"
+    assert not detached.cancelled()
+    assert parent.child().reason == "disconnected"
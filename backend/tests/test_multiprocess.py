@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import importlib.util
+import threading
+import time
+
+import pytest
+
+HAS_PYDANTIC = importlib.util.find_spec("pydantic") is not None
+HAS_LANGGRAPH = importlib.util.find_spec("langgraph") is not None
+pytestmark = pytest.mark.skipif(
+    not (HAS_PYDANTIC and HAS_LANGGRAPH), reason="pydantic and langgraph are required in this environment"
+)
+
+if HAS_PYDANTIC and HAS_LANGGRAPH:
+    from backend.graph.graph import ProposalGraphService
+    from backend.llm.backends import CompletionRequest, PlaceholderBackend
+    from backend.llm.cache import CachingBackend, ResponseCache
+    from backend.llm.client import LLMClient
+    from backend.storage.coordination import FileLease, SingleFlight
+    from backend.storage.sqlite import SessionsRepo
+
+    class SlowClient(LLMClient):
+        def __init__(self) -> None:
+            super().__init__(api_key=None)
+            self.calls: list[str] = []
+
+        def generate_json(self, *, system_prompt: str, user_prompt: str, schema_name: str) -> dict:
+            self.calls.append(schema_name)
+            time.sleep(0.05)
+            return super().generate_json(system_prompt=system_prompt, user_prompt=user_prompt, schema_name=schema_name)
+
+
+def test_file_lease_reports_contention(tmp_path) -> None:
+    lease = FileLease(tmp_path / "write.lock")
+    entered = threading.Event()
+    results: list[bool] = []
+
+    def contender() -> None:
+        entered.wait()
+        with FileLease(tmp_path / "write.lock").hold() as waited:
+            results.append(waited)
+
+    thread = threading.Thread(target=contender)
+    thread.start()
+    with lease.hold() as waited:
+        entered.set()
+        time.sleep(0.1)
+    thread.join()
+
+    assert waited is False
+    assert results == [True]
+    assert lease.stats()["acquired"] == 1
+
+
+def test_response_cache_is_shared_between_backends(tmp_path) -> None:
+    req = CompletionRequest(
+        system_prompt="s",
+        user_prompt="Input text:\nA murder on the night train",
+        schema_name="RequirementSpec",
+        model_name="gpt-4o-mini",
+        timeout_s=30,
+        temperature=0,
+        response_format={"type": "json_object"},
+    )
+    first = CachingBackend(PlaceholderBackend(), ResponseCache(tmp_path / "cache.db"))
+    second = CachingBackend(PlaceholderBackend(), ResponseCache(tmp_path / "cache.db"))
+
+    response = first.complete(req)
+
+    assert second.complete(req) == response
+    assert second.stats() == {"hits": 1, "misses": 0, "bypassed": 0}
+    assert len(second.cache) == 1
+
+
+def test_fresh_scope_bypasses_cache_reads_and_keys_cover_request_shape(tmp_path) -> None:
+    from dataclasses import replace
+
+    from backend.llm.cache import cache_key, fresh_responses_scope
+
+    class CountingBackend(PlaceholderBackend):
+        calls = 0
+
+        def complete(self, req: CompletionRequest) -> str:
+            self.calls += 1
+            return super().complete(req)
+
+    req = CompletionRequest(
+        system_prompt="s",
+        user_prompt="Input text:\nA murder on the night train",
+        schema_name="RequirementSpec",
+        model_name="gpt-4o-mini",
+        timeout_s=30,
+        temperature=0,
+        response_format={"type": "json_object"},
+    )
+    inner = CountingBackend()
+    backend = CachingBackend(inner, ResponseCache(tmp_path / "cache.db"))
+
+    backend.complete(req)
+    with fresh_responses_scope():
+        backend.complete(req)
+    backend.complete(req)
+
+    assert inner.calls == 2
+    assert backend.stats() == {"hits": 1, "misses": 1, "bypassed": 1}
+    assert cache_key(replace(req, max_tokens=256)) != cache_key(req)
+    assert cache_key(replace(req, response_format={"type": "json_schema"})) != cache_key(req)
+
+
+def test_response_cache_skips_invalid_responses(tmp_path) -> None:
+    class BrokenBackend:
+        name = "broken"
+        billable = True
+
+        def complete(self, req: CompletionRequest) -> str:
+            return '{"genre_hint": '
+
+    req = CompletionRequest(
+        system_prompt="s",
+        user_prompt="u",
+        schema_name="RequirementSpec",
+        model_name="gpt-4o-mini",
+        timeout_s=30,
+        temperature=0,
+        response_format={"type": "json_object"},
+    )
+    backend = CachingBackend(BrokenBackend(), ResponseCache(tmp_path / "cache.db"))
+
+    backend.complete(req)
+    backend.complete(req)
+
+    assert backend.stats() == {"hits": 0, "misses": 2, "bypassed": 0}
+    assert len(backend.cache) == 0
+
+
+def test_concurrent_proposals_share_one_generation(tmp_path) -> None:
+    repo = SessionsRepo(str(tmp_path / "state.db"), write_lease=FileLease(tmp_path / "write.lock"))
+    session_id = repo.create_session("Plan a short thriller")
+    client = SlowClient()
+    services = [
+        ProposalGraphService(repo=repo, client=client, flights=SingleFlight(tmp_path / "flights")) for _ in range(2)
+    ]
+    proposals = []
+
+    threads = [threading.Thread(target=lambda svc=svc: proposals.append(svc.run_proposal(session_id))) for svc in services]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join()
+
+    assert client.calls == ["RequirementSpec", "ExpansionResult", "OutlineLite"]
+    assert proposals[0] == proposals[1]
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import importlib.util
+import json
 
 import pytest
 
@@ -12,7 +13,9 @@ if HAS_PYDANTIC:
 
     from backend.graph.nodes_llm import analyze
     from backend.graph.schemas import OutlineFull, StoryBible
-    from backend.llm.client import LLMClient
+    from backend.llm.client import LLMClient, StructuredOutputUnsupported
+    from backend.llm.routing import Route
+    from backend.llm.structured import STRUCTURED_SCHEMAS
 
     class SequencedClient(LLMClient):
         def __init__(self, responses: list[str]) -> None:
@@ -20,7 +23,7 @@ if HAS_PYDANTIC:
             self.responses = responses
             self.calls = 0
 
-        def _call_model(self, *, system_prompt: str, user_prompt: str) -> str:
+        def _call_model(self, *, system_prompt: str, user_prompt: str, **kwargs: object) -> str:
             response = self.responses[self.calls]
             self.calls += 1
             return response
@@ -93,3 +96,209 @@ def test_outline_full_schema_forbids_extra_keys() -> None:
                 },
             }
         )
+
+
+@pytest.mark.skipif(not HAS_PYDANTIC, reason="pydantic is not installed")
+def test_generate_json_repairs_fenced_trailing_comma_output_without_retry() -> None:
+    client = SequencedClient(
+        responses=[
+            (
+                '```json\n{"raw_text":"Need a cozy mystery",'
+                '"objective":"Plan a cozy mystery novel",'
+                '"genre_hint":"mystery",'
+                '"tone_hint":"warm",'
+                '"constraints":["single POV",],'
+                '"confidence":0.9,}\n```'
+            ),
+        ]
+    )
+
+    spec = analyze("Need a cozy mystery", client=client)
+
+    assert client.calls == 1
+    assert spec.constraints == ["single POV"]
+    assert client.outcome_counts("RequirementSpec") == {"success": 0, "repaired": 1, "retried": 0, "failed": 0}
+
+
+@pytest.mark.skipif(not HAS_PYDANTIC, reason="pydantic is not installed")
+def test_generate_json_retries_truncated_or_out_of_bounds_output() -> None:
+    beats = [f"Beat {idx}" for idx in range(1, 10)]
+    client = SequencedClient(
+        responses=[
+            json.dumps({"chapter_beats": beats}),
+            json.dumps({"chapter_beats": beats[:7]})[:-3],
+            json.dumps({"chapter_beats": beats[:8]}),
+        ]
+    )
+
+    outline = client.generate_json(system_prompt="s", user_prompt="u", schema_name="OutlineLite")
+
+    assert client.calls == 3
+    assert outline["chapter_beats"] == beats[:8]
+    assert client.outcome_counts() == {"success": 0, "repaired": 0, "retried": 1, "failed": 0}
+
+
+@pytest.mark.skipif(not HAS_PYDANTIC, reason="pydantic is not installed")
+def test_repair_rejects_truncated_story_bible() -> None:
+    from backend.graph import placeholder
+    from backend.llm.repair import repair_json
+
+    bible = placeholder.story_bible(placeholder.analyze_requirement("A cozy mystery"))
+    raw = bible.model_dump_json()
+
+    assert repair_json(raw[: raw.index('"characters"') - 40], StoryBible) is None
+    assert repair_json(raw[:-1], StoryBible) is None
+    assert repair_json(raw.replace("]", ",]", 1), StoryBible) == bible.model_dump(mode="json")
+
+
+@pytest.mark.skipif(not HAS_PYDANTIC, reason="pydantic is not installed")
+def test_generate_json_records_retry_outcome() -> None:
+    client = SequencedClient(
+        responses=[
+            "not-json",
+            '{"expansion_suggestions":["a"],"open_questions":["b"]}',
+        ]
+    )
+
+    client.generate_json(system_prompt="s", user_prompt="u", schema_name="ExpansionResult")
+
+    assert client.outcome_counts() == {"success": 0, "repaired": 0, "retried": 1, "failed": 0}
+
+
+@pytest.mark.skipif(not HAS_PYDANTIC, reason="pydantic is not installed")
+def test_structured_schemas_are_strict_and_keep_field_names() -> None:
+    schema = STRUCTURED_SCHEMAS["OutlineFull"]
+    chapter = schema["$defs"]["OutlineChapter"]
+
+    assert schema["additionalProperties"] is False
+    assert set(schema["required"]) == set(schema["properties"])
+    assert "title" in chapter["properties"]
+    assert set(chapter["required"]) == set(chapter["properties"])
+
+
+@pytest.mark.skipif(not HAS_PYDANTIC, reason="pydantic is not installed")
+def test_generate_json_falls_back_when_structured_output_unsupported() -> None:
+    formats: list[str] = []
+
+    class NoStructuredClient(LLMClient):
+        def _call_model(self, *, system_prompt: str, user_prompt: str, response_format=None, **kwargs) -> str:
+            formats.append(response_format["type"])
+            if response_format["type"] == "json_schema":
+                raise StructuredOutputUnsupported("unsupported")
+            return '{"expansion_suggestions":["a"],"open_questions":["b"]}'
+
+    client = NoStructuredClient(api_key="test-key")
+    client.generate_json(system_prompt="s", user_prompt="u", schema_name="ExpansionResult")
+    client.generate_json(system_prompt="s", user_prompt="u", schema_name="ExpansionResult")
+
+    assert formats == ["json_schema", "json_object", "json_object"]
+    assert client.structured_output is False
+
+
+@pytest.mark.skipif(not HAS_PYDANTIC, reason="pydantic is not installed")
+def test_generate_json_uses_stage_route_and_records_stats() -> None:
+    seen: list[tuple[str, int, int | None]] = []
+
+    class RoutedClient(LLMClient):
+        def _call_model(self, *, system_prompt: str, user_prompt: str, response_format=None, route=None, **kwargs) -> str:
+            seen.append((route.model_name, route.timeout_s, route.max_tokens))
+            return '{"expansion_suggestions":["a"],"open_questions":["b"]}'
+
+    client = RoutedClient(
+        api_key="test-key",
+        routes={"ExpansionResult": Route(model_name="gpt-4.1-nano", max_tokens=256)},
+    )
+    client.generate_json(system_prompt="s", user_prompt="u", schema_name="ExpansionResult")
+
+    assert seen == [("gpt-4.1-nano", 30, 256)]
+    stats = client.route_stats[("ExpansionResult", "gpt-4.1-nano")]
+    assert stats.calls == 1
+    assert stats.cost_usd > 0
+
+
+@pytest.mark.skipif(not HAS_PYDANTIC, reason="pydantic is not installed")
+def test_speculative_mode_returns_first_valid_candidate() -> None:
+    import threading
+
+    release_strong = threading.Event()
+
+    class SpeculativeClient(LLMClient):
+        def _call_model(self, *, system_prompt: str, user_prompt: str, response_format=None, route=None, **kwargs) -> str:
+            if route.model_name == "strong-model":
+                release_strong.wait(timeout=5)
+                return '{"expansion_suggestions":["strong"],"open_questions":["b"]}'
+            return '{"expansion_suggestions":["fast"],"open_questions":["b"]}'
+
+    client = SpeculativeClient(
+        api_key="test-key",
+        speculative=True,
+        routes={"ExpansionResult": Route(model_name="strong-model", speculative_model="fast-model")},
+    )
+    data = client.generate_json(system_prompt="s", user_prompt="u", schema_name="ExpansionResult")
+    release_strong.set()
+
+    assert data["expansion_suggestions"] == ["fast"]
+    assert client.outcome_counts("ExpansionResult")["success"] == 1
+
+
+@pytest.mark.skipif(not HAS_PYDANTIC, reason="pydantic is not installed")
+def test_speculative_mode_raises_transport_errors_instead_of_retrying() -> None:
+    from backend.llm.scheduler import SchedulerRejected
+
+    class FailingClient(LLMClient):
+        def __init__(self, error: RuntimeError) -> None:
+            super().__init__(
+                api_key="test-key",
+                speculative=True,
+                routes={"ExpansionResult": Route(model_name="strong-model", speculative_model="fast-model")},
+            )
+            self.error = error
+            self.prompts: list[str] = []
+
+        def _call_model(self, *, system_prompt: str, user_prompt: str, **kwargs) -> str:
+            self.prompts.append(user_prompt)
+            raise self.error
+
+    for error in (RuntimeError("LLM request failed due to network error"), SchedulerRejected("interactive", 8)):
+        client = FailingClient(error)
+        with pytest.raises(type(error)):
+            client.generate_json(system_prompt="s", user_prompt="u", schema_name="ExpansionResult")
+        assert set(client.prompts) == {"u"}
+
+
+@pytest.mark.skipif(not HAS_PYDANTIC, reason="pydantic is not installed")
+def test_speculative_loser_is_cancelled_and_not_billed_after_the_winner() -> None:
+    import threading
+
+    from backend.llm.deadline import current_deadline
+
+    started = threading.Event()
+    aborted = threading.Event()
+    finished = threading.Event()
+
+    class SpeculativeClient(LLMClient):
+        def _call_model(self, *, system_prompt: str, user_prompt: str, response_format=None, route=None, **kwargs) -> str:
+            if route.model_name == "strong-model":
+                current_deadline.get().on_cancel(aborted.set)
+                started.set()
+                aborted.wait(timeout=5)
+                finished.set()
+                raise RuntimeError("LLM request aborted")
+            started.wait(timeout=5)
+            return '{"expansion_suggestions":["fast"],"open_questions":["b"]}'
+
+        def _record_outcome(self, schema_name, outcome, *, route, usages) -> None:
+            self.usages = usages
+            super()._record_outcome(schema_name, outcome, route=route, usages=usages)
+
+    client = SpeculativeClient(
+        api_key="test-key",
+        speculative=True,
+        routes={"ExpansionResult": Route(model_name="strong-model", speculative_model="fast-model")},
+    )
+    data = client.generate_json(system_prompt="s", user_prompt="u", schema_name="ExpansionResult")
+
+    assert data["expansion_suggestions"] == ["fast"]
+    assert aborted.wait(timeout=1) and finished.wait(timeout=1)
+    assert len(client.usages) == 1
+    assert client._executor._max_workers == 32
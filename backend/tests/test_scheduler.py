@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from backend.llm.deadline import Deadline, RequestCancelled, deadline_scope
+from backend.llm.scheduler import LLMScheduler, SchedulerPolicy, SchedulerRejected, priority_scope
+
+
+def _wait_for(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert predicate()
+
+
+def _hold_slot(scheduler: LLMScheduler, release: threading.Event, priority: str) -> None:
+    with scheduler.slot(priority, "holder"):
+        release.wait(5)
+
+
+def _hold(scheduler: LLMScheduler, release: threading.Event, priority: str = "interactive") -> threading.Thread:
+    thread = threading.Thread(target=_hold_slot, args=(scheduler, release, priority))
+    thread.start()
+    _wait_for(lambda: sum(scheduler.in_flight().values()) >= 1)
+    return thread
+
+
+def test_weighted_fair_queuing_keeps_bulk_from_starving_interactive() -> None:
+    scheduler = LLMScheduler(SchedulerPolicy(concurrency=1))
+    release = threading.Event()
+    holder = _hold(scheduler, release)
+    order: list[tuple[str, str]] = []
+
+    def call(priority: str, session_id: str) -> None:
+        with scheduler.slot(priority, session_id):
+            order.append((priority, session_id))
+
+    threads = [threading.Thread(target=call, args=("bulk", "import")) for _ in range(10)]
+    threads += [threading.Thread(target=call, args=("interactive", session)) for session in ["a"] * 4 + ["b"] * 4]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: sum(scheduler.queue_depths().values()) == 18)
+    release.set()
+    for thread in [holder, *threads]:
+        thread.join(timeout=5)
+
+    first = order[:9]
+    assert sum(priority == "interactive" for priority, _ in first) == 8
+    interactive_sessions = [session for priority, session in order if priority == "interactive"]
+    assert interactive_sessions[:4] in (["a", "b", "a", "b"], ["b", "a", "b", "a"])
+    assert len(order) == 18
+
+
+def test_admission_control_and_class_limits() -> None:
+    scheduler = LLMScheduler(SchedulerPolicy(concurrency=2, max_queued={"bulk": 1}))
+    release = threading.Event()
+    holder = _hold(scheduler, release, priority="bulk")
+    queued = threading.Thread(target=_hold_slot, args=(scheduler, release, "bulk"))
+    queued.start()
+    _wait_for(lambda: scheduler.queue_depths()["bulk"] == 1)
+
+    with pytest.raises(SchedulerRejected):
+        with scheduler.slot("bulk", "import"):
+            pass
+    with priority_scope("interactive"), scheduler.slot(session_id="user"):
+        assert scheduler.in_flight() == {"interactive": 1, "background": 0, "bulk": 1}
+    release.set()
+    holder.join(timeout=5)
+    queued.join(timeout=5)
+    assert scheduler.in_flight()["bulk"] == 0
+
+
+def test_queued_call_gives_up_when_deadline_passes() -> None:
+    scheduler = LLMScheduler(SchedulerPolicy(concurrency=1))
+    release = threading.Event()
+    holder = _hold(scheduler, release)
+
+    with deadline_scope(Deadline(0.05)), pytest.raises(RequestCancelled) as cancelled:
+        with scheduler.slot("background", "late"):
+            pass
+
+    assert cancelled.value.stage == "llm.queue"
+    assert scheduler.queue_depths()["background"] == 0
+    release.set()
+    holder.join(timeout=5)
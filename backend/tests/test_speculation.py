@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import importlib.util
+import time
+
+import pytest
+
+HAS_PYDANTIC = importlib.util.find_spec("pydantic") is not None
+HAS_LANGGRAPH = importlib.util.find_spec("langgraph") is not None
+pytestmark = pytest.mark.skipif(
+    not (HAS_PYDANTIC and HAS_LANGGRAPH), reason="pydantic and langgraph are required in this environment"
+)
+
+if HAS_PYDANTIC and HAS_LANGGRAPH:
+    from backend.graph.graph import ProposalGraphService
+    from backend.graph.speculation import PlanSpeculator, SpeculationPolicy
+    from backend.llm.client import LLMClient
+    from backend.storage.sqlite import SessionsRepo
+
+
+def _settle(speculator: "PlanSpeculator") -> None:
+    deadline = time.monotonic() + 10
+    while speculator.stats()["in_flight"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_speculative_plan_is_promoted_on_approve(tmp_path) -> None:
+    repo = SessionsRepo(str(tmp_path / "state.db"))
+    client = LLMClient(api_key=None)
+    service = ProposalGraphService(repo=repo, client=client)
+    speculator = PlanSpeculator(repo, client, SpeculationPolicy())
+    session_id = repo.create_session("Plan a short thriller")
+
+    proposal = service.run_proposal(session_id)
+    assert speculator.submit(session_id, proposal)
+    assert not speculator.submit(session_id, proposal)
+    _settle(speculator)
+    approved = service.apply_decision(session_id, action="approve")
+
+    assert speculator.promote(session_id, approved.version)
+    stored = repo.get_session(session_id)
+    assert stored is not None
+    assert stored["bible_version"] == 1
+    assert stored["outline_full_json"]["chapters"]
+    assert speculator.stats()["hit_rate"] == 1.0
+    assert speculator.spent() > 0
+    speculator.shutdown()
+
+
+def test_speculation_is_discarded_on_new_version_and_capped_by_budget(tmp_path) -> None:
+    repo = SessionsRepo(str(tmp_path / "state.db"))
+    client = LLMClient(api_key=None)
+    service = ProposalGraphService(repo=repo, client=client)
+    speculator = PlanSpeculator(repo, client, SpeculationPolicy(token_budget=1))
+    session_id = repo.create_session("Plan a short thriller")
+
+    first = service.run_proposal(session_id)
+    speculator.submit(session_id, first)
+    _settle(speculator)
+    edited = service.apply_decision(session_id, action="edit", text="Use first person perspective")
+
+    assert not speculator.submit(session_id, edited)
+    assert not speculator.promote(session_id, edited.version)
+    assert speculator.claim(session_id, edited.version) is None
+    assert repo.get_session(session_id)["bible_json"] is None
+    assert speculator.stats()["misses"] == 1
+    speculator.shutdown()
+
+
+def test_queued_speculations_reserve_budget_before_they_run(tmp_path) -> None:
+    import threading
+
+    release = threading.Event()
+
+    class BlockedClient(LLMClient):
+        def generate_json(self, *, system_prompt: str, user_prompt: str, schema_name: str) -> dict:
+            release.wait(timeout=10)
+            return super().generate_json(system_prompt=system_prompt, user_prompt=user_prompt, schema_name=schema_name)
+
+    repo = SessionsRepo(str(tmp_path / "state.db"))
+    service = ProposalGraphService(repo=repo, client=LLMClient(api_key=None))
+    speculator = PlanSpeculator(
+        repo, BlockedClient(api_key=None), SpeculationPolicy(token_budget=30_000, reserve_tokens=20_000)
+    )
+    sessions = [repo.create_session(f"Plan thriller {idx}") for idx in range(3)]
+    proposals = [service.run_proposal(session_id) for session_id in sessions]
+
+    started = [speculator.submit(session_id, proposal) for session_id, proposal in zip(sessions, proposals)]
+
+    assert started == [True, True, False]
+    assert speculator.stats()["reserved_tokens"] == 40_000
+    release.set()
+    _settle(speculator)
+    assert speculator.stats()["reserved_tokens"] == 0
+    assert 0 < speculator.spent() < 30_000
+    speculator.shutdown()
+
+
+def test_speculative_plan_is_not_saved_onto_a_changed_session(tmp_path) -> None:
+    import threading
+
+    release = threading.Event()
+
+    class BlockedClient(LLMClient):
+        def generate_json(self, *, system_prompt: str, user_prompt: str, schema_name: str) -> dict:
+            release.wait(timeout=10)
+            return super().generate_json(system_prompt=system_prompt, user_prompt=user_prompt, schema_name=schema_name)
+
+    repo = SessionsRepo(str(tmp_path / "state.db"))
+    service = ProposalGraphService(repo=repo, client=LLMClient(api_key=None))
+    speculator = PlanSpeculator(repo, BlockedClient(api_key=None), SpeculationPolicy())
+    session_id = repo.create_session("Plan a short thriller")
+    proposal = service.run_proposal(session_id)
+    speculator.submit(session_id, proposal)
+    approved = service.apply_decision(session_id, action="approve")
+
+    assert speculator.promote(session_id, approved.version)
+    service.apply_decision(session_id, action="edit", text="Use first person perspective")
+    release.set()
+    deadline = time.monotonic() + 10
+    while not speculator.stats()["misses"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert repo.get_session(session_id)["bible_json"] is None
+    assert speculator.stats()["misses"] == 1
+    speculator.shutdown()
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+import uuid
+from collections.abc import Iterator
+
+import pytest
+
+from backend.storage.base import SessionConflict, SessionFilter, SessionStore, open_store
+
+POSTGRES_DSN = os.getenv("NOVEL_FLOW_TEST_POSTGRES_DSN")
+HAS_PSYCOPG = importlib.util.find_spec("psycopg") is not None and importlib.util.find_spec("psycopg_pool") is not None
+
+if os.getenv("NOVEL_FLOW_REQUIRE_POSTGRES_TESTS") == "1" and not (POSTGRES_DSN and HAS_PSYCOPG):
+    raise RuntimeError("PostgreSQL contract tests are required but NOVEL_FLOW_TEST_POSTGRES_DSN or psycopg is missing")
+
+STORES = [
+    "sqlite",
+    pytest.param(
+        "postgres",
+        marks=pytest.mark.skipif(
+            not (POSTGRES_DSN and HAS_PSYCOPG), reason="set NOVEL_FLOW_TEST_POSTGRES_DSN and install psycopg[pool]"
+        ),
+    ),
+]
+
+
+@pytest.fixture(params=STORES)
+def store(request: pytest.FixtureRequest, tmp_path) -> Iterator[SessionStore]:
+    if request.param == "sqlite":
+        yield open_store(str(tmp_path / "state.db"))
+        return
+    repo = open_store(POSTGRES_DSN or "")
+    with repo.pool.connection() as conn:
+        conn.execute("TRUNCATE sessions, chapter_drafts")
+    yield repo
+    repo.close()
+
+
+def test_create_and_get_round_trip(store: SessionStore) -> None:
+    session_id = store.create_session("Need a mystery novel")
+    row = store.get_session(session_id)
+
+    assert row is not None
+    assert (row["requirement_text"], row["status"], row["version"]) == ("Need a mystery novel", "NEW", 0)
+    assert row["proposal_json"] is None
+    assert store.get_session(str(uuid.uuid4())) is None
+
+
+def test_update_returns_decoded_row(store: SessionStore) -> None:
+    session_id = store.create_session("Need a mystery novel")
+
+    row = store.update_session(session_id, spec_json={"genre_hint": "mystery", "tags": ["a"]}, status="ANALYZED", version=1)
+
+    assert row is not None
+    assert row["spec_json"] == {"genre_hint": "mystery", "tags": ["a"]}
+    assert (row["status"], row["version"]) == ("ANALYZED", 1)
+    assert store.get_session(session_id) == row
+    assert store.update_session(str(uuid.uuid4()), status="NEW") is None
+    with pytest.raises(ValueError):
+        store.update_session(session_id, **{"status = 'x' --": "NEW"})
+
+
+def test_list_sessions_filters_by_status(store: SessionStore) -> None:
+    first = store.create_session("one")
+    second = store.create_session("two")
+    store.update_session(second, status="APPROVED")
+
+    approved = store.list_sessions(filters=SessionFilter(status="APPROVED"))
+
+    assert [row["session_id"] for row in approved] == [second]
+    assert set(approved[0]) == {"session_id", "status", "version", "created_at", "updated_at"}
+    assert {row["session_id"] for row in store.list_sessions()} == {first, second}
+    assert len(store.list_sessions(limit=1)) == 1
+
+
+def test_save_plan_versions_artifacts(store: SessionStore) -> None:
+    session_id = store.create_session("Need a mystery novel")
+
+    first = store.save_plan(session_id, bible_json={"title": "A"}, outline_full_json={"chapters": []}, bump=False)
+    second = store.save_plan(session_id, bible_json={"title": "B"}, outline_full_json={"chapters": [1]}, bump=True)
+
+    assert first is not None and second is not None
+    assert (first["bible_version"], first["outline_version"]) == (1, 1)
+    assert (second["bible_version"], second["outline_version"]) == (2, 2)
+    assert second["bible_json"] == {"title": "B"}
+    assert store.save_plan(str(uuid.uuid4()), bible_json={}, outline_full_json={}, bump=False) is None
+
+
+def test_save_plan_stores_outline_index_with_outline(store: SessionStore) -> None:
+    session_id = store.create_session("Need a mystery novel")
+    index = {"character_chapters": {"Mara": [1, 3]}, "location_chapters": {}, "foreshadowing_rows": {"F1": 0}}
+
+    saved = store.save_plan(session_id, bible_json={}, outline_full_json={}, bump=False, outline_index_json=index)
+
+    assert saved is not None and saved["outline_index_json"] == index
+    replanned = store.save_plan(session_id, bible_json={}, outline_full_json={"chapters": []}, bump=True)
+    assert replanned is not None and replanned["outline_index_json"] is None
+
+
+def test_chapter_drafts_are_kept_per_outline_version(store: SessionStore) -> None:
+    session_id = store.create_session("Need a long saga")
+
+    store.save_draft(session_id, outline_version=1, draft_json={"index": 2, "summary": "b"}, tokens=7)
+    store.save_draft(session_id, outline_version=1, draft_json={"index": 1, "summary": "a"}, tokens=5)
+    store.save_draft(session_id, outline_version=1, draft_json={"index": 1, "summary": "a2"}, tokens=6)
+
+    drafts = store.list_drafts(session_id, outline_version=1)
+    assert [(row["chapter_index"], row["draft_json"]["summary"], row["tokens"]) for row in drafts] == [
+        (1, "a2", 6),
+        (2, "b", 7),
+    ]
+    store.save_draft(session_id, outline_version=2, draft_json={"index": 1, "summary": "new"}, tokens=3)
+    assert store.list_drafts(session_id, outline_version=1) == []
+    assert len(store.list_drafts(session_id, outline_version=2)) == 1
+
+
+def test_carry_drafts_moves_selected_chapters_to_the_new_outline_version(store: SessionStore) -> None:
+    session_id = store.create_session("Need a long saga")
+    for index in (1, 2, 3):
+        store.save_draft(session_id, outline_version=1, draft_json={"index": index, "summary": str(index)}, tokens=index)
+
+    assert store.carry_drafts(session_id, from_version=1, to_version=2, chapter_indexes=[1, 3]) == 2
+
+    assert store.list_drafts(session_id, outline_version=1) == []
+    carried = store.list_drafts(session_id, outline_version=2)
+    assert [(row["chapter_index"], row["draft_json"]["summary"], row["tokens"]) for row in carried] == [
+        (1, "1", 1),
+        (3, "3", 3),
+    ]
+    assert store.carry_drafts(session_id, from_version=2, to_version=3, chapter_indexes=[]) == 0
+    assert store.list_drafts(session_id, outline_version=2) == []
+
+
+def test_list_requirements_pages_by_session_id(store: SessionStore) -> None:
+    approved = sorted(store.create_session(f"Idea {idx}") for idx in range(3))
+    for session_id in approved:
+        store.update_session(session_id, status="APPROVED")
+    store.create_session("Still new")
+
+    first = store.list_requirements(status="APPROVED", limit=2)
+    rest = store.list_requirements(status="APPROVED", after=first[-1]["session_id"], limit=2)
+
+    assert [row["session_id"] for row in first + rest] == approved
+    assert {row["requirement_text"] for row in first + rest} == {"Idea 0", "Idea 1", "Idea 2"}
+
+
+def test_list_sessions_pages_by_keyset(store: SessionStore) -> None:
+    created = {store.create_session(f"session {idx}") for idx in range(5)}
+    pages = []
+    after = None
+    while True:
+        page = store.list_sessions(limit=2, after=after)
+        if not page:
+            break
+        pages.append(page)
+        after = (page[-1]["updated_at"], page[-1]["session_id"])
+
+    seen = [row["session_id"] for page in pages for row in page]
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert sorted(seen) == sorted(created)
+    assert store.list_sessions(filters=SessionFilter(version=0, updated_before="2000-01-01 00:00:00")) == []
+    assert len(store.list_sessions(filters=SessionFilter(version=0, updated_after="2000-01-01 00:00:00"))) == 5
+
+
+def test_version_checked_update_rejects_stale_revision(store: SessionStore) -> None:
+    session_id = store.create_session("Need a mystery novel")
+    assert store.get_revision(session_id) == 0
+
+    row = store.update_session(session_id, expected_revision=0, status="ANALYZED")
+
+    assert row is not None and row["revision"] == 1
+    with pytest.raises(SessionConflict) as conflict:
+        store.update_session(session_id, expected_revision=0, status="NEW")
+    assert conflict.value.actual_revision == 1
+    assert store.get_session(session_id)["status"] == "ANALYZED"
+    assert store.update_session(str(uuid.uuid4()), expected_revision=0, status="NEW") is None
+    assert store.get_revision(str(uuid.uuid4())) is None
+
+
+def test_version_checked_save_plan_rejects_stale_revision(store: SessionStore) -> None:
+    session_id = store.create_session("Need a mystery novel")
+    store.update_session(session_id, status="APPROVED")
+
+    with pytest.raises(SessionConflict) as conflict:
+        store.save_plan(session_id, bible_json={}, outline_full_json={}, bump=False, expected_revision=0)
+
+    assert conflict.value.actual_revision == 1
+    assert store.get_session(session_id)["bible_json"] is None
+    saved = store.save_plan(session_id, bible_json={}, outline_full_json={}, bump=False, expected_revision=1)
+    assert saved is not None and saved["revision"] == 2
+
+
+def test_projection_returns_validators_and_raw_documents(store: SessionStore) -> None:
+    session_id = store.create_session("Need a mystery novel")
+    store.update_session(session_id, status="NEEDS_CONFIRMATION", version=2, proposal_json={"version": 2})
+
+    validators = store.get_projection(session_id)
+    documents = store.get_projection(session_id, ("proposal_json",))
+
+    assert validators is not None and documents is not None
+    assert (validators["status"], validators["version"], validators["revision"]) == ("NEEDS_CONFIRMATION", 2, 1)
+    assert "proposal_json" not in validators
+    assert json.loads(documents["proposal_json"]) == {"version": 2}
+    assert store.get_projection("missing") is None
+    with pytest.raises(ValueError):
+        store.get_projection(session_id, ("requirement_text",))
+
+
+@pytest.mark.skipif(not (POSTGRES_DSN and HAS_PSYCOPG), reason="set NOVEL_FLOW_TEST_POSTGRES_DSN and install psycopg[pool]")
+def test_postgres_conflict_check_reuses_the_update_connection() -> None:
+    from backend.storage.postgres import PostgresSessionsRepo
+
+    repo = PostgresSessionsRepo(POSTGRES_DSN or "", min_size=1, max_size=1)
+    try:
+        session_id = repo.create_session("Need a mystery novel")
+        repo.update_session(session_id, expected_revision=0, status="ANALYZED")
+        with pytest.raises(SessionConflict):
+            repo.update_session(session_id, expected_revision=0, status="NEW")
+    finally:
+        repo.close()
+
+
+def test_postgres_checkpointer_requires_the_postgres_saver(monkeypatch) -> None:
+    from backend.storage.postgres import PostgresSessionsRepo
+
+    real_find_spec = importlib.util.find_spec
+    monkeypatch.setattr(
+        importlib.util,
+        "find_spec",
+        lambda name, *args: None if name == "langgraph.checkpoint.postgres" else real_find_spec(name, *args),
+    )
+
+    with pytest.raises(RuntimeError, match="langgraph-checkpoint-postgres"):
+        PostgresSessionsRepo.checkpointer(object.__new__(PostgresSessionsRepo))
+
+
+@pytest.mark.skipif(not (POSTGRES_DSN and HAS_PSYCOPG), reason="set NOVEL_FLOW_TEST_POSTGRES_DSN and install psycopg[pool]")
+@pytest.mark.skipif(
+    importlib.util.find_spec("langgraph") is None or importlib.util.find_spec("pydantic") is None,
+    reason="pydantic and langgraph are required in this environment",
+)
+def test_postgres_checkpointer_runs_the_proposal_graph() -> None:
+    from backend.graph.graph import ProposalGraphService
+    from backend.llm.client import LLMClient
+    from backend.storage.postgres import PostgresSessionsRepo
+
+    repo = PostgresSessionsRepo(POSTGRES_DSN or "")
+    try:
+        service = ProposalGraphService(repo=repo, client=LLMClient(api_key=None))
+        session_id = repo.create_session("Plan a short thriller")
+
+        proposal = service.run_proposal(session_id)
+        edited = service.apply_decision(session_id, action="edit", text="Use first person perspective")
+        approved = service.apply_decision(session_id, action="approve")
+
+        assert proposal.version == 1 and edited.version == 2
+        assert approved.status.value == "APPROVED"
+        assert repo.get_session(session_id)["status"] == "APPROVED"
+    finally:
+        repo.close()
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import importlib.util
+
+import pytest
+
+HAS_PYDANTIC = importlib.util.find_spec("pydantic") is not None
+HAS_LANGGRAPH = importlib.util.find_spec("langgraph") is not None
+pytestmark = pytest.mark.skipif(
+    not (HAS_PYDANTIC and HAS_LANGGRAPH), reason="pydantic and langgraph are required in this environment"
+)
+
+if HAS_PYDANTIC and HAS_LANGGRAPH:
+    from backend.graph.graph import ProposalGraphService
+    from backend.llm.client import LLMClient
+    from backend.observability.tracing import NOOP_SPAN, Histogram, tracer
+    from backend.storage.sqlite import SessionsRepo
+
+
+@pytest.fixture
+def enabled_tracer():
+    tracer.registry.reset()
+    tracer.recent.clear()
+    tracer.configure(enabled=True)
+    yield tracer
+    tracer.configure(enabled=False)
+    tracer.registry.reset()
+    tracer.recent.clear()
+
+
+def test_disabled_tracer_returns_shared_noop_span() -> None:
+    assert tracer.enabled is False
+    assert tracer.span("graph.ANALYZE") is NOOP_SPAN
+
+
+def test_proposal_run_records_node_llm_and_db_spans(tmp_path, enabled_tracer) -> None:
+    repo = SessionsRepo(str(tmp_path / "state.db"))
+    service = ProposalGraphService(repo=repo, client=LLMClient(api_key=None))
+
+    service.run_proposal(repo.create_session("Plan a short thriller"))
+
+    names = {name for name, _, _ in enabled_tracer.registry.items()}
+    assert {"graph.INTAKE", "graph.ANALYZE", "graph.EXPAND", "graph.OUTLINE_LITE", "graph.PRESENT"} <= names
+    assert {"db.create_session", "db.get_session", "db.update_session", "json.encode"} <= names
+    attempt = enabled_tracer.registry.get("llm.attempt", schema="OutlineLite", status="ok")
+    assert attempt is not None and attempt.count == 1
+
+
+def test_llm_attempt_span_records_retry_reason(enabled_tracer) -> None:
+    class SequencedClient(LLMClient):
+        responses = ["not-json", '{"expansion_suggestions":["a"],"open_questions":["b"]}']
+
+        def _call_model(self, **kwargs) -> str:
+            return self.responses.pop(0)
+
+    SequencedClient(api_key="test-key").generate_json(system_prompt="s", user_prompt="u", schema_name="ExpansionResult")
+
+    attempts = [record for record in enabled_tracer.recent if record.name == "llm.attempt"]
+    assert [record.attributes["outcome"] for record in attempts] == ["invalid", "retried"]
+    assert attempts[0].attributes["retry_reason"].startswith("Expecting value")
+
+
+def test_histogram_quantile_uses_bucket_bounds() -> None:
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.05, 0.5, 2.0):
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.75) == 1.0
+    assert list(histogram.cumulative()) == [(0.1, 2), (1.0, 3), (float("inf"), 4)]
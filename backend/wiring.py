@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from backend.graph.drafting import ChapterDrafter, DraftPolicy
+from backend.graph.graph import ProposalGraphService
+from backend.graph.speculation import PlanSpeculator, SpeculationPolicy
+from backend.llm.backends import LLMBackend, build_backend
+from backend.llm.cache import CachingBackend, ResponseCache
+from backend.llm.client import LLMClient
+from backend.llm.hedging import HedgePolicy
+from backend.llm.scheduler import LLMScheduler, SchedulerPolicy
+from backend.llm.structured import precompute_schemas
+from backend.observability.metrics import metrics
+from backend.storage.archive import ArchivePolicy, Archiver, parse_ttls
+from backend.storage.base import SessionStore, open_store
+from backend.storage.coordination import FileLease, SingleFlight
+from backend.storage.dedup import DedupPolicy, RequirementIndex
+from backend.storage.sqlite import SessionsRepo
+
+
+@dataclass
+class AppServices:
+    repo: SessionStore
+    llm_client: LLMClient
+    graph_service: ProposalGraphService
+    drafter: ChapterDrafter
+    flights: SingleFlight | None = None
+    archiver: Archiver | None = None
+    speculator: PlanSpeculator | None = None
+    requirements: RequirementIndex | None = None
+
+
+def build_services(
+    *,
+    db_path: str | None = None,
+    llm_backend: LLMBackend | str | None = None,
+    shared_dir: str | None = None,
+    archive_policy: ArchivePolicy | None = None,
+    speculation_policy: SpeculationPolicy | None = None,
+    dedup_policy: DedupPolicy | None = None,
+) -> AppServices:
+    db_path = db_path or os.getenv("NOVEL_FLOW_DB", "novel_flow.db")
+    shared_dir = shared_dir or os.getenv("NOVEL_FLOW_SHARED_DIR")
+    if llm_backend is None or isinstance(llm_backend, str):
+        llm_backend = build_backend(llm_backend)
+
+    flights = None
+    write_lease: FileLease | None = None
+    if shared_dir:
+        shared = Path(shared_dir)
+        write_lease = FileLease(shared / "db-write.lock")
+        repo = open_store(db_path, write_lease=write_lease)
+        cached_backend = CachingBackend(llm_backend, ResponseCache(shared / "llm_cache.db"))
+        llm_backend = cached_backend
+        flights = SingleFlight(shared / "flights")
+        metrics.register_gauge("novel_flow_db_write_lease", "stat", write_lease.stats)
+        metrics.register_gauge("novel_flow_llm_cache", "result", cached_backend.stats)
+        metrics.register_gauge("novel_flow_single_flight", "stat", flights.stats)
+    else:
+        repo = open_store(db_path)
+    metrics.register_gauge("novel_flow_db_connections", "state", repo.pool_stats)
+
+    archive_ttls = os.getenv("NOVEL_FLOW_ARCHIVE_TTLS")
+    if archive_policy is None and archive_ttls:
+        archive_policy = ArchivePolicy(ttls=parse_ttls(archive_ttls))
+    if archive_policy is not None and not isinstance(repo, SessionsRepo):
+        raise RuntimeError("Session archival is only supported by the SQLite store")
+
+    speculation_tokens = os.getenv("NOVEL_FLOW_SPECULATIVE_PLAN_TOKENS")
+    if speculation_policy is None and speculation_tokens:
+        speculation_policy = SpeculationPolicy(token_budget=int(speculation_tokens))
+
+    dedup_spec = os.getenv("NOVEL_FLOW_DEDUP")
+    if dedup_policy is None and dedup_spec:
+        dedup_policy = DedupPolicy.parse(dedup_spec)
+    requirements = None
+    if dedup_policy is not None:
+        if isinstance(repo, SessionsRepo):
+            requirements = RequirementIndex(repo.db_path, dedup_policy, write_lease=write_lease)
+        else:
+            default_path = Path(shared_dir) / "requirements.db" if shared_dir else "novel_flow_requirements.db"
+            requirements = RequirementIndex(os.getenv("NOVEL_FLOW_DEDUP_DB", default_path), dedup_policy)
+
+    precompute_schemas()
+    hedge_spec = os.getenv("NOVEL_FLOW_LLM_HEDGE")
+    llm_concurrency = int(os.getenv("NOVEL_FLOW_LLM_CONCURRENCY", str(SchedulerPolicy.concurrency)))
+    scheduler = LLMScheduler(SchedulerPolicy(concurrency=llm_concurrency)) if llm_concurrency > 0 else None
+    if scheduler is not None:
+        metrics.register_gauge("novel_flow_llm_queue_depth", "priority", scheduler.queue_depths)
+        metrics.register_gauge("novel_flow_llm_scheduled_in_flight", "priority", scheduler.in_flight)
+    llm_client = LLMClient(
+        temperature=0,
+        backend=llm_backend,
+        hedging=HedgePolicy.parse(hedge_spec) if hedge_spec else None,
+        scheduler=scheduler,
+    )
+    speculator = None
+    if speculation_policy is not None:
+        speculator = PlanSpeculator(repo, llm_client, speculation_policy)
+        metrics.register_gauge("novel_flow_plan_speculation", "stat", speculator.stats)
+    return AppServices(
+        repo=repo,
+        llm_client=llm_client,
+        graph_service=ProposalGraphService(repo=repo, client=llm_client, flights=flights),
+        drafter=ChapterDrafter(
+            repo, llm_client, DraftPolicy(workers=int(os.getenv("NOVEL_FLOW_DRAFT_WORKERS", str(DraftPolicy.workers))))
+        ),
+        flights=flights,
+        archiver=(
+            Archiver(repo, archive_policy, requirements=requirements) if archive_policy is not None else None
+        ),
+        speculator=speculator,
+        requirements=requirements,
+    )
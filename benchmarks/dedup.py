@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from array import array
+from pathlib import Path
+from typing import Any
+
+from backend.storage.dedup import MERSENNE_PRIME, DedupPolicy, RequirementIndex, band_buckets, similarity
+from benchmarks.workflow import git_revision, summarize
+
+GENRES = ("dark fantasy", "cozy mystery", "space opera", "romance", "thriller", "literary drama", "horror")
+HEROES = ("young thief", "retired detective", "ship engineer", "village baker", "court musician", "exiled prince")
+GOALS = (
+    "steals a cursed crown",
+    "investigates a string of disappearances",
+    "smuggles refugees past a blockade",
+    "inherits a haunted estate",
+    "must win a rigged tournament",
+)
+ENDINGS = ("bittersweet", "hopeful", "tragic", "ambiguous", "triumphant")
+
+
+def requirement(rng: random.Random) -> str:
+    return (
+        f"Write a {rng.choice(GENRES)} novel about a {rng.choice(HEROES)} who {rng.choice(GOALS)} "
+        f"in chapter {rng.randrange(1000)} of a serial, told with a {rng.choice(ENDINGS)} ending and "
+        f"a cast of {rng.randrange(3, 12)} characters."
+    )
+
+
+def populate(index: RequirementIndex, *, rows: int, seed: int = 3, batch: int = 10_000) -> None:
+    rng = random.Random(seed)
+    with index._connect(write=True) as conn:
+        for start in range(0, rows, batch):
+            signatures = []
+            for idx in range(start, min(rows, start + batch)):
+                signature = tuple(rng.randrange(MERSENNE_PRIME) for _ in range(index.policy.num_perm))
+                signatures.append((idx + 1, f"filler-{idx:08d}", signature))
+            conn.executemany(
+                "INSERT INTO requirement_signatures (doc_id, session_id, signature) VALUES (?, ?, ?)",
+                [(doc_id, session_id, array("Q", signature).tobytes()) for doc_id, session_id, signature in signatures],
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO requirement_lsh (bucket, doc_id) VALUES (?, ?)",
+                [
+                    (bucket, doc_id)
+                    for doc_id, _, signature in signatures
+                    for bucket in band_buckets(signature, index.policy.bands)
+                ],
+            )
+
+
+def linear_scan(index: RequirementIndex, text: str) -> list[str]:
+    signature = index.signature(text) or ()
+    with index._connect() as conn:
+        rows = conn.execute("SELECT session_id, signature FROM requirement_signatures").fetchall()
+    return [
+        session_id for session_id, blob in rows if similarity(signature, array("Q", blob)) >= index.policy.threshold
+    ]
+
+
+def run_dedup(*, rows: int, lookups: int, db_path: str, compare_scan: bool) -> dict[str, Any]:
+    index = RequirementIndex(db_path, DedupPolicy())
+    started = time.perf_counter()
+    populate(index, rows=rows)
+    populate_s = time.perf_counter() - started
+
+    rng = random.Random(5)
+    originals = [requirement(rng) for _ in range(lookups)]
+    for idx, text in enumerate(originals):
+        index.add(f"approved-{idx}", text)
+    resubmissions = [text.replace(" novel ", " book ") for text in originals]
+    unrelated = [f"A {rng.choice(GENRES)} short story collection, volume {idx}." for idx in range(lookups)]
+
+    hit_s, miss_s, found = [], [], 0
+    for idx, text in enumerate(resubmissions):
+        started = time.perf_counter()
+        matches = index.similar(text)
+        hit_s.append(time.perf_counter() - started)
+        found += any(session_id == f"approved-{idx}" for session_id, _ in matches)
+    for text in unrelated:
+        started = time.perf_counter()
+        index.similar(text)
+        miss_s.append(time.perf_counter() - started)
+
+    report: dict[str, Any] = {
+        "rows": rows + lookups,
+        "populate_s": round(populate_s, 3),
+        "db_file_bytes": Path(db_path).stat().st_size,
+        "recall": round(found / lookups, 3) if lookups else 0.0,
+        "near_duplicate_lookup": summarize(hit_s),
+        "unrelated_lookup": summarize(miss_s),
+    }
+    if compare_scan:
+        scan_s = []
+        for text in resubmissions[:3]:
+            started = time.perf_counter()
+            linear_scan(index, text)
+            scan_s.append(time.perf_counter() - started)
+        report["linear_scan"] = summarize(scan_s)
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark near-duplicate requirement lookups in the LSH index.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--compare-scan", action="store_true", help="Also time a full scan over all signatures")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        run = run_dedup(
+            rows=args.rows, lookups=args.lookups, db_path=str(Path(tmp) / "dedup.db"), compare_scan=args.compare_scan
+        )
+    report = {"revision": git_revision(), "python": sys.version.split()[0], **run}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
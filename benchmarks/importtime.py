@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from benchmarks.workflow import git_revision
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+@dataclass(frozen=True)
+class ImportBudget:
+    module: str
+    budget_ms: float
+    forbidden: tuple[str, ...] = ()
+
+
+IMPORT_BUDGETS = (
+    ImportBudget("backend.app", 900, ("langgraph", "backend.graph.graph", "backend.llm.client", "sqlite3")),
+    ImportBudget("backend.graph.nodes_llm", 350, ("langgraph", "backend.llm.client", "fastapi")),
+    ImportBudget("backend.llm.repair", 300, ("langgraph", "backend.llm.client", "fastapi")),
+)
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int, int]]:
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def profile_import(module: str) -> list[tuple[str, int, int, int]]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(completed.stderr)
+
+
+def measure(budget: ImportBudget, *, runs: int, scale: float = 1.0) -> dict[str, Any]:
+    totals = []
+    rows: list[tuple[str, int, int, int]] = []
+    for _ in range(runs):
+        rows = profile_import(budget.module)
+        totals.append(next(cumulative for name, _, cumulative, _ in reversed(rows) if name == budget.module) / 1000)
+    loaded = {name for name, *_ in rows}
+    forbidden = sorted(
+        name for name in budget.forbidden if name in loaded or any(item.startswith(f"{name}.") for item in loaded)
+    )
+    heaviest = sorted(
+        ((name, cumulative) for name, _, cumulative, depth in rows if depth == 1), key=lambda item: -item[1]
+    )[:8]
+    median_ms = statistics.median(totals)
+    return {
+        "module": budget.module,
+        "median_ms": round(median_ms, 1),
+        "min_ms": round(min(totals), 1),
+        "budget_ms": round(budget.budget_ms * scale, 1),
+        "within_budget": median_ms <= budget.budget_ms * scale,
+        "forbidden_loaded": forbidden,
+        "heaviest_children_ms": {name: round(cumulative / 1000, 1) for name, cumulative in heaviest},
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure import time of backend entry points against budgets.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="Multiply every budget, e.g. on slow CI")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args(argv)
+
+    results = [measure(budget, runs=args.runs, scale=args.budget_scale) for budget in IMPORT_BUDGETS]
+    report = {"revision": git_revision(), "python": sys.version.split()[0], "imports": results}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return 0 if all(result["within_budget"] and not result["forbidden_loaded"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from backend.storage.base import LISTING_INDEXES, SessionFilter
+from backend.storage.sqlite import SessionsRepo
+from benchmarks.workflow import git_revision, summarize
+
+STATUSES = ("NEW", "NEEDS_CONFIRMATION", "APPROVED")
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def populate(repo: SessionsRepo, *, rows: int, blob_bytes: int, seed: int = 7, batch: int = 10_000) -> None:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    blob = json.dumps({"payload": "x" * blob_bytes})
+    with repo._connect(write=True) as conn:
+        for start in range(0, rows, batch):
+            values = []
+            for idx in range(start, min(rows, start + batch)):
+                updated = (now - timedelta(seconds=rng.randrange(90 * 24 * 3600))).strftime(TIMESTAMP_FORMAT)
+                session_id = f"{idx:08d}-{rng.getrandbits(64):016x}"
+                status = rng.choice(STATUSES)
+                values.append((session_id, f"Story {idx}", blob, blob, status, rng.randrange(6), updated, updated))
+            conn.executemany(
+                """
+                INSERT INTO sessions (
+                    session_id, requirement_text, spec_json, proposal_json, status, version, created_at, updated_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                values,
+            )
+
+
+def walk_pages(repo: SessionsRepo, filters: SessionFilter | None, *, pages: int, limit: int) -> int:
+    after = None
+    seen = 0
+    for _ in range(pages):
+        page = repo.list_sessions(limit=limit, filters=filters, after=after)
+        if not page:
+            break
+        seen += len(page)
+        after = (page[-1]["updated_at"], page[-1]["session_id"])
+    return seen
+
+
+def queries(*, stale_before: str) -> dict[str, Callable[[SessionsRepo], Any]]:
+    stale = SessionFilter(status="NEEDS_CONFIRMATION", updated_before=stale_before)
+    return {
+        "first_page": lambda repo: repo.list_sessions(limit=50),
+        "stale_needs_confirmation": lambda repo: repo.list_sessions(limit=50, filters=stale),
+        "stale_walk_20_pages": lambda repo: walk_pages(repo, stale, pages=20, limit=50),
+        "version_3_first_page": lambda repo: repo.list_sessions(limit=50, filters=SessionFilter(version=3)),
+    }
+
+
+def measure(repo: SessionsRepo, *, repeats: int, stale_before: str) -> dict[str, dict[str, float]]:
+    results = {}
+    for name, query in queries(stale_before=stale_before).items():
+        samples = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            query(repo)
+            samples.append(time.perf_counter() - started)
+        results[name] = summarize(samples)
+    return results
+
+
+def run_listing(*, rows: int, blob_bytes: int, repeats: int, db_path: str, compare_unindexed: bool) -> dict[str, Any]:
+    repo = SessionsRepo(db_path)
+    started = time.perf_counter()
+    populate(repo, rows=rows, blob_bytes=blob_bytes)
+    with repo._connect(write=True) as conn:
+        conn.execute("ANALYZE")
+    populate_s = time.perf_counter() - started
+    stale_before = (datetime.now(timezone.utc) - timedelta(days=7)).strftime(TIMESTAMP_FORMAT)
+
+    report: dict[str, Any] = {
+        "rows": rows,
+        "blob_bytes": blob_bytes,
+        "populate_s": round(populate_s, 3),
+        "db_file_bytes": Path(db_path).stat().st_size,
+        "indexed": measure(repo, repeats=repeats, stale_before=stale_before),
+    }
+    if compare_unindexed:
+        with repo._connect(write=True) as conn:
+            for name in LISTING_INDEXES:
+                conn.execute(f"DROP INDEX {name}")
+        report["unindexed"] = measure(repo, repeats=max(1, repeats // 10), stale_before=stale_before)
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark GET /sessions listing queries on a large sessions table.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--blob-bytes", type=int, default=512)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--no-compare", action="store_true", help="Skip the run with listing indexes dropped")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        run = run_listing(
+            rows=args.rows,
+            blob_bytes=args.blob_bytes,
+            repeats=args.repeats,
+            db_path=str(Path(tmp) / "listing.db"),
+            compare_unindexed=not args.no_compare,
+        )
+    report = {"revision": git_revision(), "python": sys.version.split()[0], **run}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from backend.graph.drafting import DraftPolicy, relevant_bible
+from backend.graph.prompts import draft_chapter_prompts
+from backend.graph.retrieval import PlanIndex
+from backend.graph.schemas import (
+    CharacterArc,
+    CharacterEntry,
+    EndingPlan,
+    ForeshadowingRow,
+    OutlineChapter,
+    OutlineFull,
+    StoryBible,
+    StyleGuide,
+    TimelineEntry,
+    WorldInfo,
+)
+from backend.llm.routing import estimate_tokens
+from benchmarks.workflow import git_revision, percentile, summarize
+
+FIRST_NAMES = ("Mara", "Ilya", "Tomas", "Sena", "Orin", "Lia", "Dov", "Kesh", "Rhea", "Bram", "Juno", "Pavel")
+PLACES = ("harbor", "archive", "citadel", "market", "foundry", "chapel", "tunnels", "observatory", "docks", "manor")
+
+
+def synthetic_plan(*, chapters: int, characters: int, seed: int = 11) -> tuple[StoryBible, OutlineFull]:
+    rng = random.Random(seed)
+    names = [f"{FIRST_NAMES[idx % len(FIRST_NAMES)]} {chr(65 + idx // len(FIRST_NAMES))}" for idx in range(characters)]
+    cast = [
+        CharacterEntry(
+            name=name,
+            role=rng.choice(["ally", "rival", "mentor", "informant", "suspect"]),
+            goal=f"protect the {rng.choice(PLACES)} at any cost",
+            flaw=rng.choice(["pride", "fear of loss", "impatience", "distrust"]),
+            secret=f"once betrayed {rng.choice(names)}",
+            voice=rng.choice(["clipped", "warm", "formal", "sardonic"]),
+            relationships=[f"owes {rng.choice(names)} a debt", f"distrusts {rng.choice(names)}"],
+        )
+        for name in names
+    ]
+    timeline = [
+        TimelineEntry(
+            id=f"T{idx}",
+            event=f"{rng.choice(names)} is seen at the {rng.choice(PLACES)}",
+            when=f"Day {idx}",
+            consequences=f"{rng.choice(names)} starts to suspect a cover-up",
+        )
+        for idx in range(1, characters * 2 + 1)
+    ]
+    bible = StoryBible(
+        title_working="The Long Ledger",
+        genre="mystery",
+        tone="tense",
+        pov="third person limited",
+        style_guide=StyleGuide(
+            diction="precise",
+            sentence_length="varied",
+            dialogue_ratio="40%",
+            taboo_list=["modern slang"],
+            examples=["concrete sensory detail"],
+        ),
+        world=WorldInfo(
+            setting_time="1890s",
+            setting_place="a port city",
+            rules=[f"the {place} closes at dusk and is watched by the guild" for place in PLACES],
+            factions=["the guild", "the harbor watch", "the smugglers"],
+            tech_or_magic_level="gaslight",
+        ),
+        characters=cast,
+        timeline=timeline,
+        canon_rules=["no supernatural explanations", "the culprit appears before chapter 5"],
+    )
+    rows = [
+        ForeshadowingRow(
+            id=f"F{idx}",
+            setup_chapter=setup,
+            payoff_chapter=min(chapters, setup + rng.randrange(2, 12)),
+            description=f"a detail about {rng.choice(names)} at the {rng.choice(PLACES)}",
+            evidence_style="quiet breadcrumb",
+        )
+        for idx, setup in enumerate(range(1, chapters, 3), start=1)
+    ]
+    outline_chapters = [
+        OutlineChapter(
+            index=index,
+            title=f"Chapter {index}",
+            goal=f"follow the trail to the {rng.choice(PLACES)}",
+            conflict=f"{rng.choice(names)} blocks the way",
+            twist="none",
+            hook="a new question",
+            locations=rng.sample(PLACES, 2),
+            characters_involved=rng.sample(names, min(6, len(names))),
+            foreshadowing_in=[row.id for row in rows if row.setup_chapter == index],
+            foreshadowing_out=[row.id for row in rows if row.payoff_chapter == index],
+        )
+        for index in range(1, chapters + 1)
+    ]
+    arcs = [
+        CharacterArc(character=name, start_state="guarded", key_turns=["confides", "breaks"], end_state="resolved")
+        for name in names[: max(1, characters // 2)]
+    ]
+    outline = OutlineFull(
+        chapters=outline_chapters,
+        character_arcs=arcs,
+        foreshadowing_table=rows,
+        ending=EndingPlan(type="reveal", final_reveal="the guild", emotional_resolution="trust restored"),
+    )
+    return bible, outline
+
+
+def full_context(bible: StoryBible, outline: OutlineFull) -> str:
+    return json.dumps(
+        {
+            "bible": bible.model_dump(mode="json"),
+            "foreshadowing": [row.model_dump(mode="json") for row in outline.foreshadowing_table],
+            "character_arcs": [arc.model_dump(mode="json") for arc in outline.character_arcs],
+        },
+        indent=2,
+    )
+
+
+def run_prompt_context(*, chapters: int, characters: int, top_k: int) -> dict[str, Any]:
+    bible, outline = synthetic_plan(chapters=chapters, characters=characters)
+    policy = DraftPolicy(top_k=top_k)
+    started = time.perf_counter()
+    index = PlanIndex(bible, outline)
+    build_s = time.perf_counter() - started
+
+    full_tokens: list[float] = []
+    slim_tokens: list[float] = []
+    query_s: list[float] = []
+    recall: list[float] = []
+    foreshadowing_recall: list[float] = []
+    baseline = full_context(bible, outline)
+    for chapter in outline.chapters:
+        _, full_prompt = draft_chapter_prompts(chapter, baseline, "")
+        started = time.perf_counter()
+        context = relevant_bible(index, chapter, policy)
+        query_s.append(time.perf_counter() - started)
+        _, slim_prompt = draft_chapter_prompts(chapter, context, "")
+        full_tokens.append(estimate_tokens(full_prompt))
+        slim_tokens.append(estimate_tokens(slim_prompt))
+        retrieved = json.loads(context)
+        names = {entry["name"] for entry in retrieved["characters"]}
+        recall.append(len(names & set(chapter.characters_involved)) / len(chapter.characters_involved))
+        keys = {*chapter.foreshadowing_in, *chapter.foreshadowing_out}
+        if keys:
+            rows = {row["id"] for row in retrieved["foreshadowing"]}
+            foreshadowing_recall.append(len(rows & keys) / len(keys))
+
+    full_mean = sum(full_tokens) / len(full_tokens)
+    slim_mean = sum(slim_tokens) / len(slim_tokens)
+    return {
+        "chapters": chapters,
+        "characters": characters,
+        "top_k": top_k,
+        "full_prompt_tokens": {"mean": round(full_mean, 1), "p95": percentile(full_tokens, 95)},
+        "retrieved_prompt_tokens": {"mean": round(slim_mean, 1), "p95": percentile(slim_tokens, 95)},
+        "token_reduction": round(1 - slim_mean / full_mean, 3),
+        "character_recall": round(sum(recall) / len(recall), 3),
+        "foreshadowing_recall": round(sum(foreshadowing_recall) / len(foreshadowing_recall), 3)
+        if foreshadowing_recall
+        else 1.0,
+        "index_build_ms": round(build_s * 1000, 2),
+        "query_s": summarize(query_s),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare full-bible chapter prompts with retrieved context.")
+    parser.add_argument("--chapters", type=int, default=40)
+    parser.add_argument("--characters", type=int, default=30)
+    parser.add_argument("--top-k", type=int, default=DraftPolicy.top_k)
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args(argv)
+
+    run = run_prompt_context(chapters=args.chapters, characters=args.characters, top_k=args.top_k)
+    report = {"revision": git_revision(), "python": sys.version.split()[0], **run}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
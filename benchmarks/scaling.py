@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from benchmarks.workflow import Recorder, git_revision, run_flow
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@contextmanager
+def uvicorn_workers(*, workers: int, workdir: Path, latency: str) -> Iterator[httpx.Client]:
+    port = _free_port()
+    env = {
+        **os.environ,
+        "NOVEL_FLOW_DB": str(workdir / "bench.db"),
+        "NOVEL_FLOW_SHARED_DIR": str(workdir / "shared"),
+        "NOVEL_FLOW_LLM_BACKEND": "placeholder",
+        "NOVEL_FLOW_PLACEHOLDER_LATENCY": latency,
+    }
+    command = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "backend.app:app",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--workers",
+        str(workers),
+        "--log-level",
+        "warning",
+    ]
+    server = subprocess.Popen(command, env=env, cwd=Path(__file__).resolve().parent.parent)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=120) as http:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    if http.get("/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn workers did not start")
+                time.sleep(0.05)
+            yield http
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+
+def run_workers(*, workers: int, sessions: int, concurrency: int, latency: str) -> dict[str, Any]:
+    recorder = Recorder()
+    with tempfile.TemporaryDirectory() as tmp, uvicorn_workers(
+        workers=workers, workdir=Path(tmp), latency=latency
+    ) as http:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda idx: run_flow(http, recorder, f"Plan a dark magic novel #{idx}"), range(sessions)))
+        elapsed = time.perf_counter() - started
+    endpoints = recorder.summary("http:")
+    return {
+        "workers": workers,
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "latency": latency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_flows_per_s": round(sessions / elapsed, 3) if elapsed else 0.0,
+        "errors": sum(int(stats["errors"]) for stats in endpoints.values()),
+        "endpoints": endpoints,
+    }
+
+
+def run_scaling(*, workers: list[int], sessions: int, concurrency: int, latency: str) -> list[dict[str, Any]]:
+    runs = [run_workers(workers=count, sessions=sessions, concurrency=concurrency, latency=latency) for count in workers]
+    base = runs[0]["throughput_flows_per_s"] or 1.0
+    for run in runs:
+        run["speedup"] = round(run["throughput_flows_per_s"] / base, 3)
+    return runs
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure flow throughput as uvicorn workers scale from 1 to N.")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", default="none", help="Placeholder LLM latency model, e.g. fixed:0.02")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args(argv)
+
+    runs = run_scaling(
+        workers=[int(count) for count in args.workers.split(",")],
+        sessions=args.sessions,
+        concurrency=args.concurrency,
+        latency=args.latency,
+    )
+    report = {"revision": git_revision(), "python": sys.version.split()[0], "runs": runs}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
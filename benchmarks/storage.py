@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from backend.graph.placeholder import build_proposal
+from backend.graph.schemas import ProposalStatus
+from backend.storage.base import SessionStore, open_store
+from benchmarks.workflow import Recorder, git_revision
+
+
+def _timed(recorder: Recorder, name: str, call: Any) -> Any:
+    started = time.perf_counter()
+    result = call()
+    recorder.add(name, time.perf_counter() - started)
+    return result
+
+
+def run_session(store: SessionStore, recorder: Recorder, idx: int) -> None:
+    proposal = build_proposal(f"Plan a dark magic novel #{idx}", version=1, status=ProposalStatus.NEEDS_CONFIRMATION)
+    payload = proposal.model_dump(mode="json")
+    session_id = _timed(recorder, "create_session", lambda: store.create_session(f"Plan a dark magic novel #{idx}"))
+    _timed(recorder, "get_session", lambda: store.get_session(session_id))
+    _timed(
+        recorder,
+        "update_session",
+        lambda: store.update_session(
+            session_id,
+            spec_json=payload["requirement_spec"],
+            proposal_json=payload,
+            status=ProposalStatus.NEEDS_CONFIRMATION.value,
+            version=1,
+        ),
+    )
+    _timed(
+        recorder,
+        "save_plan",
+        lambda: store.save_plan(session_id, bible_json=payload, outline_full_json=payload["outline_lite"], bump=False),
+    )
+    _timed(recorder, "list_sessions", lambda: store.list_sessions(limit=20))
+
+
+def run_store(*, name: str, url: str, sessions: int, concurrency: int) -> dict[str, Any]:
+    store = open_store(url)
+    recorder = Recorder()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda idx: run_session(store, recorder, idx), range(sessions)))
+    elapsed = time.perf_counter() - started
+    operations = recorder.summary()
+    if hasattr(store, "close"):
+        store.close()
+    return {
+        "store": name,
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "operations_per_s": round(sum(int(stats["count"]) for stats in operations.values()) / elapsed, 1)
+        if elapsed
+        else 0.0,
+        "operations": operations,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark SessionStore implementations with the same workload.")
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--postgres-dsn", help="Also benchmark PostgreSQL at this DSN")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args(argv)
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        runs.append(
+            run_store(
+                name="sqlite", url=str(Path(tmp) / "bench.db"), sessions=args.sessions, concurrency=args.concurrency
+            )
+        )
+    if args.postgres_dsn:
+        runs.append(run_store(name="postgres", url=args.postgres_dsn, sessions=args.sessions, concurrency=args.concurrency))
+
+    report = {"revision": git_revision(), "python": sys.version.split()[0], "runs": runs}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
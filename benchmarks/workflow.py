@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.app import create_app
+from backend.llm.backends import DelayedBackend, LatencyModel, PlaceholderBackend
+from backend.storage.sqlite import SessionsRepo
+
+REPO_METHODS = ("create_session", "get_session", "update_session")
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float, *, failed: bool = False) -> None:
+        with self._lock:
+            self.samples[name].append(seconds)
+            if failed:
+                self.errors[name] += 1
+
+    def summary(self, prefix: str = "") -> dict[str, dict[str, float]]:
+        return {
+            name[len(prefix) :]: summarize(values, self.errors.get(name, 0))
+            for name, values in sorted(self.samples.items())
+            if name.startswith(prefix)
+        }
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(values: list[float], errors: int = 0) -> dict[str, float]:
+    return {
+        "count": len(values),
+        "errors": errors,
+        "mean_ms": round(1000 * sum(values) / len(values), 3) if values else 0.0,
+        "p50_ms": round(1000 * percentile(values, 50), 3),
+        "p95_ms": round(1000 * percentile(values, 95), 3),
+        "p99_ms": round(1000 * percentile(values, 99), 3),
+    }
+
+
+def _step(recorder: Recorder, name: str, call: Callable[[], httpx.Response]) -> httpx.Response:
+    started = time.perf_counter()
+    response = call()
+    recorder.add(f"http:{name}", time.perf_counter() - started, failed=response.status_code >= 400)
+    return response
+
+
+def run_flow(http: Any, recorder: Recorder, text: str) -> None:
+    session_id = _step(recorder, "POST /intake", lambda: http.post("/intake", json={"text": text})).json()["session_id"]
+    _step(recorder, "GET /proposal", lambda: http.get(f"/proposal/{session_id}"))
+    _step(
+        recorder,
+        "POST /decision edit",
+        lambda: http.post(
+            "/decision", json={"session_id": session_id, "action": "edit", "text": "Use first person perspective"}
+        ),
+    )
+    _step(
+        recorder,
+        "POST /decision approve",
+        lambda: http.post("/decision", json={"session_id": session_id, "action": "approve"}),
+    )
+    _step(recorder, "GET /plan", lambda: http.get(f"/plan/{session_id}"))
+
+
+@contextmanager
+def sqlite_probe(recorder: Recorder) -> Iterator[None]:
+    originals = {name: getattr(SessionsRepo, name) for name in REPO_METHODS}
+
+    def timed(name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            failed = False
+            try:
+                return method(*args, **kwargs)
+            except sqlite3.OperationalError:
+                failed = True
+                raise
+            finally:
+                recorder.add(f"db:{name}", time.perf_counter() - started, failed=failed)
+
+        return wrapper
+
+    for name, method in originals.items():
+        setattr(SessionsRepo, name, timed(name, method))
+    try:
+        yield
+    finally:
+        for name, method in originals.items():
+            setattr(SessionsRepo, name, method)
+
+
+@contextmanager
+def in_process_client(app: FastAPI) -> Iterator[TestClient]:
+    with TestClient(app) as http:
+        yield http
+
+
+@contextmanager
+def uvicorn_client(app: FastAPI) -> Iterator[httpx.Client]:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("uvicorn did not start")
+        time.sleep(0.01)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=120) as http:
+            yield http
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+CLIENTS = {"inprocess": in_process_client, "uvicorn": uvicorn_client}
+
+
+def run_benchmark(*, mode: str, sessions: int, concurrency: int, latency: str, db_path: str) -> dict[str, Any]:
+    backend = DelayedBackend(PlaceholderBackend(), LatencyModel.parse(latency))
+    app = create_app(db_path, llm_backend=backend)
+    recorder = Recorder()
+
+    tracemalloc.start()
+    baseline_bytes = tracemalloc.get_traced_memory()[0]
+    with sqlite_probe(recorder), CLIENTS[mode](app) as http:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda idx: run_flow(http, recorder, f"Plan a dark magic novel #{idx}"), range(sessions)))
+        elapsed = time.perf_counter() - started
+        retained_bytes = tracemalloc.get_traced_memory()[0] - baseline_bytes
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    db = recorder.summary("db:")
+    return {
+        "mode": mode,
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "latency": latency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_flows_per_s": round(sessions / elapsed, 3) if elapsed else 0.0,
+        "endpoints": recorder.summary("http:"),
+        "sqlite": {
+            "operations": db,
+            "lock_errors": sum(int(stats["errors"]) for stats in db.values()),
+            "db_file_bytes": Path(db_path).stat().st_size,
+        },
+        "memory": {
+            "retained_bytes_per_session": retained_bytes // max(1, sessions),
+            "peak_traced_bytes": peak_bytes,
+        },
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any]) -> list[str]:
+    lines = []
+    baseline_runs = {run["mode"]: run for run in baseline.get("runs", [])}
+    for run in current["runs"]:
+        previous = baseline_runs.get(run["mode"])
+        if previous is None:
+            continue
+        lines.append(
+            f"[{run['mode']}] throughput {previous['throughput_flows_per_s']} -> {run['throughput_flows_per_s']} flows/s"
+        )
+        for endpoint, stats in run["endpoints"].items():
+            before = previous["endpoints"].get(endpoint)
+            if before:
+                lines.append(
+                    f"[{run['mode']}] {endpoint}: p50 {before['p50_ms']} -> {stats['p50_ms']} ms, "
+                    f"p95 {before['p95_ms']} -> {stats['p95_ms']} ms, p99 {before['p99_ms']} -> {stats['p99_ms']} ms"
+                )
+    return lines
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the intake -> proposal -> edit -> approve -> plan flow.")
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn", "both"], default="inprocess")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", default="fixed:0.02", help="LLM latency model, e.g. lognormal:0.05,0.5")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    parser.add_argument("--baseline", help="Compare against a previous JSON report")
+    args = parser.parse_args(argv)
+
+    modes = ["inprocess", "uvicorn"] if args.mode == "both" else [args.mode]
+    runs = []
+    for mode in modes:
+        with tempfile.TemporaryDirectory() as tmp:
+            runs.append(
+                run_benchmark(
+                    mode=mode,
+                    sessions=args.sessions,
+                    concurrency=args.concurrency,
+                    latency=args.latency,
+                    db_path=str(Path(tmp) / "bench.db"),
+                )
+            )
+    report = {"revision": git_revision(), "python": sys.version.split()[0], "runs": runs}
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+    if args.baseline:
+        print("\n".join(compare(report, json.loads(Path(args.baseline).read_text(encoding="utf-8")))))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())